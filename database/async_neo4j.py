@@ -0,0 +1,441 @@
+import sys
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import ServiceUnavailable
+from utils.error_handler import ErrorHandler
+from utils.config_loader import ConfigLoader as config
+from utils.hashing import content_hash
+
+from database.neo4j import GraphQueries
+
+error_handler = ErrorHandler()
+
+
+async def _fetch_all(tx, query, parameters):
+    # Records have to be consumed before the managed transaction ends
+    result = await tx.run(query, parameters)
+    return [record async for record in result]
+
+
+class AsyncGraphDatabaseConnection:
+    """
+    Asyncio counterpart of GraphDatabaseConnection, built on the async Neo4j driver.
+    """
+    def __init__(
+            self,
+            uri,
+            user,
+            password,
+            database=None,
+            max_connection_pool_size=None,
+            fetch_size=None,
+            max_transaction_retry_time=None
+        ):
+        driver_options = {}
+        if max_connection_pool_size:
+            driver_options["max_connection_pool_size"] = int(max_connection_pool_size)
+        if max_transaction_retry_time:
+            driver_options["max_transaction_retry_time"] = float(max_transaction_retry_time)
+
+        self._driver = AsyncGraphDatabase.driver(uri, auth=(user, password), **driver_options)
+        self.database = database
+        self.fetch_size = int(fetch_size) if fetch_size else 1000
+        self.error_handler = error_handler
+
+    async def close(self):
+        await self._driver.close()
+
+    def session(self, access_mode=WRITE_ACCESS, fetch_size=None):
+        return self._driver.session(
+            database=self.database,
+            default_access_mode=access_mode,
+            fetch_size=fetch_size or self.fetch_size
+        )
+
+    async def execute_read(self, work, *args, **kwargs):
+        async with self.session(READ_ACCESS) as session:
+            return await session.execute_read(work, *args, **kwargs)
+
+    async def execute_write(self, work, *args, **kwargs):
+        async with self.session(WRITE_ACCESS) as session:
+            return await session.execute_write(work, *args, **kwargs)
+
+    async def read(self, query, parameters={}):
+        try:
+            return await self.execute_read(_fetch_all, query, parameters)
+        except ServiceUnavailable as e:
+            self.error_handler.service_unavailable(e)
+            return None
+        except Exception as e:
+            self.error_handler.handle_error(e)
+            return None
+
+    async def stream(self, query, parameters={}, fetch_size=None):
+        """
+        Async generator variant of read. See GraphDatabaseConnection.stream.
+        """
+        try:
+            async with self.session(READ_ACCESS, fetch_size=fetch_size) as session:
+                async with await session.begin_transaction() as tx:
+                    result = await tx.run(query, parameters)
+                    async for record in result:
+                        yield record
+        except ServiceUnavailable as e:
+            self.error_handler.service_unavailable(e)
+            raise
+        except Exception as e:
+            self.error_handler.handle_error(e)
+            raise
+
+    async def write(self, query, parameters={}):
+        try:
+            return await self.execute_write(_fetch_all, query, parameters)
+        except ServiceUnavailable as e:
+            self.error_handler.service_unavailable(e)
+            self.error_handler.exception(sys.exc_info())
+            return False
+        except Exception as e:
+            self.error_handler.exception(sys.exc_info())
+            return False
+
+
+class AsyncGraph(GraphQueries):
+    """
+    Asyncio counterpart of Graph.
+
+    Exposes the finder, linking and update methods of Graph as coroutines and runs
+    exactly the same queries, so an asyncio pipeline can overlap graph I/O with
+    LLM calls without a thread per in-flight request. Similarity search and
+    ingestion through the vector store remain on the synchronous Graph.
+
+    Usage:
+        async with AsyncGraph() as graph:
+            sections = await graph.find_child_nodes(document_id, node_label="Section", sequence_label="NEXT")
+    """
+    def __init__(self):
+        neo4j_config = config().get_neo4j_config()
+        self._init_queries()
+        self.graph_database = AsyncGraphDatabaseConnection(
+            uri=neo4j_config['URI'],
+            user=neo4j_config['USER'],
+            password=neo4j_config['PASSWORD'],
+            database=neo4j_config.get('DATABASE'),
+            max_connection_pool_size=neo4j_config.get('MAX_CONNECTION_POOL_SIZE'),
+            fetch_size=neo4j_config.get('FETCH_SIZE'),
+            max_transaction_retry_time=neo4j_config.get('MAX_TRANSACTION_RETRY_TIME')
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await self.graph_database.close()
+
+    async def find_node_by_id(self, node_id, projection=None):
+        """
+        See Graph.find_node_by_id.
+        """
+        if not isinstance(node_id, (int, str)):
+            self.error_handler.generic_error(f"Invalid node ID: {node_id}")
+            return None
+
+        query, params = self._node_by_id_query(node_id, projection)
+        records = await self.graph_database.read(query, params)
+        if records:
+            return self._to_node(records[0]['n'])
+        return None
+
+    async def find_nodes_by_properties(self, properties, node_label=None, projection=None):
+        """
+        See Graph.find_nodes_by_properties.
+        """
+        query, params = self._nodes_by_properties_query(properties, node_label, projection)
+        records = await self.graph_database.read(query, params)
+        return [self._to_node(record['n']) for record in records or []]
+
+    async def iter_nodes(self, node_label, projection=None, fetch_size=None):
+        """
+        See Graph.iter_nodes.
+        """
+        async for node in self.iter_nodes_by_properties({}, node_label=node_label, projection=projection, fetch_size=fetch_size):
+            yield node
+
+    async def iter_nodes_by_properties(self, properties, node_label=None, projection=None, fetch_size=None):
+        """
+        See Graph.iter_nodes_by_properties.
+        """
+        query, params = self._nodes_by_properties_query(properties, node_label, projection)
+        async for record in self.graph_database.stream(query, params, fetch_size=fetch_size):
+            yield self._to_node(record['n'])
+
+    async def find_nodes_by_content_hashes(self, hashes, node_label=None, projection=None, batch_size=None):
+        """
+        See Graph.find_nodes_by_content_hashes. Uses the label's Bloom filter only if it was already loaded.
+        """
+        hashes = self._filter_known_hashes(hashes, node_label)
+        if not hashes:
+            return {}
+
+        batch_size = batch_size or self.batch_size
+        query, params = self._nodes_by_content_hashes_query(node_label, projection)
+
+        nodes = {}
+        for index in range(0, len(hashes), batch_size):
+            records = await self.graph_database.read(query, {**params, "hashes": hashes[index:index + batch_size]})
+            for record in records or []:
+                nodes[record["content_hash"]] = self._to_node(record["n"])
+        return nodes
+
+    async def find_nodes_by_text(self, texts, node_label=None, projection=None):
+        """
+        See Graph.find_nodes_by_text.
+        """
+        if not isinstance(texts, list):
+            texts = [texts]
+        return await self.find_nodes_by_content_hashes(
+            [content_hash(text) for text in texts],
+            node_label=node_label,
+            projection=projection
+        )
+
+    async def find_parent_node_by_id(self, node_id, parent_label, projection=None):
+        """
+        See Graph.find_parent_node_by_id.
+        """
+        query, params = self._parent_node_query(node_id, parent_label, projection)
+        records = await self.graph_database.read(query, params)
+        if records:
+            return self._to_node(records[0]['parent'])
+        return None
+
+    async def find_child_nodes(self, parent_id, node_label=None, sequence_label=None, offset=0, limit=None, projection=None):
+        """
+        See Graph.find_child_nodes.
+        """
+        query, params = self._child_nodes_query(parent_id, node_label, sequence_label, offset, limit, projection)
+        records = await self.graph_database.read(query, params)
+        return [self._to_node(record['child']) for record in records or []]
+
+    async def iter_child_nodes(self, parent_id, node_label=None, sequence_label=None, offset=0, limit=None, projection=None, fetch_size=None):
+        """
+        See Graph.iter_child_nodes.
+        """
+        query, params = self._child_nodes_query(parent_id, node_label, sequence_label, offset, limit, projection)
+        async for record in self.graph_database.stream(query, params, fetch_size=fetch_size):
+            yield self._to_node(record['child'])
+
+    async def find_child_nodes_by_properties(self, properties, parent_id=None, node_label=None, projection=None):
+        """
+        See Graph.find_child_nodes_by_properties.
+        """
+        query, params = self._child_nodes_by_properties_query(properties, parent_id, node_label, projection)
+        records = await self.graph_database.read(query, params)
+        return [self._to_node(record['child']) for record in records or []]
+
+    async def find_edge_by_id(self, edge_id):
+        query, params = self._edge_by_id_query(edge_id)
+        records = await self.graph_database.read(query, params)
+        if records:
+            return records[0]['r']
+        return None
+
+    async def find_edges_by_property(self, property, value, origin_id=None, target_id=None):
+        query, params = self._edges_by_property_query(property, value, origin_id, target_id)
+        records = await self.graph_database.read(query, params)
+        return [record['r'] for record in records or []]
+
+    async def find_edges_by_relationship(self, relationship_name, origin_id=None, target_id=None):
+        """
+        See Graph.find_edges_by_relationship.
+        """
+        query, params = self._edges_by_relationship_query(relationship_name, origin_id, target_id)
+        records = await self.graph_database.read(query, params)
+        return [record['r'] for record in records or []]
+
+    async def check_if_node_exists(self, node_id):
+        return await self.find_node_by_id(node_id) is not None
+
+    async def check_if_edge_exists(self, edge_id):
+        return await self.find_edge_by_id(edge_id) is not None
+
+    async def link_nodes(
+            self,
+            origins,
+            targets,
+            relationship_name="LINKS_TO",
+            edge_values=None,
+            force=False,
+            bidirectional=False
+        ):
+        """
+        See Graph.link_nodes.
+        """
+        if not isinstance(origins, list):
+            origins = [origins]
+
+        # Exclude self-links
+        targets = [target for target in targets if target not in origins]
+        if not targets:
+            self.error_handler.warning("No valid target nodes provided. Skipping.")
+            return False
+
+        stats = await self.link_nodes_bulk(
+            [(origin, target) for origin in origins for target in targets],
+            relationship_name=relationship_name,
+            edge_values=edge_values,
+            force=force,
+            bidirectional=bidirectional
+        )
+        return stats["failed"] == 0
+
+    async def link_nodes_bulk(
+            self,
+            pairs,
+            relationship_name="LINKS_TO",
+            edge_values=None,
+            force=False,
+            bidirectional=False,
+            batch_size=None
+        ):
+        """
+        See Graph.link_nodes_bulk.
+        """
+        stats = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+        batches = self._link_batches(pairs, relationship_name, edge_values, force, bidirectional, batch_size, stats)
+
+        for query, params, batch_length in batches:
+            records = await self.graph_database.write(query, params)
+            self._count_links(stats, records, batch_length, relationship_name)
+        return stats
+
+    async def link_nodes_sequentially(
+            self,
+            targets,
+            origins=None,
+            relationship_name="LINKS_TO",
+            edge_values=None,
+            force=False,
+            bidirectional=False,
+            close_loop=False
+        ):
+        """
+        See Graph.link_nodes_sequentially.
+        """
+        if not origins:
+            if len(targets) < 2:
+                self.error_handler.warning("At least two node IDs are required to link them sequentially.")
+                return False
+            origins = [targets[0]]
+            targets = targets[1:]
+
+        pairs = self._sequence_pairs(targets, origins, close_loop)
+        stats = await self.link_nodes_bulk(
+            pairs,
+            relationship_name=relationship_name,
+            edge_values=edge_values,
+            force=force,
+            bidirectional=bidirectional
+        )
+
+        if stats["failed"]:
+            self.error_handler.warning(f"Failed to link {stats['failed']} of {len(pairs)} node pairs sequentially.")
+            return False
+        return True
+
+    async def update_node_properties(self, node_id, properties):
+        """
+        See Graph.update_node_properties.
+        """
+        query, params = self._update_node_properties_query(node_id, properties)
+        return await self.graph_database.write(query, params) is not False
+
+    async def update_nodes_properties(self, updates, batch_size=None):
+        """
+        See Graph.update_nodes_properties.
+        """
+        results = {node_id: False for node_id in updates}
+        for query, params, batch_length in self._update_nodes_batches(list(updates.items()), batch_size):
+            records = await self.graph_database.write(query, params)
+            if records is False:
+                self.error_handler.warning(f"Error updating batch of {batch_length} nodes")
+                continue
+            for record in records:
+                results[record["node_id"]] = True
+        return results
+
+    async def find_similar_nodes(self, node_id, k=None, index_name=None, similarity_threshold=None, projection=None):
+        """
+        See Graph.find_similar_nodes.
+        """
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+        query, params = self._similar_nodes_query(node_id, k, index_name, similarity_threshold or 0, projection)
+        records = await self.graph_database.read(query, params)
+        return [(self._to_node(record["node"]), record["score"]) for record in records or []]
+
+    async def find_similar_nodes_by_vector(self, vector, k=None, index_name=None, similarity_threshold=None, projection=None):
+        """
+        See Graph.find_similar_nodes_by_vector.
+        """
+        if not index_name:
+            raise ValueError("index_name is required to search by vector")
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+        query, params = self._similar_nodes_by_vector_query(vector, k, index_name, similarity_threshold or 0, projection)
+        records = await self.graph_database.read(query, params)
+        return [(self._to_node(record["node"]), record["score"]) for record in records or []]
+
+    async def find_similar_nodes_in_scope(
+            self,
+            parent_id,
+            node_label,
+            node_id=None,
+            vector=None,
+            k=None,
+            index_name=None,
+            similarity_threshold=None,
+            relationship_name="CONTAINS",
+            max_depth=None,
+            projection=None
+        ):
+        """
+        See Graph.find_similar_nodes_in_scope.
+        """
+        if node_id is None and vector is None:
+            raise ValueError("node_id or vector is required for a scoped search")
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+
+        query, params = self._scope_size_query(parent_id, node_label, relationship_name, max_depth)
+        records = await self.graph_database.read(query, params)
+        if not records or not records[0]["scope_size"]:
+            return []
+        scope_size, label_size = records[0]["scope_size"], records[0]["label_size"]
+
+        candidates = self._scope_candidates(k, scope_size, label_size)
+        while True:
+            query, params = self._scoped_similar_nodes_query(
+                parent_id, node_label, k, node_id, vector, index_name, similarity_threshold or 0,
+                relationship_name, max_depth, candidates, projection
+            )
+            records = await self.graph_database.read(query, params) or []
+            results, done = self._scoped_results(records, k, candidates, label_size, similarity_threshold or 0)
+            if done:
+                return results
+            candidates = self._scope_candidates(k, scope_size, label_size, previous=candidates)
+
+    async def find_similar_nodes_by_vectors(self, vectors, k=None, index_name=None, similarity_threshold=None, projection=None):
+        """
+        See Graph.find_similar_nodes_by_vectors.
+        """
+        if not index_name:
+            raise ValueError("index_name is required to search by vector")
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+        results = [[] for _ in vectors]
+        for query, params, start in self._similar_nodes_by_vectors_batches(vectors, k, index_name, similarity_threshold or 0, projection):
+            for record in await self.graph_database.read(query, params) or []:
+                results[start + record["position"]] = [(self._to_node(match["node"]), match["score"]) for match in record["matches"]]
+        return results
@@ -0,0 +1,25 @@
+from utils.config_loader import ConfigLoader as config
+
+BACKENDS = ("neo4j", "memory")
+
+
+def create_graph(backend=None):
+    """
+    Create the Graph for the configured backend.
+
+    Args:
+        backend (str, optional): "neo4j" or "memory". Defaults to GRAPH.BACKEND.
+
+    Returns:
+        Graph: A Graph connected to Neo4j, or a MemoryGraph.
+    """
+    backend = backend or config().get_config().get("GRAPH", {}).get("BACKEND", "neo4j")
+
+    if backend == "neo4j":
+        from database.neo4j import Graph
+        return Graph()
+    if backend == "memory":
+        from database.memory import MemoryGraph
+        return MemoryGraph()
+
+    raise ValueError(f"Unknown graph backend {backend!r}. Use one of {', '.join(BACKENDS)}.")
@@ -0,0 +1,233 @@
+import sys
+from utils.error_handler import ErrorHandler
+from utils.config_loader import ConfigLoader as config
+
+error_handler = ErrorHandler()
+
+# Plan operators that read a whole label, relationship type or the entire store
+SCAN_OPERATORS = {
+    "AllNodesScan",
+    "NodeByLabelScan",
+    "DirectedAllRelationshipsScan",
+    "UndirectedAllRelationshipsScan",
+    "DirectedRelationshipTypeScan",
+    "UndirectedRelationshipTypeScan",
+}
+
+
+class _PlanRecorder:
+    """
+    Stands in for a GraphDatabaseConnection and records the plan of every query
+    instead of executing it.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.plans = []
+
+    def read(self, query, parameters={}):
+        self.plans.append((query, self.connection.explain(query, parameters)))
+        return []
+
+    def write(self, query, parameters={}):
+        return self.read(query, parameters)
+
+
+class SchemaManager:
+    """
+    Declares the indexes and constraints the Graph queries rely on and creates them idempotently.
+
+    Usage:
+        python -m database.indexes migrate   # create missing indexes and constraints
+        python -m database.indexes report    # list Graph queries that still scan
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.error_handler = error_handler
+        self.config = config()
+        schema_config = self.config.get_config().get("SCHEMA", {})
+        self.vector_config = self.config.get_vector_index_config()
+        self.labels = list(schema_config.get("LABELS", ["Document", "Section", "Chunk"]))
+        self.hash_property = graph.hash_property
+        self.fulltext_properties = list(self.config.get_config().get("HYBRID_SEARCH", {}).get("PROPERTIES", ["text", "title", "topics"]))
+
+    def declarations(self):
+        """
+        Return the declared schema as a list of dicts with "name", "label", "property" and "statement".
+        """
+        embedding_property = self.vector_config.get("PROPERTY_KEY", "embedding")
+        dimension = int(self.vector_config.get("VECTOR_DIMENSION", 1536))
+        similarity_function = self.vector_config.get("SIMILARITY_FUNCTION", "cosine")
+
+        # Vector stores use the node label as index name, plus the explicitly configured index
+        vector_indexes = [(label, label) for label in self.labels]
+        if self.vector_config.get("LABEL") and self.vector_config.get("VECTOR_INDEX_NAME"):
+            vector_indexes.append((self.vector_config["VECTOR_INDEX_NAME"], self.vector_config["LABEL"]))
+
+        declarations = []
+        for label in self.labels:
+            declarations.append({
+                "name": f"{label.lower()}_id_unique",
+                "label": label,
+                "property": "id",
+                "statement": f"CREATE CONSTRAINT {label.lower()}_id_unique IF NOT EXISTS "
+                             f"FOR (n:{label}) REQUIRE n.id IS UNIQUE",
+            })
+            declarations.append({
+                "name": f"{label.lower()}_{self.hash_property}_unique",
+                "label": label,
+                "property": self.hash_property,
+                "statement": f"CREATE CONSTRAINT {label.lower()}_{self.hash_property}_unique IF NOT EXISTS "
+                             f"FOR (n:{label}) REQUIRE n.{self.hash_property} IS UNIQUE",
+            })
+
+            declarations.append({
+                "name": f"{label.lower()}_last_indexed",
+                "label": label,
+                "property": "last_indexed",
+                "statement": f"CREATE INDEX {label.lower()}_last_indexed IF NOT EXISTS "
+                             f"FOR (n:{label}) ON (n.last_indexed)",
+            })
+
+        for label in self.labels:
+            properties = ", ".join(f"n.{property}" for property in self.fulltext_properties)
+            declarations.append({
+                "name": f"{label.lower()}_fulltext",
+                "label": label,
+                "property": self.fulltext_properties[0],
+                "statement": f"CREATE FULLTEXT INDEX {label.lower()}_fulltext IF NOT EXISTS "
+                             f"FOR (n:{label}) ON EACH [{properties}]",
+            })
+
+        for index_name, label in vector_indexes:
+            declarations.append({
+                "name": index_name,
+                "label": label,
+                "property": embedding_property,
+                "statement": f"CREATE VECTOR INDEX `{index_name}` IF NOT EXISTS "
+                             f"FOR (n:{label}) ON (n.{embedding_property}) "
+                             f"OPTIONS {{indexConfig: {{`vector.dimensions`: {dimension}, "
+                             f"`vector.similarity_function`: '{similarity_function}'}}}}",
+            })
+
+        declarations.append({
+            "name": "similar_to_similarity",
+            "label": "SIMILAR_TO",
+            "property": "similarity",
+            "statement": "CREATE INDEX similar_to_similarity IF NOT EXISTS "
+                         "FOR ()-[r:SIMILAR_TO]-() ON (r.similarity)",
+        })
+        return declarations
+
+    def existing_indexes(self):
+        """
+        Return the indexes currently defined on the database.
+        """
+        records = self.graph.graph_database.read(
+            "SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state RETURN *"
+        )
+        return [dict(record) for record in records or []]
+
+    def migrate(self):
+        """
+        Create all declared indexes and constraints that do not exist yet.
+
+        Returns:
+            dict: Names of the "applied" and "failed" declarations.
+        """
+        summary = {"applied": [], "failed": []}
+        for declaration in self.declarations():
+            if self.graph.graph_database.write(declaration["statement"]) is False:
+                self.error_handler.warning(f"Could not create {declaration['name']}")
+                summary["failed"].append(declaration["name"])
+            else:
+                summary["applied"].append(declaration["name"])
+                if declaration["property"] in ("id", self.hash_property):
+                    self.graph._unique_constraints.add((declaration["label"], declaration["property"]))
+
+        self.error_handler.success(
+            f"Schema migration: {len(summary['applied'])} applied, {len(summary['failed'])} failed."
+        )
+        return summary
+
+    def probes(self):
+        """
+        Representative calls of the Graph finders, used to inspect their query plans.
+        """
+        label = self.labels[0] if self.labels else None
+        return [
+            ("find_node_by_id (internal id)", lambda graph: graph.find_node_by_id(0)),
+            ("find_node_by_id (uid)", lambda graph: graph.find_node_by_id("probe")),
+            ("find_nodes_by_properties (id)", lambda graph: graph.find_nodes_by_properties({"id": "probe"}, node_label=label)),
+            ("find_nodes_by_properties (text)", lambda graph: graph.find_nodes_by_properties({"text": "probe"}, node_label=label)),
+            ("find_nodes_by_content_hashes", lambda graph: graph.find_nodes_by_content_hashes(["probe"], node_label=label)),
+            ("find_parent_node_by_id", lambda graph: graph.find_parent_node_by_id("probe", parent_label=label)),
+            ("find_child_nodes", lambda graph: graph.find_child_nodes("probe", node_label=label, sequence_label="NEXT")),
+            ("find_child_nodes_by_properties", lambda graph: graph.find_child_nodes_by_properties({"id": "probe"}, parent_id="probe", node_label=label)),
+            ("find_edge_by_id", lambda graph: graph.find_edge_by_id(0)),
+            ("find_edges_by_property (similarity)", lambda graph: graph.find_edges_by_property("similarity", 0.9)),
+            ("find_edges_by_relationship", lambda graph: graph.find_edges_by_relationship("SIMILAR_TO", origin_id="probe", target_id="probe")),
+            ("link_nodes_bulk", lambda graph: graph.link_nodes_bulk([("probe", "other")], relationship_name="SIMILAR_TO")),
+        ]
+
+    def report_scans(self):
+        """
+        EXPLAIN every probed Graph query and report the ones whose plan still contains a scan operator.
+
+        Returns:
+            List[dict]: One entry per scanning query with "name", "operators" and "query".
+        """
+        connection = self.graph.graph_database
+        use_content_hash_filter = self.graph.use_content_hash_filter
+        recorder = _PlanRecorder(connection)
+        report = []
+
+        # The Bloom filter would answer the hash probe without a query
+        self.graph.graph_database = recorder
+        self.graph.use_content_hash_filter = False
+        try:
+            for name, probe in self.probes():
+                recorder.plans = []
+                try:
+                    probe(self.graph)
+                except Exception as e:
+                    self.error_handler.warning(f"Could not probe {name}: {e}")
+                    continue
+
+                for query, plan in recorder.plans:
+                    operators = sorted(self._scan_operators(plan))
+                    if operators:
+                        report.append({"name": name, "operators": operators, "query": " ".join(query.split())})
+        finally:
+            self.graph.graph_database = connection
+            self.graph.use_content_hash_filter = use_content_hash_filter
+
+        for entry in report:
+            self.error_handler.warning(f"{entry['name']} falls back to {', '.join(entry['operators'])}")
+        return report
+
+    def _scan_operators(self, plan):
+        if not plan:
+            return set()
+        operators = set()
+        # Neo4j 5 suffixes operator names with the runtime, e.g. "NodeByLabelScan@neo4j"
+        operator = plan.get("operatorType", "").split("@")[0]
+        if operator in SCAN_OPERATORS:
+            operators.add(operator)
+        for child in plan.get("children", []):
+            operators |= self._scan_operators(child)
+        return operators
+
+
+if __name__ == "__main__":
+    from database.neo4j import Graph
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    schema_manager = SchemaManager(Graph())
+
+    if command == "migrate":
+        schema_manager.migrate()
+        schema_manager.report_scans()
+    elif command == "report":
+        schema_manager.report_scans()
+    else:
+        error_handler.warning(f"Unknown command {command}. Use 'migrate' or 'report'.")
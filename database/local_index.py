@@ -0,0 +1,405 @@
+import os
+import json
+import time
+import shutil
+import threading
+import numpy as np
+from utils.error_handler import ErrorHandler
+from utils.config_loader import ConfigLoader as config
+
+from database.records import NodeRecord
+from database.similarity_graph import normalize_rows
+from database.quantization import create_quantizer, save_quantizer, load_quantizer, quantized_scores
+
+error_handler = ErrorHandler()
+
+# Version of the files in the mirror directory; mirrors of other versions are rebuilt
+FORMAT = 2
+
+
+class LocalVectorIndex:
+    """
+    In-process mirror of a label's vectors for low-latency kNN queries.
+
+    The normalized vectors are kept in a float32 memmap and the node properties (without the
+    embedding) in an append-only JSON sidecar, so the mirror opens instantly and returns the
+    same nodes as a search on Neo4j. Queries use an IVF index: the vectors are
+    clustered with spherical k-means, a query scores the centroids and only the rows of
+    the `probes` closest lists are compared with it. The candidates are ranked with the
+    exact cosine of the mirrored vectors, and scores are scaled like Neo4j's cosine index.
+    Below MIN_TRAIN_SIZE vectors every query is an exact scan.
+
+    With QUANTIZATION = "int8" or "pq", the lists are scanned on compact codes instead of
+    the float vectors (4x or, by default, 16x less memory), scoring the float query against
+    the codes. The best k * RERANK candidates are then rescored exactly from the float
+    vectors on disk, so the returned scores and the threshold keep their exact meaning.
+
+    Neo4j stays the source of truth. `sync()` pulls the nodes whose `last_indexed` is at or
+    after the last synced timestamp and adds or replaces their rows. Deleted nodes are only
+    dropped by `rebuild()`.
+
+    Usage:
+        index = graph.local_index("Section")
+        index.sync()
+        neighbors = index.search(vector, k=10)
+    """
+    def __init__(self, graph, node_label, path=None, lists=None, probes=None, min_train_size=None, quantization=None, subvectors=None, rerank=None):
+        index_config = config().get_config().get("LOCAL_INDEX", {})
+        self.graph = graph
+        self.node_label = graph.queries.label(node_label)
+        self.error_handler = error_handler
+        self.embedding_property = graph.excluded_properties[0]
+        self.lists = int(lists or index_config.get("LISTS", 0))
+        self.probes = int(probes or index_config.get("PROBES", 8))
+        self.min_train_size = int(min_train_size if min_train_size is not None else index_config.get("MIN_TRAIN_SIZE", 10000))
+        self.sync_batch_size = int(index_config.get("SYNC_BATCH_SIZE", 10000))
+        self.sync_interval = float(index_config.get("SYNC_INTERVAL", 0))
+        self.quantization = quantization or index_config.get("QUANTIZATION", "none")
+        self.subvectors = int(subvectors or index_config.get("PQ_SUBVECTORS", 0))
+        self.rerank = int(rerank if rerank is not None else index_config.get("RERANK", 4))
+
+        self.directory = os.path.join(path or index_config.get("PATH", ".cache/local_index"), node_label)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.records_path = os.path.join(self.directory, "records.bin")
+        self.ids_path = os.path.join(self.directory, "ids.json")
+        self.offsets_path = os.path.join(self.directory, "offsets.npy")
+        self.centroids_path = os.path.join(self.directory, "centroids.npy")
+        self.assignments_path = os.path.join(self.directory, "assignments.npy")
+        self.codes_path = os.path.join(self.directory, "codes.bin")
+        self.quantizer_path = os.path.join(self.directory, "quantizer.npz")
+        self.meta_path = os.path.join(self.directory, "meta.json")
+
+        self._lock = threading.RLock()
+        self._load()
+        # Fail before any vector is mirrored; the dimension of the label is checked again on the first sync
+        self._check_quantization(self.dimension or int(config().get_vector_index_config().get("VECTOR_DIMENSION", 1536)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Storage
+
+    def _reset(self):
+        self.ids = []
+        self._rows = {}
+        self.dimension = None
+        self.watermark = None
+        self.trained_count = 0
+        self.last_sync = 0.0
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.offsets = np.zeros((0, 2), dtype=np.int64)
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._inverted_lists = None
+        self.quantizer = None
+        self.codes = None
+
+    def _load(self):
+        self._reset()
+        try:
+            with open(self.meta_path) as file:
+                meta = json.load(file)
+            with open(self.ids_path) as file:
+                ids = json.load(file)
+            offsets = np.load(self.offsets_path)
+            assignments = np.load(self.assignments_path)
+        except (OSError, ValueError):
+            return
+        if meta.get("format") != FORMAT:
+            self.error_handler.debug_info(f"Dropping local index of {self.node_label} written in an older format")
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+
+        # The meta file is written last, so only rows it counts are complete
+        count = meta["count"]
+        self.ids = ids[:count]
+        self._rows = {uid: row for row, uid in enumerate(self.ids)}
+        self.dimension = meta["dimension"]
+        self.watermark = meta["watermark"]
+        self.trained_count = meta["trained_count"]
+        self.offsets = offsets[:count]
+        self.assignments = assignments[:count]
+        if os.path.exists(self.centroids_path) and self.trained_count:
+            self.centroids = np.load(self.centroids_path)
+        if meta.get("quantization", "none") == self.quantization != "none" and os.path.exists(self.quantizer_path):
+            self.quantizer = load_quantizer(self.quantizer_path)
+        if count:
+            # Drop rows an interrupted sync appended after the last save
+            with open(self.vectors_path, "r+b") as file:
+                file.truncate(count * self.dimension * np.dtype(np.float32).itemsize)
+            if self.quantizer is not None:
+                with open(self.codes_path, "r+b") as file:
+                    file.truncate(count * self.quantizer.code_size * np.dtype(self.quantizer.dtype).itemsize)
+        self._open_vectors()
+        self.error_handler.debug_info(f"Loaded local index of {count} {self.node_label} vectors from {self.directory}")
+
+    def _open_vectors(self):
+        if self.ids:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(len(self.ids), self.dimension))
+        else:
+            self.vectors = np.zeros((0, self.dimension or 0), dtype=np.float32)
+        if self.quantizer is not None:
+            self.codes = np.memmap(self.codes_path, dtype=self.quantizer.dtype, mode="r+", shape=(len(self.ids), self.quantizer.code_size))
+
+    def _save(self):
+        for matrix in (self.vectors, self.codes):
+            if isinstance(matrix, np.memmap):
+                matrix.flush()
+        with open(self.ids_path, "w") as file:
+            json.dump(self.ids, file)
+        np.save(self.offsets_path, self.offsets)
+        np.save(self.assignments_path, self.assignments)
+        if self.centroids is not None:
+            np.save(self.centroids_path, self.centroids)
+
+        meta = {
+            "format": FORMAT,
+            "count": len(self.ids),
+            "dimension": self.dimension,
+            "watermark": self.watermark,
+            "trained_count": self.trained_count,
+            "quantization": self.quantizer.kind if self.quantizer is not None else "none"
+        }
+        temporary_path = self.meta_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(temporary_path, self.meta_path)
+
+    def records(self, rows):
+        """
+        Return the mirrored nodes of the given rows as dicts with "node_id", "labels" and "properties".
+        """
+        records = []
+        with open(self.records_path, "rb") as file:
+            for row in rows:
+                start, stop = self.offsets[row]
+                file.seek(start)
+                records.append(json.loads(file.read(stop - start).decode("utf-8")))
+        return records
+
+    def texts(self, rows):
+        """
+        Return the mirrored texts of the given rows.
+        """
+        return [record["properties"].get("text") or "" for record in self.records(rows)]
+
+    # Sync
+
+    def sync(self):
+        """
+        Pull the nodes indexed since the last sync from the graph and mirror their vectors.
+
+        Returns:
+            int: Number of rows added or replaced.
+        """
+        from database.neo4j import ALL_PROPERTIES
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            synced, batch = 0, []
+            for node in self.graph.iter_nodes_indexed_since(self.node_label, self.watermark, projection=ALL_PROPERTIES):
+                if node.get(self.embedding_property) is None:
+                    continue
+                batch.append(node)
+                if len(batch) >= self.sync_batch_size:
+                    synced += self._apply(batch)
+                    batch = []
+            if batch:
+                synced += self._apply(batch)
+
+            # Retrain when the mirror doubled, or to quantize a mirror trained without it
+            untrained_quantizer = self.quantization != "none" and self.quantizer is None
+            if len(self.ids) >= max(self.min_train_size, 1) and (len(self.ids) >= 2 * self.trained_count or untrained_quantizer):
+                self.train()
+            self._save()
+            self.last_sync = time.monotonic()
+            self.error_handler.debug_info(f"Synced {synced} {self.node_label} vectors, local index holds {len(self.ids)}")
+            return synced
+
+    def _maybe_sync(self):
+        if self.sync_interval and time.monotonic() - self.last_sync >= self.sync_interval:
+            try:
+                self.sync()
+            except Exception as e:
+                # Keep answering from the mirror as it is and retry after the next interval
+                self.last_sync = time.monotonic()
+                self.error_handler.warning(f"Could not sync local index of {self.node_label}: {e}")
+
+    def _check_quantization(self, dimension):
+        if self.quantization != "none":
+            create_quantizer(self.quantization, dimension, self.subvectors)
+
+    def _apply(self, nodes):
+        vectors = normalize_rows([node[self.embedding_property] for node in nodes])
+        if self.dimension is None:
+            self._check_quantization(vectors.shape[1])
+            self.dimension = vectors.shape[1]
+            self._open_vectors()
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(f"Vectors of {self.node_label} have {vectors.shape[1]} dimensions, the local index has {self.dimension}")
+
+        # New records are appended, replaced records become garbage until the next rebuild
+        offsets = []
+        with open(self.records_path, "ab") as file:
+            position = file.tell()
+            for node in nodes:
+                record = {
+                    "node_id": node.id,
+                    "labels": sorted(node.labels),
+                    "properties": {key: value for key, value in node.items() if key != self.embedding_property}
+                }
+                encoded = json.dumps(record, default=str).encode("utf-8")
+                file.write(encoded)
+                offsets.append((position, position + len(encoded)))
+                position += len(encoded)
+
+        assignments = self._assign(vectors) if self.centroids is not None else np.zeros(len(nodes), dtype=np.int32)
+        codes = self.quantizer.encode(vectors) if self.quantizer is not None else None
+        appended = []
+        for index, node in enumerate(nodes):
+            uid = node.get("id", node.id)
+            row = self._rows.get(uid)
+            if row is None:
+                appended.append(index)
+                self._rows[uid] = len(self.ids)
+                self.ids.append(uid)
+            else:
+                self.vectors[row] = vectors[index]
+                self.offsets[row] = offsets[index]
+                self.assignments[row] = assignments[index]
+                if codes is not None:
+                    self.codes[row] = codes[index]
+            if node.get("last_indexed") and (self.watermark is None or node["last_indexed"] > self.watermark):
+                self.watermark = node["last_indexed"]
+
+        if appended:
+            with open(self.vectors_path, "ab") as file:
+                file.write(vectors[appended].tobytes())
+            if codes is not None:
+                with open(self.codes_path, "ab") as file:
+                    file.write(codes[appended].tobytes())
+            self.offsets = np.concatenate([self.offsets, np.asarray(offsets, dtype=np.int64)[appended]])
+            self.assignments = np.concatenate([self.assignments, assignments[appended]])
+            self._open_vectors()
+
+        self._inverted_lists = None
+        return len(nodes)
+
+    def rebuild(self):
+        """
+        Drop the mirror and sync it from scratch, e.g. after nodes were deleted.
+        """
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._reset()
+            return self.sync()
+
+    # IVF
+
+    def _assign(self, vectors, block_size=16384):
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block_size):
+            assignments[start:start + block_size] = np.argmax(np.asarray(vectors[start:start + block_size]) @ self.centroids.T, axis=1)
+        return assignments
+
+    def train(self, iterations=10, sample_size=None):
+        """
+        Cluster the mirrored vectors into inverted lists (spherical k-means on a sample).
+        """
+        with self._lock:
+            count = len(self.ids)
+            lists = min(self.lists or max(int(np.sqrt(count)), 1), count)
+            generator = np.random.default_rng(0)
+            sample_size = min(count, sample_size or lists * 256)
+            sample = np.asarray(self.vectors[np.sort(generator.choice(count, sample_size, replace=False))])
+
+            centroids = sample[generator.choice(len(sample), lists, replace=False)]
+            for iteration in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = np.bincount(labels, minlength=lists) == 0
+                # Reseed empty lists with random sample vectors
+                sums[empty] = sample[generator.choice(len(sample), int(empty.sum()))]
+                centroids = normalize_rows(sums)
+
+            self.centroids = centroids
+            self.assignments = self._assign(self.vectors)
+            self.trained_count = count
+            self._inverted_lists = None
+            if self.quantization != "none":
+                self._train_quantizer(sample, generator)
+            self.error_handler.debug_info(f"Trained local index of {self.node_label} with {lists} lists on {sample_size} vectors")
+
+    def _train_quantizer(self, sample, generator, block_size=16384):
+        # Encode all mirrored vectors with a quantizer trained on the sample
+        self.quantizer = create_quantizer(self.quantization, self.dimension, self.subvectors).train(sample, generator=generator)
+        self.codes = None
+        with open(self.codes_path, "wb") as file:
+            for start in range(0, len(self.ids), block_size):
+                file.write(self.quantizer.encode(np.asarray(self.vectors[start:start + block_size])).tobytes())
+        save_quantizer(self.quantizer, self.quantizer_path)
+        self._open_vectors()
+        self.error_handler.debug_info(
+            f"Quantized local index of {self.node_label} to {self.quantizer.code_size} bytes per vector ({self.quantizer.kind})"
+        )
+
+    def _lists(self):
+        if self._inverted_lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._inverted_lists = [order[bounds[index]:bounds[index + 1]] for index in range(len(self.centroids))]
+        return self._inverted_lists
+
+    # Queries
+
+    def search(self, vector, k=5, similarity_threshold=None, probes=None):
+        """
+        Find the nearest mirrored nodes of a vector.
+
+        Args:
+            vector (List[float]): Query vector.
+            k (int, optional): Number of neighbors. Defaults to 5.
+            similarity_threshold (float, optional): Only return neighbors scoring above this.
+            probes (int, optional): Number of inverted lists to scan. Defaults to LOCAL_INDEX.PROBES.
+
+        Returns:
+            List[tuple]: (node, score) tuples, best first, with the same IDs and properties as the nodes
+                returned by Graph.find_similar_nodes_by_vector.
+        """
+        self._maybe_sync()
+        with self._lock:
+            if not self.ids:
+                return []
+
+            query = normalize_rows([vector])[0]
+            if self.centroids is not None:
+                probed = np.argsort(-(self.centroids @ query))[:probes or self.probes]
+                rows = np.sort(np.concatenate([self._lists()[index] for index in probed]))
+            else:
+                rows = np.arange(len(self.ids))
+
+            if self.quantizer is not None:
+                scores = quantized_scores(self.quantizer, query, self.codes, rows)
+                if self.rerank:
+                    # Rescore the best candidates exactly
+                    candidates = min(k * self.rerank, len(rows))
+                    rows = rows[np.sort(np.argpartition(-scores, candidates - 1)[:candidates])] if candidates else rows[:0]
+                    scores = np.asarray(self.vectors[rows]) @ query
+            elif self.centroids is not None:
+                scores = np.asarray(self.vectors[rows]) @ query
+            else:
+                scores = np.asarray(self.vectors) @ query
+
+            k = min(k, len(rows))
+            if not k:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            top = [index for index in top if similarity_threshold is None or (1 + scores[index]) / 2 > similarity_threshold]
+            records = self.records([int(rows[index]) for index in top])
+            return [
+                (NodeRecord(record["node_id"], labels=record["labels"], properties=record["properties"]), float((1 + scores[index]) / 2))
+                for index, record in zip(top, records)
+            ]
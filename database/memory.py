@@ -0,0 +1,766 @@
+import re
+import numpy as np
+from langchain.schema import Document
+from utils.config_loader import ConfigLoader as config
+from schema.schemas import Timestamp
+from utils.hashing import content_hash
+
+from database.neo4j import Graph, ALL_PROPERTIES
+from database.records import NodeRecord, EdgeRecord
+from database.vectorstore import hybrid_rerank, save_documents
+
+
+class MemoryWriteBuffer:
+    """
+    Stand-in for WriteBuffer on the memory backend, where writes are applied immediately.
+    Nothing is ever queued, so flush() always succeeds and the stats stay at zero.
+    """
+    def __init__(self):
+        self.stats = {
+            "flushes": 0,
+            "operations": 0,
+            "queries": 0,
+            "failed": 0,
+            "links": {"created": 0, "updated": 0, "skipped": 0, "failed": 0},
+            "last_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __len__(self):
+        return 0
+
+    def flush(self):
+        return True
+
+
+class MemoryGraph(Graph):
+    """
+    In-process implementation of the Graph interface, without Neo4j.
+
+    Nodes and edges live in dicts, with indexes on uid, label and content hash.
+    Similarity search is an exact cosine kNN over the stored vectors. Use it to
+    measure the pipeline's own overhead without network latency, and to run
+    ingestion offline or in CI. Select it with GRAPH.BACKEND = "memory" (see
+    database.backends.create_graph).
+
+    Mirrors the Neo4j backend where it matters to callers: internal IDs are ints and
+    uids are strings, finders return NodeRecords with the same projections, the same
+    labels and relationship types are accepted and link statistics are counted the
+    same way. Writes are applied immediately, so write_behind() does not buffer.
+    """
+    def __init__(self, embedding=None):
+        self._init_queries()
+        self.graph = self
+        self.write_buffer = None
+        self.graph_database = None
+        self.local_indexes = {}
+        self.embedding_property = self.excluded_properties[0]
+
+        self.nodes = {}
+        self.edges = {}
+        self._next_node_id = 0
+        self._next_edge_id = 0
+
+        self._uid_index = {}
+        self._label_index = {}
+        self._hash_index = {}
+        self._outgoing = {}
+        self._incoming = {}
+        self._vector_cache = {}
+
+        self.vector_store = MemoryVectorStore(self, embedding=embedding)
+
+    def close(self):
+        pass
+
+    def get_vector_store(self, index_name=None, node_label=None):
+        return self.vector_store
+
+    def write_behind(self, max_size=None, max_interval=None):
+        return MemoryWriteBuffer()
+
+    # Storage
+
+    def _resolve(self, node_id):
+        # Map an internal ID or uid to the internal ID
+        if isinstance(node_id, int):
+            return node_id if node_id in self.nodes else None
+        return self._uid_index.get(node_id)
+
+    def _create_node(self, labels, properties):
+        internal_id = self._next_node_id
+        self._next_node_id += 1
+        self.nodes[internal_id] = {"labels": set(labels), "properties": {}}
+        self._outgoing[internal_id] = []
+        self._incoming[internal_id] = []
+        for label in labels:
+            self._label_index.setdefault(label, set()).add(internal_id)
+        self._set_properties(internal_id, properties)
+        return internal_id
+
+    def _set_properties(self, internal_id, properties):
+        node = self.nodes[internal_id]
+        for key, value in properties.items():
+            old_value = node["properties"].get(key)
+            if key == "id":
+                self._uid_index.pop(old_value, None)
+                if value is not None:
+                    self._uid_index[value] = internal_id
+            elif key == self.hash_property:
+                for label in node["labels"]:
+                    self._hash_index.pop((label, old_value), None)
+                    if value is not None:
+                        self._hash_index[(label, value)] = internal_id
+            elif key == self.embedding_property:
+                for label in node["labels"]:
+                    self._vector_cache.pop(label, None)
+                self._vector_cache.pop(None, None)
+
+            if value is None:
+                node["properties"].pop(key, None)
+            else:
+                node["properties"][key] = value
+
+    def _node_record(self, internal_id, projection=None):
+        node = self.nodes[internal_id]
+        properties = node["properties"]
+        if projection == ALL_PROPERTIES:
+            selected = dict(properties)
+        elif projection is None:
+            selected = {key: value for key, value in properties.items() if key not in self.excluded_properties}
+        else:
+            selected = {key: properties[key] for key in projection if key in properties}
+        return NodeRecord(internal_id, labels=node["labels"], properties=selected)
+
+    def _edge_record(self, edge_id):
+        edge = self.edges[edge_id]
+        return EdgeRecord(edge_id, edge["type"], edge["start"], edge["end"], edge["properties"])
+
+    def _candidates(self, node_label=None):
+        if node_label:
+            self.queries.label(node_label)
+            return sorted(self._label_index.get(node_label, ()))
+        return sorted(self.nodes)
+
+    def _matches(self, internal_id, properties):
+        node_properties = self.nodes[internal_id]["properties"]
+        return all(node_properties.get(key) == value for key, value in properties.items())
+
+    def _find_edge(self, start, end, relationship_name):
+        for edge_id in self._outgoing[start]:
+            edge = self.edges[edge_id]
+            if edge["end"] == end and edge["type"] == relationship_name:
+                return edge_id
+        return None
+
+    def _merge_edge(self, start, end, relationship_name, edge_values):
+        edge_id = self._find_edge(start, end, relationship_name)
+        if edge_id is None:
+            edge_id = self._next_edge_id
+            self._next_edge_id += 1
+            self.edges[edge_id] = {"type": relationship_name, "start": start, "end": end, "properties": {}}
+            self._outgoing[start].append(edge_id)
+            self._incoming[end].append(edge_id)
+        self.edges[edge_id]["properties"].update(edge_values)
+        return edge_id
+
+    # Nodes
+
+    def find_node_by_id(self, node_id, projection=None):
+        if not isinstance(node_id, (int, str)):
+            self.error_handler.generic_error(f"Invalid node ID: {node_id}")
+            return None
+        internal_id = self._resolve(node_id)
+        return self._node_record(internal_id, projection) if internal_id is not None else None
+
+    def find_nodes_by_properties(self, properties, node_label=None, projection=None):
+        return list(self.iter_nodes_by_properties(properties, node_label=node_label, projection=projection))
+
+    def count_nodes(self, node_label, property_key=None):
+        if property_key:
+            self.queries.property(property_key)
+        return sum(1 for internal_id in self._candidates(node_label) if not property_key or property_key in self.nodes[internal_id]["properties"])
+
+    def iter_nodes_by_properties(self, properties, node_label=None, projection=None, fetch_size=None):
+        for key in properties:
+            self.queries.property(key)
+
+        # Use the uid index where Neo4j would use the id constraint
+        if "id" in properties:
+            internal_id = self._uid_index.get(properties["id"])
+            candidates = [internal_id] if internal_id is not None else []
+            if node_label:
+                candidates = [candidate for candidate in candidates if candidate in self._label_index.get(self.queries.label(node_label), ())]
+        else:
+            candidates = self._candidates(node_label)
+
+        for internal_id in candidates:
+            if self._matches(internal_id, properties):
+                yield self._node_record(internal_id, projection)
+
+    def iter_nodes_indexed_since(self, node_label, since=None, projection=None, fetch_size=None):
+        candidates = []
+        for internal_id in self._candidates(node_label):
+            last_indexed = self.nodes[internal_id]["properties"].get("last_indexed")
+            if since is None or (last_indexed is not None and last_indexed >= since):
+                candidates.append((last_indexed or "", internal_id))
+        for last_indexed, internal_id in sorted(candidates):
+            yield self._node_record(internal_id, projection)
+
+    def create_nodes_bulk(
+            self,
+            rows,
+            node_label,
+            text_node_property="text",
+            embedding_node_property=None,
+            batch_size=None,
+            link_similar=None,
+            similarity_threshold=None,
+            max_nodes=None,
+            index_name=None
+        ):
+        self.queries.label(node_label)
+        embedding_node_property = embedding_node_property or self.embedding_property
+
+        node_ids = []
+        for row in rows:
+            properties = {**row.get("metadata", {}), text_node_property: row["text"], embedding_node_property: list(row["embedding"])}
+            internal_id = self._uid_index.get(row["id"])
+            if internal_id is None:
+                self._create_node([node_label], {"id": row["id"], **properties})
+            else:
+                self._set_properties(internal_id, properties)
+            node_ids.append(row["id"])
+
+        # All new nodes are stored by now, so they can be each other's neighbors
+        link_options = self._link_on_insert_options(link_similar, similarity_threshold, max_nodes)
+        if link_options:
+            k, similarity_threshold = link_options
+            pairs = []
+            for node_id in node_ids:
+                origin_node = self._node_record(self._uid_index[node_id], projection=[])
+                pairs += self._similar_node_pairs(origin_node, similarity_threshold, node_label, index_name, k)
+            self._link_similar_node_pairs(pairs, bidirectional=self.config.get("SIMILARITY_GRAPH", {}).get("BIDIRECTIONAL", False))
+        return node_ids
+
+    def update_node_properties(self, node_id, properties):
+        internal_id = self._resolve(node_id)
+        if internal_id is None:
+            return False
+        self._set_properties(internal_id, properties)
+        return True
+
+    def update_nodes_properties(self, updates, batch_size=None):
+        return {node_id: self.update_node_properties(node_id, properties) for node_id, properties in updates.items()}
+
+    # Content hashes
+
+    def _ensure_unique_constraint(self, node_label, property_key):
+        # Writes are applied one at a time, nothing to constrain
+        self.queries.label(node_label)
+        self._unique_constraints.add((node_label, property_key))
+        return True
+
+    def load_content_hash_filter(self, node_label):
+        # The hash index is exact, so there is nothing to pre-filter
+        return None
+
+    def find_nodes_by_content_hashes(self, hashes, node_label=None, projection=None, batch_size=None):
+        nodes = {}
+        for digest in dict.fromkeys(hashes):
+            if node_label:
+                internal_id = self._hash_index.get((self.queries.label(node_label), digest))
+            else:
+                internal_id = next((internal_id for (label, value), internal_id in self._hash_index.items() if value == digest), None)
+            if internal_id is not None:
+                nodes[digest] = self._node_record(internal_id, projection)
+        return nodes
+
+    def backfill_content_hashes(self, node_label, text_node_property="text", batch_size=None):
+        updated = 0
+        for internal_id in self._candidates(node_label):
+            properties = self.nodes[internal_id]["properties"]
+            if self.hash_property not in properties and properties.get(text_node_property) is not None:
+                self._set_properties(internal_id, {self.hash_property: content_hash(properties[text_node_property])})
+                updated += 1
+        return updated
+
+    # Hierarchy
+
+    def find_parent_node_by_id(self, node_id, parent_label, projection=None):
+        self.queries.label(parent_label)
+        internal_id = self._resolve(node_id)
+        if internal_id is None:
+            return None
+        for edge_id in self._incoming[internal_id]:
+            start = self.edges[edge_id]["start"]
+            if parent_label in self.nodes[start]["labels"]:
+                return self._node_record(start, projection)
+        return None
+
+    def _children(self, parent, node_label=None):
+        children = []
+        for edge_id in self._outgoing[parent]:
+            end = self.edges[edge_id]["end"]
+            if not node_label or node_label in self.nodes[end]["labels"]:
+                children.append(end)
+        return children
+
+    def _sequence(self, head, sequence_label):
+        # Same rows as MATCH path = (head)-[:SEQ*0..]->(child): each relationship is used once per path
+        rows = []
+        stack = [(head, 0, frozenset())]
+        while stack:
+            internal_id, length, used = stack.pop()
+            rows.append((length, internal_id))
+            for edge_id in reversed(self._outgoing[internal_id]):
+                edge = self.edges[edge_id]
+                if edge["type"] == sequence_label and edge_id not in used:
+                    stack.append((edge["end"], length + 1, used | {edge_id}))
+        return [internal_id for length, internal_id in sorted(rows, key=lambda row: row[0])]
+
+    def iter_child_nodes(self, parent_id, node_label=None, sequence_label=None, offset=0, limit=None, projection=None, fetch_size=None):
+        if node_label:
+            self.queries.label(node_label)
+        if sequence_label:
+            self.queries.relationship(sequence_label)
+
+        parent = self._resolve(parent_id)
+        if parent is None:
+            return
+
+        children = self._children(parent, node_label)
+        if sequence_label:
+            # Start at the heads of the sequences only, as the Cypher query does
+            child_set = set(children)
+            heads = [
+                child for child in children
+                if not any(
+                    self.edges[edge_id]["type"] == sequence_label and self.edges[edge_id]["start"] in child_set
+                    for edge_id in self._incoming[child]
+                )
+            ]
+            ordered = [internal_id for head in sorted(heads) for internal_id in self._sequence(head, sequence_label)]
+        else:
+            ordered = sorted(children)
+
+        end = offset + limit if limit is not None else None
+        for internal_id in ordered[offset:end]:
+            yield self._node_record(internal_id, projection)
+
+    def find_child_nodes(self, parent_id, node_label=None, sequence_label=None, offset=0, limit=None, projection=None):
+        return list(self.iter_child_nodes(parent_id, node_label, sequence_label, offset, limit, projection))
+
+    def iter_child_nodes_by_properties(self, properties, parent_id=None, node_label=None, projection=None, fetch_size=None):
+        for key in properties:
+            self.queries.property(key)
+
+        if parent_id:
+            parent = self._resolve(parent_id)
+            if node_label:
+                self.queries.label(node_label)
+            candidates = self._children(parent, node_label) if parent is not None else []
+        else:
+            candidates = self._candidates(node_label)
+
+        for internal_id in candidates:
+            if self._matches(internal_id, properties):
+                yield self._node_record(internal_id, projection)
+
+    def find_child_nodes_by_properties(self, properties, parent_id=None, node_label=None, projection=None):
+        return list(self.iter_child_nodes_by_properties(properties, parent_id, node_label, projection))
+
+    # Edges
+
+    def find_edge_by_id(self, edge_id):
+        return self._edge_record(edge_id) if edge_id in self.edges else None
+
+    def _iter_edges(self, origin_id=None, target_id=None, relationship_name=None):
+        origin = self._resolve(origin_id) if origin_id is not None else None
+        target = self._resolve(target_id) if target_id is not None else None
+        if (origin_id is not None and origin is None) or (target_id is not None and target is None):
+            return
+
+        edge_ids = self._outgoing[origin] if origin is not None else sorted(self.edges)
+        for edge_id in edge_ids:
+            edge = self.edges[edge_id]
+            if target is not None and edge["end"] != target:
+                continue
+            if relationship_name and edge["type"] != relationship_name:
+                continue
+            yield edge_id
+
+    def find_edges_by_property(self, property, value, origin_id=None, target_id=None):
+        self.queries.property(property)
+        return [
+            self._edge_record(edge_id) for edge_id in self._iter_edges(origin_id, target_id)
+            if self.edges[edge_id]["properties"].get(property) == value
+        ]
+
+    def iter_edges_by_relationship(self, relationship_name, origin_id=None, target_id=None, fetch_size=None):
+        self.queries.relationship(relationship_name)
+        for edge_id in self._iter_edges(origin_id, target_id, relationship_name):
+            yield self._edge_record(edge_id)
+
+    def find_edges_by_relationship(self, relationship_name, origin_id=None, target_id=None):
+        return list(self.iter_edges_by_relationship(relationship_name, origin_id, target_id))
+
+    def link_nodes_bulk(
+            self,
+            pairs,
+            relationship_name="LINKS_TO",
+            edge_values=None,
+            force=False,
+            bidirectional=False,
+            batch_size=None
+        ):
+        self.queries.relationship(relationship_name)
+        if edge_values is None:
+            edge_values = {
+                "last_indexed": Timestamp().now
+            }
+
+        stats = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+        for pair in pairs:
+            start, end = self._resolve(pair[0]), self._resolve(pair[1])
+            if pair[0] == pair[1] or start is None or end is None:
+                stats["skipped"] += 1
+                continue
+
+            values = {**edge_values, **pair[2]} if len(pair) > 2 and pair[2] else edge_values
+            edge_exists = self._find_edge(start, end, relationship_name) is not None and (
+                not bidirectional or self._find_edge(end, start, relationship_name) is not None
+            )
+            if edge_exists and not force:
+                stats["skipped"] += 1
+                continue
+
+            self._merge_edge(start, end, relationship_name, values)
+            if bidirectional:
+                self._merge_edge(end, start, relationship_name, values)
+            stats["updated" if edge_exists else "created"] += 1
+        return stats
+
+    # Vectors
+
+    def _vectors(self, node_label=None):
+        # Normalized matrix of all stored vectors of a label, rebuilt after writes
+        cached = self._vector_cache.get(node_label)
+        if cached is None:
+            ids, vectors = [], []
+            for internal_id in self._candidates(node_label):
+                vector = self.nodes[internal_id]["properties"].get(self.embedding_property)
+                if vector is not None:
+                    ids.append(internal_id)
+                    vectors.append(vector)
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            cached = (np.asarray(ids), matrix / norms)
+            self._vector_cache[node_label] = cached
+        return cached
+
+    def nearest_neighbors(self, vector, k=5, node_label=None, projection=None):
+        """
+        Exact cosine kNN over the stored vectors.
+
+        Args:
+            vector (List[float]): Query vector.
+            k (int, optional): Number of neighbors. Defaults to 5.
+            node_label (str, optional): Only search nodes of this label.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+
+        Returns:
+            List[tuple]: (node, score) tuples, best first. Scores are scaled to [0, 1] like Neo4j's cosine vector index.
+        """
+        ids, matrix = self._vectors(node_label)
+        if not len(ids):
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        scores = (1 + matrix @ query) / 2
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._node_record(int(ids[index]), projection), float(scores[index])) for index in top]
+
+
+    def find_similar_nodes(self, node_id, k=None, index_name=None, similarity_threshold=None, projection=None):
+        internal_id = self._resolve(node_id)
+        if internal_id is None:
+            return []
+        vector = self.nodes[internal_id]["properties"].get(self.embedding_property)
+        if vector is None:
+            return []
+
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+        node_label = index_name or min(self.nodes[internal_id]["labels"], default=None)
+        neighbors = self.nearest_neighbors(vector, k=int(k) + 1, node_label=node_label, projection=projection)
+        return [
+            (node, score) for node, score in neighbors
+            if node.id != internal_id and score > (similarity_threshold or 0)
+        ][:int(k)]
+
+    def find_similar_nodes_by_vector(self, vector, k=None, index_name=None, similarity_threshold=None, projection=None):
+        if not index_name:
+            raise ValueError("index_name is required to search by vector")
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+        neighbors = self.nearest_neighbors(vector, k=int(k), node_label=index_name, projection=projection)
+        return [(node, score) for node, score in neighbors if score > (similarity_threshold or 0)]
+
+    def find_nodes_by_fulltext(self, text, node_label, limit=None, projection=None, with_embeddings=False):
+        # Term-frequency scoring over the full-text properties, instead of a Lucene index
+        self.queries.label(node_label)
+        terms = set(re.findall(r"\w+", str(text).lower()))
+        if not terms:
+            return []
+        if limit is None:
+            limit = self.config.get("HYBRID_SEARCH", {}).get("CANDIDATES", 50)
+        properties = self.config.get("HYBRID_SEARCH", {}).get("PROPERTIES", ["text", "title", "topics"])
+
+        hits = []
+        for internal_id in self._candidates(node_label):
+            values = self.nodes[internal_id]["properties"]
+            tokens = re.findall(r"\w+", " ".join(str(values[key]) for key in properties if values.get(key) is not None).lower())
+            score = sum(1 for token in tokens if token in terms)
+            if score:
+                hits.append((internal_id, float(score)))
+        hits.sort(key=lambda hit: -hit[1])
+
+        results = []
+        for internal_id, score in hits[:int(limit)]:
+            node = self._node_record(internal_id, projection)
+            if with_embeddings:
+                results.append((node, score, self.nodes[internal_id]["properties"].get(self.embedding_property)))
+            else:
+                results.append((node, score))
+        return results
+
+    def _subtree(self, parent, relationship_name="CONTAINS", max_depth=None):
+        # Nodes reachable from the parent over relationship_name, breadth first
+        seen, frontier, depth = set(), [parent], 0
+        while frontier and (max_depth is None or depth < max_depth):
+            frontier = [
+                self.edges[edge_id]["end"] for node in frontier for edge_id in self._outgoing[node]
+                if self.edges[edge_id]["type"] == relationship_name and self.edges[edge_id]["end"] not in seen
+            ]
+            frontier = list(dict.fromkeys(frontier))
+            seen.update(frontier)
+            depth += 1
+        return seen
+
+    def find_similar_nodes_in_scope(
+            self,
+            parent_id,
+            node_label,
+            node_id=None,
+            vector=None,
+            k=None,
+            index_name=None,
+            similarity_threshold=None,
+            relationship_name="CONTAINS",
+            max_depth=None,
+            projection=None
+        ):
+        # Scopes are always scored exactly in memory
+        if node_id is None and vector is None:
+            raise ValueError("node_id or vector is required for a scoped search")
+        self.queries.label(node_label)
+        self.queries.relationship(relationship_name)
+        parent = self._resolve(parent_id)
+        origin = self._resolve(node_id) if node_id is not None else None
+        if parent is None or (node_id is not None and origin is None):
+            return []
+        if vector is None:
+            vector = self.nodes[origin]["properties"].get(self.embedding_property)
+            if vector is None:
+                return []
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+
+        scope = [
+            internal_id for internal_id in sorted(self._subtree(parent, relationship_name, max_depth))
+            if internal_id != origin and node_label in self.nodes[internal_id]["labels"]
+            and self.nodes[internal_id]["properties"].get(self.embedding_property) is not None
+        ]
+        if not scope:
+            return []
+        matrix = np.asarray([self.nodes[internal_id]["properties"][self.embedding_property] for internal_id in scope], dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        query = np.asarray(vector, dtype=np.float32)
+        scores = (1 + matrix @ (query / (np.linalg.norm(query) or 1))) / 2
+        order = np.argsort(-scores, kind="stable")[:int(k)]
+        return [
+            (self._node_record(scope[index], projection), float(scores[index])) for index in order
+            if scores[index] > (similarity_threshold or 0)
+        ]
+
+    def find_similar_nodes_by_vectors(self, vectors, k=None, index_name=None, similarity_threshold=None, projection=None):
+        return [self.find_similar_nodes_by_vector(vector, k, index_name, similarity_threshold, projection) for vector in vectors]
+
+class MemoryVectorStore:
+    """
+    VectorStore counterpart for MemoryGraph. Embeds texts with the configured model and
+    stores the vectors on the graph's nodes.
+    """
+    def __init__(self, graph, embedding=None):
+        self.graph = graph
+        self.error_handler = graph.error_handler
+        self.config = config()
+        if embedding is None:
+            embedding = create_embeddings()
+        self.embeddings_model = embedding
+
+    def select_vector_store(self, index_name=None, node_label=None):
+        return self
+
+    def add_documents(
+            self,
+            text=None,
+            documents=None,
+            node_label="Chunk",
+            index_name=None,
+            text_node_property="text",
+            embedding_node_property="embedding",
+            create_id_index=True,
+            force=False,
+            link_similar=None,
+            similarity_threshold=None,
+            max_nodes=None
+        ):
+        if text and not documents:
+            if not isinstance(text, list):
+                text = [text]
+            documents = [Document(page_content=t, metadata={"last_indexed": Timestamp().now}) for t in text]
+        elif documents:
+            if not isinstance(documents, list):
+                documents = [documents]
+        else:
+            self.error_handler.warning(f"No text or document provided")
+            return None
+
+        return save_documents(
+            self.graph,
+            documents,
+            self.embeddings_model.embed_documents,
+            node_label,
+            index_name=index_name,
+            text_node_property=text_node_property,
+            embedding_node_property=embedding_node_property,
+            create_id_index=create_id_index,
+            force=force,
+            link_similar=link_similar,
+            similarity_threshold=similarity_threshold,
+            max_nodes=max_nodes
+        )
+
+    def similarity_search_by_text(
+            self,
+            text,
+            k=5,
+            similarity_threshold=None,
+            index_name=None,
+            node_label=None,
+            mode=None
+        ):
+        return [
+            (Document(page_content=node.get("text", ""), metadata=self._metadata(node)), score)
+            for node, score in self.similarity_search_nodes_by_text(text, k, similarity_threshold, index_name, node_label, mode)
+        ]
+
+    def _metadata(self, node):
+        # Same metadata as the Neo4j store's RETRIEVAL_QUERY
+        metadata = {key: value for key, value in node.items() if key != "text"}
+        metadata.update(node_id=node.id, node_labels=list(node.labels))
+        return metadata
+
+    def similarity_search_nodes_by_text(
+            self,
+            text,
+            k=5,
+            similarity_threshold=None,
+            index_name=None,
+            node_label=None,
+            mode=None
+        ):
+        if not similarity_threshold:
+            similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
+
+        hybrid_config = self.config.get_config().get("HYBRID_SEARCH", {})
+        if (mode or hybrid_config.get("MODE", "vector")) == "hybrid" and (node_label or index_name):
+            # Only a cached query embedding gives real cosines without an API call
+            cached = getattr(self.embeddings_model, "cached", None)
+            vector = cached(str(text)) if cached is not None else None
+            if vector is not None:
+                hits = self.graph.find_nodes_by_fulltext(text, node_label or index_name, limit=hybrid_config.get("CANDIDATES", 50), with_embeddings=True)
+                neighbors = hybrid_rerank(hits, k, similarity_threshold, vector)
+                if len(neighbors) >= int(hybrid_config.get("MIN_HITS", 1)):
+                    return neighbors
+
+        vector = self.embeddings_model.embed_query(str(text))
+        neighbors = self.graph.nearest_neighbors(vector, k=k, node_label=node_label)
+        return [(node, score) for node, score in neighbors if score > similarity_threshold]
+
+    def similarity_search_many(self, texts, k=5, similarity_threshold=None, index_name=None, node_label=None):
+        return [
+            [(Document(page_content=node.get("text", ""), metadata=self._metadata(node)), score) for node, score in neighbors]
+            for neighbors in self.similarity_search_nodes_many(texts, k, similarity_threshold, index_name, node_label)
+        ]
+
+    def similarity_search_nodes_many(self, texts, k=5, similarity_threshold=None, index_name=None, node_label=None):
+        if not similarity_threshold:
+            similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
+        if not texts:
+            return []
+        vectors = self.embeddings_model.embed_documents([str(text) for text in texts])
+        return [
+            [(node, score) for node, score in self.graph.nearest_neighbors(vector, k=k, node_label=node_label) if score > similarity_threshold]
+            for vector in vectors
+        ]
+
+    def find_document_by_text(
+            self,
+            text,
+            similarity_threshold=None,
+            node_label=None,
+            index_name=None,
+        ):
+        similarity_threshold = similarity_threshold or 0.9
+        neighbors = self.similarity_search_by_text(text, k=1, similarity_threshold=similarity_threshold, index_name=index_name, node_label=node_label)
+        if neighbors:
+            return neighbors[0]
+        return None, None
+
+
+    def similarity_search_by_node_id(self, node_id, k=5, similarity_threshold=None, index_name=None, node_label=None):
+        if not similarity_threshold:
+            similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
+        return self.graph.find_similar_nodes(node_id, k=k, index_name=index_name or node_label, similarity_threshold=similarity_threshold)
+
+    def similarity_search_by_vector(self, vector, k=5, similarity_threshold=None, index_name=None, node_label=None):
+        if not similarity_threshold:
+            similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
+        return self.graph.find_similar_nodes_by_vector(vector, k=k, index_name=index_name or node_label, similarity_threshold=similarity_threshold)
+
+def create_embeddings():
+    """
+    Return the embedding model selected by GRAPH.EMBEDDINGS ("openai" or "hashing").
+    """
+    configuration = config()
+    graph_config = configuration.get_config().get("GRAPH", {})
+    if graph_config.get("EMBEDDINGS", "openai") == "hashing":
+        from functions.embeddings import HashingEmbeddings
+        return HashingEmbeddings(dimension=configuration.get_vector_index_config().get("VECTOR_DIMENSION", 1536))
+
+    from database.vector_indexes import vector_indexes
+    return vector_indexes.embeddings().model
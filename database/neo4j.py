@@ -1,36 +1,117 @@
 import sys
-from neo4j import GraphDatabase
+import math
+from neo4j import GraphDatabase, READ_ACCESS, WRITE_ACCESS
 from neo4j.exceptions import ServiceUnavailable
 from langchain.schema.document import Document
 from utils.error_handler import ErrorHandler
 from utils.config_loader import ConfigLoader as config
 from schema.schemas import Timestamp
+from utils.hashing import content_hash, BloomFilter
 
 from database.vectorstore import VectorStore
+from database.vector_indexes import vector_indexes
+from database.records import NodeRecord
+from database.queries import QueryBuilder, lucene_query
+from database.indexes import SchemaManager
+from database.write_buffer import WriteBuffer
+from database.local_index import LocalVectorIndex
+from database.similarity_graph import SimilarityGraphBuilder, normalize_rows, top_k_neighbors
+from database.vector_scan import VectorShards
 
 error_handler = ErrorHandler()
 
+# Pass as `projection` to return full driver nodes, including embedding vectors
+ALL_PROPERTIES = "*"
+
+def _fetch_all(tx, query, parameters):
+    # Records have to be consumed before the managed transaction ends
+    return [record for record in tx.run(query, parameters)]
+
+
+def _fetch_batches(tx, batches):
+    # Run (query, parameters, length) batches in the same transaction
+    return [_fetch_all(tx, query, parameters) for query, parameters, length in batches]
+
+
+def _fetch_plan(tx, query, parameters):
+    return tx.run(f"EXPLAIN {query}", parameters).consume().plan
+
+
 class GraphDatabaseConnection:
-    def __init__(self, uri, user, password):
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
-        self._session = None
+    """
+    Thread-safe access to Neo4j.
+
+    No session is kept between calls: every read, write or unit of work borrows a
+    session (and connection) from the driver pool and runs in a managed transaction,
+    which the driver retries on transient errors. A single instance can therefore be
+    shared by many threads.
+    """
+    def __init__(
+            self,
+            uri,
+            user,
+            password,
+            database=None,
+            max_connection_pool_size=None,
+            fetch_size=None,
+            max_transaction_retry_time=None
+        ):
+        driver_options = {}
+        if max_connection_pool_size:
+            driver_options["max_connection_pool_size"] = int(max_connection_pool_size)
+        if max_transaction_retry_time:
+            driver_options["max_transaction_retry_time"] = float(max_transaction_retry_time)
+
+        self._driver = GraphDatabase.driver(uri, auth=(user, password), **driver_options)
+        self.database = database
+        self.fetch_size = int(fetch_size) if fetch_size else 1000
         self.error_handler = error_handler
 
     def close(self):
-        if self._session:
-            self._session.close()
+        # Cached vector index handles must not outlive the driver they share
+        vector_indexes.release(self._driver)
         self._driver.close()
 
-    def _get_session(self):
-        if not self._session:
-            self._session = self._driver.session()
-        return self._session
+    @property
+    def driver(self):
+        """
+        The pooled driver, shared with the vector index handles (see database.vector_indexes).
+        """
+        return self._driver
+
+    def session(self, access_mode=WRITE_ACCESS, fetch_size=None):
+        """
+        Borrow a session from the driver pool. Use as a context manager so it is returned afterwards.
+        """
+        return self._driver.session(
+            database=self.database,
+            default_access_mode=access_mode,
+            fetch_size=fetch_size or self.fetch_size
+        )
+
+    def execute_read(self, work, *args, **kwargs):
+        """
+        Run `work(tx, *args, **kwargs)` in a managed read transaction and return its result.
+
+        Reads are routed to followers/read replicas in a cluster. Transient errors are retried,
+        so `work` must be idempotent and consume its results before returning.
+        """
+        with self.session(READ_ACCESS) as session:
+            return session.execute_read(work, *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        """
+        Run `work(tx, *args, **kwargs)` in a managed write transaction and return its result.
+
+        All queries run by `work` are committed together. Transient errors are retried,
+        so `work` must be idempotent and consume its results before returning.
+        """
+        with self.session(WRITE_ACCESS) as session:
+            return session.execute_write(work, *args, **kwargs)
 
     def read(self, query, parameters={}):
-        session = self._get_session()
         try:
-            result = session.run(query, parameters)
-            return [record for record in result]
+            return self.execute_read(_fetch_all, query, parameters)
         except ServiceUnavailable as e:
             self.error_handler.service_unavailable(e)
             return None
@@ -39,9 +120,8 @@ class GraphDatabaseConnection:
             return None
         
     def write(self, query, parameters={}):
-        session = self._get_session()
         try:
-            session.run(query, parameters)
+            return self.execute_write(_fetch_all, query, parameters)
         except ServiceUnavailable as e:
             self.error_handler.service_unavailable(e)
             self.error_handler.exception(sys.exc_info())
@@ -50,21 +130,880 @@ class GraphDatabaseConnection:
             self.error_handler.exception(sys.exc_info())
             return False
 
+    def stream(self, query, parameters={}, fetch_size=None):
+        """
+        Yield the records of a read query lazily instead of materializing them in a list.
+
+        Records are pulled from the server in batches of `fetch_size`, so memory stays
+        constant and work can start on the first records before the query finishes. The
+        session stays open until the generator is exhausted or closed. Unlike `read`, the
+        query is not retried on transient errors, since records may already have been consumed.
+        Errors are logged and re-raised, so a stream that is cut off is never mistaken for a
+        complete one.
+        """
+        try:
+            with self.session(READ_ACCESS, fetch_size=fetch_size) as session:
+                with session.begin_transaction() as tx:
+                    for record in tx.run(query, parameters):
+                        yield record
+        except ServiceUnavailable as e:
+            self.error_handler.service_unavailable(e)
+            raise
+        except Exception as e:
+            self.error_handler.handle_error(e)
+            raise
 
-class Graph:
-    def __init__(self):
-        neo4j_config = config().get_neo4j_config()
+    def explain(self, query, parameters={}):
+        """
+        Return the plan Neo4j would use for a query without executing it.
+        """
+        try:
+            return self.execute_read(_fetch_plan, query, parameters)
+        except Exception as e:
+            self.error_handler.handle_error(e)
+            return None
+
+
+class GraphQueries:
+    """
+    Cypher construction and result shaping shared by Graph and AsyncGraph.
+
+    The `_..._query` methods return (query, parameters) tuples and never touch the
+    database, so the synchronous and the asyncio client run exactly the same queries.
+    """
+    def _init_queries(self):
         self.config = config().get_config()
         self.error_handler = error_handler
+        self.batch_size = int(self.config["NEO4J"].get("BATCH_SIZE", 1000))
+
+        # Properties that are never returned by finders unless explicitly requested
+        self.excluded_properties = [config().get_vector_index_config().get("PROPERTY_KEY", "embedding")]
+
+        # Content hash deduplication
+        deduplication_config = self.config.get("DEDUPLICATION", {})
+        self.hash_property = deduplication_config.get("HASH_PROPERTY", "content_hash")
+        self.use_content_hash_filter = deduplication_config.get("BLOOM_FILTER", False)
+        self.content_hash_filters = {}
+        self._unique_constraints = set()
+
+        # Validates identifiers and caches the query templates
+        self.queries = QueryBuilder()
+
+    def _projection(self, variable, projection=None):
+        """
+        Build the RETURN expression for a node variable.
+
+        Args:
+            variable (str): Name of the node variable in the query.
+            projection (list or str, optional): List of property names to return. If not provided, all
+                properties except the excluded ones (the embedding) are returned. Pass ALL_PROPERTIES to
+                return the full node.
+
+        Returns:
+            tuple: The Cypher expression and the parameters it uses.
+        """
+        if projection == ALL_PROPERTIES:
+            return variable, {}
+
+        if projection is None:
+            properties = f"[key IN keys({variable}) WHERE NOT key IN $projection | [key, {variable}[key]]]"
+            projection = self.excluded_properties
+        else:
+            properties = f"[key IN $projection WHERE {variable}[key] IS NOT NULL | [key, {variable}[key]]]"
+
+        expression = f"{{id: id({variable}), labels: labels({variable}), properties: {properties}}}"
+        return expression, {"projection": list(projection)}
+
+    def _projection_shape(self, projection):
+        # The projection expression only depends on which of the three forms is used
+        if projection == ALL_PROPERTIES:
+            return ALL_PROPERTIES
+        return "default" if projection is None else "list"
+
+    def _property_parameters(self, properties):
+        # Prefix property parameters so they cannot clash with the other parameters of a query
+        return {f"property_{key}": value for key, value in properties.items()}
+
+    def _to_node(self, value):
+        # Projected nodes come back as maps, full nodes as driver Node objects
+        if isinstance(value, dict):
+            return NodeRecord.from_value(value)
+        return value
+
+    def _node_by_id_query(self, node_id, projection=None):
+        # If node_id is of integer type, then we assume it's Neo4j's internal ID.
+        # Otherwise, we assume it's a UUID.
+        is_internal = isinstance(node_id, int)
+        expression, params = self._projection("n", projection)
+
+        def build():
+            node_id_key = "id(n)" if is_internal else "n.id"
+            return f"MATCH (n) WHERE {node_id_key} = $node_id RETURN {expression} AS n"
+
+        query = self.queries.template(("node_by_id", is_internal, self._projection_shape(projection)), build)
+        return query, {**params, "node_id": node_id}
+
+    def _nodes_by_properties_query(self, properties, node_label=None, projection=None):
+        keys = tuple(sorted(self.queries.property(key) for key in properties))
+        if node_label:
+            self.queries.label(node_label)
+        expression, params = self._projection("n", projection)
+
+        def build():
+            query = f"MATCH (n:{node_label})" if node_label else "MATCH (n)"
+            if keys:
+                query += " WHERE " + " AND ".join(f"n.{key} = $property_{key}" for key in keys)
+            return query + f" RETURN {expression} AS n"
+
+        query = self.queries.template(("nodes_by_properties", keys, node_label, self._projection_shape(projection)), build)
+        return query, {**params, **self._property_parameters(properties)}
+
+    def _nodes_indexed_since_query(self, node_label, since=None, projection=None):
+        # Nodes (re)indexed at or after `since`, oldest first, for incremental mirrors
+        self.queries.label(node_label)
+        expression, params = self._projection("n", projection)
+
+        def build():
+            query = f"MATCH (n:{node_label})"
+            if since is not None:
+                query += " WHERE n.last_indexed >= $since"
+            return query + f" WITH n ORDER BY n.last_indexed RETURN {expression} AS n"
+
+        query = self.queries.template(("nodes_indexed_since", node_label, since is not None, self._projection_shape(projection)), build)
+        return query, {**params, "since": since}
+
+    def _filter_known_hashes(self, hashes, node_label=None):
+        # Drop hashes that the label's Bloom filter (if loaded) knows are definitely new
+        hashes = list(dict.fromkeys(hashes))
+        bloom_filter = self.content_hash_filters.get(node_label) if node_label and self.use_content_hash_filter else None
+        if bloom_filter is not None:
+            hashes = [digest for digest in hashes if digest in bloom_filter]
+        return hashes
+
+    def register_content_hashes(self, hashes, node_label):
+        """
+        Add the hashes of newly written nodes to the label's Bloom filter, if one is loaded.
+        Only call it once the nodes are committed.
+        """
+        bloom_filter = self.content_hash_filters.get(node_label)
+        if bloom_filter is not None:
+            bloom_filter.update(hashes)
+
+    def _nodes_by_content_hashes_query(self, node_label=None, projection=None):
+        if node_label:
+            self.queries.label(node_label)
+        expression, params = self._projection("n", projection)
+
+        def build():
+            node_pattern = f"(n:{node_label})" if node_label else "(n)"
+            return f"""
+            MATCH {node_pattern} WHERE n.{self.hash_property} IN $hashes
+            RETURN n.{self.hash_property} AS content_hash, {expression} AS n
+            """
+
+        query = self.queries.template(("nodes_by_content_hashes", node_label, self._projection_shape(projection)), build)
+        return query, params
+
+    def _count_nodes_query(self, node_label, property_key=None):
+        self.queries.label(node_label)
+        condition = f"WHERE n.{self.queries.property(property_key)} IS NOT NULL" if property_key else ""
+        query = self.queries.template(("count_nodes", node_label, property_key), lambda: f"""
+            MATCH (n:{node_label}) {condition}
+            RETURN count(n) AS count
+        """)
+        return query, {}
+
+    def _content_hashes_query(self, node_label):
+        self.queries.label(node_label)
+        query = self.queries.template(("content_hashes", node_label), lambda: f"""
+            MATCH (n:{node_label}) WHERE n.{self.hash_property} IS NOT NULL
+            RETURN n.{self.hash_property} AS content_hash
+        """)
+        return query, {}
+
+    def _parent_node_query(self, node_id, parent_label, projection=None):
+        # If node_id is of integer type, then we assume it's Neo4j's internal ID.
+        # Otherwise, we assume it's a UUID.
+        is_internal = isinstance(node_id, int)
+        self.queries.label(parent_label)
+        expression, params = self._projection("parent", projection)
+
+        def build():
+            node_id_key = "id(chunk)" if is_internal else "chunk.id"
+            return f"""
+            MATCH (parent:{parent_label})-->(chunk)
+            WHERE {node_id_key} = $node_id
+            RETURN {expression} AS parent
+            """
+
+        query = self.queries.template(("parent_node", is_internal, parent_label, self._projection_shape(projection)), build)
+        return query, {**params, "node_id": node_id}
+
+    def _child_nodes_query(self, parent_id, node_label=None, sequence_label=None, offset=0, limit=None, projection=None):
+        is_internal = isinstance(parent_id, int)
+        if node_label:
+            self.queries.label(node_label)
+        if sequence_label:
+            self.queries.relationship(sequence_label)
+        expression, params = self._projection("child", projection)
+
+        def build():
+            # Base match for the parent and direct child
+            parent_id_key = "id(parent)" if is_internal else "parent.id"
+            child_pattern = f"(first_child:{node_label})" if node_label else "(first_child)"
+            query = f"""
+            MATCH (parent)-->{child_pattern}
+            WHERE {parent_id_key} = $parent_id
+            """
+
+            if sequence_label:
+                # Start at the heads of the sequences only, so that children that are linked to the
+                # parent *and* part of a chain are not returned twice. The zero-length path includes
+                # the head itself at position 0.
+                previous_pattern = f"(:{node_label})" if node_label else "()"
+                query += f"""
+            AND NOT EXISTS {{ MATCH (parent)-->{previous_pattern}-[:{sequence_label}]->(first_child) }}
+            MATCH path = (first_child)-[:{sequence_label}*0..]->(child)
+            RETURN {expression} AS child
+            ORDER BY id(first_child), length(path)
+            """
+            else:
+                query += f"""
+            WITH first_child AS child, id(first_child) AS position
+            RETURN {expression} AS child
+            ORDER BY position
+            """
+
+            if offset:
+                query += " SKIP $offset"
+            if limit is not None:
+                query += " LIMIT $limit"
+            return query
+
+        key = ("child_nodes", is_internal, node_label, sequence_label, bool(offset), limit is not None, self._projection_shape(projection))
+        query = self.queries.template(key, build)
+        return query, {**params, "parent_id": parent_id, "offset": offset, "limit": limit}
+
+    def _child_nodes_by_properties_query(self, properties, parent_id=None, node_label=None, projection=None):
+        keys = tuple(sorted(self.queries.property(key) for key in properties))
+        has_parent = bool(parent_id)
+        is_internal = isinstance(parent_id, int)
+        if node_label:
+            self.queries.label(node_label)
+        expression, params = self._projection("child", projection)
+
+        def build():
+            conditions = [f"child.{key} = $property_{key}" for key in keys]
+            child_pattern = f"(child:{node_label})" if node_label else "(child)"
+
+            # If a parent_id is provided, we should limit our search to children of that specific parent
+            if has_parent:
+                # If parent_id is of integer type, then we assume it's Neo4j's internal ID.
+                # Otherwise, we assume it's a UUID.
+                parent_id_key = "id(parent)" if is_internal else "parent.id"
+                query = f"MATCH (parent)-->{child_pattern}"
+                conditions.insert(0, f"{parent_id_key} = $parent_id")
+            else:
+                query = f"MATCH {child_pattern}"
+
+            if conditions:
+                query += f" WHERE {' AND '.join(conditions)}"
+            return query + f" RETURN {expression} AS child"
+
+        key = ("child_nodes_by_properties", keys, has_parent, is_internal, node_label, self._projection_shape(projection))
+        query = self.queries.template(key, build)
+        return query, {**params, **self._property_parameters(properties), "parent_id": parent_id}
+
+    def _edge_by_id_query(self, edge_id):
+        return "MATCH ()-[r]-() WHERE id(r) = $edge_id RETURN r", {"edge_id": edge_id}
+
+    def _id_condition(self, variable, node_id):
+        # Condition on the internal ID or the uid of a node, depending on the type of node_id
+        if node_id is None:
+            return None
+        return f"id({variable}) = ${variable}_id" if isinstance(node_id, int) else f"{variable}.id = ${variable}_id"
+
+    def _edges_by_property_query(self, property, value, origin_id=None, target_id=None):
+        self.queries.property(property)
+        origin_condition = self._id_condition("start", origin_id)
+        target_condition = self._id_condition("end", target_id)
+
+        def build():
+            conditions = [f"r.{property} = $value"]
+            conditions += [condition for condition in (origin_condition, target_condition) if condition]
+            return f"MATCH (start)-[r]->(end) WHERE {' AND '.join(conditions)} RETURN r"
+
+        query = self.queries.template(("edges_by_property", property, origin_condition, target_condition), build)
+        return query, {"value": value, "start_id": origin_id, "end_id": target_id}
+
+    def _edges_by_relationship_query(self, relationship_name, origin_id=None, target_id=None):
+        self.queries.relationship(relationship_name)
+        origin_condition = self._id_condition("start", origin_id)
+        target_condition = self._id_condition("end", target_id)
+
+        def build():
+            query = f"MATCH (start)-[r:{relationship_name}]->(end)"
+            conditions = [condition for condition in (origin_condition, target_condition) if condition]
+            if conditions:
+                query += f" WHERE {' AND '.join(conditions)}"
+            return query + " RETURN r"
+
+        query = self.queries.template(("edges_by_relationship", relationship_name, origin_condition, target_condition), build)
+        return query, {"start_id": origin_id, "end_id": target_id}
+
+    def _similar_nodes_query(self, node_id, k, index_name=None, similarity_threshold=0, projection=None):
+        # Query the vector index with the node's stored embedding. The index returns the
+        # node itself as well, so ask for one more neighbor and drop it.
+        is_internal = isinstance(node_id, int)
+        expression, params = self._projection("node", projection)
+
+        def build():
+            node_id_key = "id(origin)" if is_internal else "origin.id"
+            return f"""
+                MATCH (origin) WHERE {node_id_key} = $node_id AND origin.{self.excluded_properties[0]} IS NOT NULL
+                CALL db.index.vector.queryNodes(coalesce($index_name, head(labels(origin))), $k + 1, origin.{self.excluded_properties[0]})
+                YIELD node, score
+                WITH node, score WHERE node <> origin AND score > $similarity_threshold
+                RETURN {expression} AS node, score
+                ORDER BY score DESC
+                LIMIT $k
+            """
+
+        query = self.queries.template(("similar_nodes", is_internal, self._projection_shape(projection)), build)
+        return query, {
+            **params,
+            "node_id": node_id,
+            "k": int(k),
+            "index_name": index_name,
+            "similarity_threshold": float(similarity_threshold)
+        }
+
+    def _similar_nodes_by_vector_query(self, vector, k, index_name, similarity_threshold=0, projection=None):
+        expression, params = self._projection("node", projection)
+
+        def build():
+            return f"""
+                CALL db.index.vector.queryNodes($index_name, $k, $vector)
+                YIELD node, score
+                WITH node, score WHERE score > $similarity_threshold
+                RETURN {expression} AS node, score
+                ORDER BY score DESC
+            """
+
+        query = self.queries.template(("similar_nodes_by_vector", self._projection_shape(projection)), build)
+        return query, {
+            **params,
+            "vector": [float(value) for value in vector],
+            "k": int(k),
+            "index_name": index_name,
+            "similarity_threshold": float(similarity_threshold)
+        }
+
+    def _scope_pattern(self, relationship_name="CONTAINS", max_depth=None):
+        # Path from a parent to the nodes of its subtree, e.g. -[:CONTAINS*1..]->
+        self.queries.relationship(relationship_name)
+        depth = "" if max_depth is None else int(max_depth)
+        return f"-[:{relationship_name}*1..{depth}]->"
+
+    def _scope_size_query(self, parent_id, node_label, relationship_name="CONTAINS", max_depth=None):
+        # Number of embedded nodes in a parent's subtree and in the whole label, to plan a scoped search
+        is_internal = isinstance(parent_id, int)
+        self.queries.label(node_label)
+        pattern = self._scope_pattern(relationship_name, max_depth)
+
+        def build():
+            parent_id_key = "id(parent)" if is_internal else "parent.id"
+            return f"""
+                MATCH (parent) WHERE {parent_id_key} = $parent_id
+                OPTIONAL MATCH (parent){pattern}(node:{node_label})
+                WHERE node.{self.excluded_properties[0]} IS NOT NULL
+                WITH count(DISTINCT node) AS scope_size
+                CALL {{ MATCH (labeled:{node_label}) RETURN count(labeled) AS label_size }}
+                RETURN scope_size, label_size
+            """
+
+        query = self.queries.template(("scope_size", is_internal, node_label, pattern), build)
+        return query, {"parent_id": parent_id}
+
+    def _scoped_similar_nodes_query(
+            self,
+            parent_id,
+            node_label,
+            k,
+            node_id=None,
+            vector=None,
+            index_name=None,
+            similarity_threshold=0,
+            relationship_name="CONTAINS",
+            max_depth=None,
+            candidates=None,
+            projection=None
+        ):
+        """
+        Build the query for the neighbors of a node or vector within a parent's subtree.
+
+        Without `candidates`, every embedded node of the scope is scored exactly. Otherwise
+        the vector index is asked for that many candidates, which are then restricted to the scope.
+        The index query also returns the lowest candidate score (`lowest`) and the number of
+        candidates in the scope (`in_scope`) on every row, and a single row with a null node if
+        none is left after the threshold, so a caller can tell whether more candidates could help
+        (see GraphQueries._scoped_results).
+        """
+        parent_is_internal = isinstance(parent_id, int)
+        origin_is_internal = isinstance(node_id, int)
+        self.queries.label(node_label)
+        pattern = self._scope_pattern(relationship_name, max_depth)
+        embedding = self.excluded_properties[0]
+        expression, params = self._projection("node", projection)
+
+        def build():
+            parent_id_key = "id(parent)" if parent_is_internal else "parent.id"
+            origin_id_key = "id(origin)" if origin_is_internal else "origin.id"
+            query = f"""
+                OPTIONAL MATCH (origin) WHERE {origin_id_key} = $node_id
+                WITH origin, coalesce($vector, origin.{embedding}) AS vector
+                WHERE vector IS NOT NULL
+                MATCH (parent) WHERE {parent_id_key} = $parent_id
+            """
+            if candidates is None:
+                query += f"""
+                MATCH (parent){pattern}(node:{node_label})
+                WHERE node.{embedding} IS NOT NULL AND (origin IS NULL OR node <> origin)
+                WITH DISTINCT node, vector
+                WITH node, vector.similarity.cosine(node.{embedding}, vector) AS score
+                """
+            else:
+                return query + f"""
+                CALL db.index.vector.queryNodes($index_name, $candidates, vector)
+                YIELD node, score
+                WITH parent, origin, collect([node, score]) AS hits, min(score) AS lowest
+                UNWIND hits AS hit
+                WITH parent, origin, lowest, hit[0] AS node, hit[1] AS score
+                WITH lowest, collect(CASE
+                    WHEN (origin IS NULL OR node <> origin) AND EXISTS {{ MATCH (parent){pattern}(node:{node_label}) }}
+                    THEN [node, score]
+                END) AS in_scope
+                WITH lowest, size(in_scope) AS in_scope, [hit IN in_scope WHERE hit[1] > $similarity_threshold] AS matches
+                UNWIND CASE WHEN matches = [] THEN [[null, null]] ELSE matches END AS match
+                WITH match[0] AS node, match[1] AS score, lowest, in_scope
+                RETURN CASE WHEN node IS NULL THEN null ELSE {expression} END AS node, score, lowest, in_scope
+                ORDER BY score DESC
+                LIMIT $k
+                """
+            return query + f"""
+                WITH node, score WHERE score > $similarity_threshold
+                RETURN {expression} AS node, score
+                ORDER BY score DESC
+                LIMIT $k
+            """
+
+        key = ("scoped_similar_nodes", candidates is None, parent_is_internal, origin_is_internal, node_label, pattern, self._projection_shape(projection))
+        query = self.queries.template(key, build)
+        return query, {
+            **params,
+            "parent_id": parent_id,
+            "node_id": node_id,
+            "vector": [float(value) for value in vector] if vector is not None else None,
+            "k": int(k),
+            "index_name": index_name or node_label,
+            "candidates": int(candidates or 0),
+            "similarity_threshold": float(similarity_threshold)
+        }
+
+    def _scoped_results(self, records, k, candidates, label_size, similarity_threshold):
+        """
+        Read the records of a scoped search and decide whether to fetch more candidates.
+
+        The index returns candidates best first, so more of them can only add lower scores. The
+        search is done once k neighbors were found, the scope was scored exactly, the index was
+        exhausted, k candidates fell into the scope before the threshold, or the index already
+        returned a candidate at or below the threshold.
+
+        Returns:
+            tuple: The (node, score) tuples and True if the search is done.
+        """
+        results = [(self._to_node(record["node"]), record["score"]) for record in records if record["node"] is not None]
+        if candidates is None or len(results) >= k or candidates >= label_size or not records:
+            return results, True
+        return results, records[0]["in_scope"] >= k or records[0]["lowest"] <= similarity_threshold
+
+    def _scope_candidates(self, k, scope_size, label_size, previous=None):
+        """
+        Plan the next attempt of a scoped search.
+
+        Small scopes are scored exactly. For large ones, the vector index is asked for enough
+        candidates that about SCOPE_OVERFETCH * k of them should fall into the scope, given
+        the share of the label the scope covers. After a short result the number grows 4x,
+        and past MAX_SCOPE_CANDIDATES the search falls back to scoring the scope exactly.
+
+        Returns:
+            int: Number of index candidates to fetch, or None to score the scope exactly.
+        """
+        index_config = self.config["VECTOR_INDEX"]
+        max_candidates = int(index_config.get("MAX_SCOPE_CANDIDATES", 10000))
+        if scope_size <= int(index_config.get("EXACT_SCOPE_SIZE", 10000)):
+            return None
+        if previous is None:
+            candidates = math.ceil(k * float(index_config.get("SCOPE_OVERFETCH", 2)) * label_size / max(scope_size, 1))
+        elif previous >= max_candidates:
+            return None
+        else:
+            candidates = previous * 4
+        return int(min(max(candidates, k + 1), max_candidates, label_size))
+
+    def fulltext_index_name(self, node_label):
+        """
+        Name of the full-text index of a label (see database.indexes and HYBRID_SEARCH.PROPERTIES).
+        """
+        return f"{self.queries.label(node_label).lower()}_fulltext"
+
+    def _fulltext_nodes_query(self, text, node_label, limit, projection=None, with_embeddings=False):
+        expression, params = self._projection("node", projection)
+
+        def build():
+            embedding = f", node.{self.excluded_properties[0]} AS embedding" if with_embeddings else ""
+            return f"""
+                CALL db.index.fulltext.queryNodes($index_name, $query, {{limit: $limit}})
+                YIELD node, score
+                RETURN {expression} AS node, score{embedding}
+                ORDER BY score DESC
+            """
+
+        query = self.queries.template(("fulltext_nodes", with_embeddings, self._projection_shape(projection)), build)
+        return query, {**params, "index_name": self.fulltext_index_name(node_label), "query": lucene_query(text), "limit": int(limit)}
+
+    def _similar_nodes_by_vectors_batches(self, vectors, k, index_name, similarity_threshold=0, projection=None, batch_size=None):
+        """
+        Build the UNWIND queries that search the neighbors of many vectors, one per batch of vectors.
+
+        Returns:
+            List[tuple]: (query, parameters, position of the batch's first vector) for every batch.
+        """
+        expression, params = self._projection("node", projection)
+
+        def build():
+            return f"""
+                UNWIND range(0, size($vectors) - 1) AS position
+                CALL db.index.vector.queryNodes($index_name, $k, $vectors[position])
+                YIELD node, score
+                WITH position, node, score WHERE score > $similarity_threshold
+                WITH position, node, score ORDER BY position, score DESC
+                RETURN position, collect({{node: {expression}, score: score}}) AS matches
+            """
+
+        query = self.queries.template(("similar_nodes_by_vectors", self._projection_shape(projection)), build)
+        batch_size = batch_size or self.batch_size
+        vectors = [[float(value) for value in vector] for vector in vectors]
+        return [
+            (query, {
+                **params,
+                "vectors": vectors[start:start + batch_size],
+                "k": int(k),
+                "index_name": index_name,
+                "similarity_threshold": float(similarity_threshold)
+            }, start)
+            for start in range(0, len(vectors), batch_size)
+        ]
+
+    def _link_batches(self, pairs, relationship_name, edge_values, force, bidirectional, batch_size, stats):
+        """
+        Build the UNWIND linking queries for a list of pairs.
+
+        Returns:
+            List[tuple]: (query, parameters, batch length) for every batch. Self-links are counted as skipped in stats.
+        """
+        self.queries.relationship(relationship_name)
+        if edge_values is None:
+            edge_values = {
+                "last_indexed": Timestamp().now
+            }
+
+        batch_size = batch_size or self.batch_size
+
+        # Group the pairs by ID type so that every group can use a fixed query template
+        # that matches on either the internal ID or the uid.
+        groups = {}
+        for pair in pairs:
+            origin, target = pair[0], pair[1]
+            if origin == target:
+                stats["skipped"] += 1
+                continue
+            values = {**edge_values, **pair[2]} if len(pair) > 2 and pair[2] else edge_values
+            key = (isinstance(origin, int), isinstance(target, int))
+            groups.setdefault(key, []).append({
+                "start_id": origin,
+                "end_id": target,
+                "edge_values": values
+            })
+
+        batches = []
+        for (origin_is_internal, target_is_internal), rows in groups.items():
+            def build():
+                origin_id_key = "id(start)" if origin_is_internal else "start.id"
+                target_id_key = "id(end)" if target_is_internal else "end.id"
+
+                query = f"""
+                    UNWIND $pairs AS pair
+                    MATCH (start) WHERE {origin_id_key} = pair.start_id
+                    MATCH (end) WHERE {target_id_key} = pair.end_id
+                    WITH start, end, pair,
+                         EXISTS {{ MATCH (start)-[:{relationship_name}]->(end) }} AS forward_exists,
+                         EXISTS {{ MATCH (start)<-[:{relationship_name}]-(end) }} AS backward_exists
+                    WITH start, end, pair, forward_exists AND (NOT $bidirectional OR backward_exists) AS edge_exists
+                    WHERE $force OR NOT edge_exists
+                    MERGE (start)-[r1:{relationship_name}]->(end)
+                    SET r1 += pair.edge_values
+                """
+
+                # If bidirectional is True, link the target node to the origin node as well
+                if bidirectional:
+                    query += f"""
+                    MERGE (start)<-[r2:{relationship_name}]-(end)
+                    SET r2 += pair.edge_values
+                """
+
+                query += """
+                    RETURN sum(CASE WHEN edge_exists THEN 0 ELSE 1 END) AS created,
+                           sum(CASE WHEN edge_exists THEN 1 ELSE 0 END) AS updated
+                """
+                return query
+
+            query = self.queries.template(("link", origin_is_internal, target_is_internal, relationship_name, bool(bidirectional)), build)
+
+            for index in range(0, len(rows), batch_size):
+                batch = rows[index:index + batch_size]
+                batches.append((query, {
+                    "pairs": batch,
+                    "force": force,
+                    "bidirectional": bidirectional
+                }, len(batch)))
+        return batches
+
+    def _count_links(self, stats, records, batch_length, relationship_name):
+        # Add the result of one linking batch to stats
+        if records is False:
+            self.error_handler.warning(f"Error linking batch of {batch_length} pairs with relationship {relationship_name}")
+            stats["failed"] += batch_length
+            return
+
+        created = records[0]["created"] if records else 0
+        updated = records[0]["updated"] if records else 0
+        stats["created"] += created
+        stats["updated"] += updated
+        stats["skipped"] += batch_length - created - updated
+
+    def _update_node_properties_query(self, node_id, properties):
+        # Determine if the ID is an internal Neo4j ID or a uid
+        is_internal = isinstance(node_id, int)
+
+        def build():
+            node_id_key = "id(n)" if is_internal else "n.id"
+            return f"""
+            MATCH (n)
+            WHERE {node_id_key} = $node_id
+            SET n += $properties
+            """
+
+        query = self.queries.template(("update_node_properties", is_internal), build)
+        return query, {"node_id": node_id, "properties": properties}
+
+    def _update_nodes_batches(self, updates, batch_size=None):
+        """
+        Build the UNWIND update queries for a list of (node_id, properties) tuples.
+
+        Returns:
+            List[tuple]: (query, parameters, batch length) for every batch. Each query returns the IDs of the updated nodes.
+        """
+        batch_size = batch_size or self.batch_size
+
+        groups = {}
+        for node_id, properties in updates:
+            groups.setdefault(isinstance(node_id, int), []).append({"node_id": node_id, "properties": properties})
+
+        batches = []
+        for is_internal, rows in groups.items():
+            node_id_key = "id(n)" if is_internal else "n.id"
+            query = self.queries.template(("update_nodes", is_internal), lambda: f"""
+                UNWIND $rows AS row
+                MATCH (n)
+                WHERE {node_id_key} = row.node_id
+                SET n += row.properties
+                RETURN row.node_id AS node_id
+            """)
+            for index in range(0, len(rows), batch_size):
+                batch = rows[index:index + batch_size]
+                batches.append((query, {"rows": batch}, len(batch)))
+        return batches
+
+    def _create_nodes_batches(self, rows, node_label, text_node_property="text", embedding_node_property="embedding", batch_size=None):
+        """
+        Build the UNWIND queries that create nodes together with their embeddings.
+
+        Returns:
+            List[tuple]: (query, parameters, batch length) for every batch. Each query returns the UIDs of the created nodes.
+        """
+        batch_size = batch_size or self.batch_size
+        self.queries.label(node_label)
+        self.queries.property(text_node_property)
+        self.queries.property(embedding_node_property)
+
+        key = ("create_nodes", node_label, text_node_property, embedding_node_property)
+        query = self.queries.template(key, lambda: f"""
+            UNWIND $rows AS row
+            MERGE (n:{node_label} {{id: row.id}})
+            SET n.{text_node_property} = row.text
+            SET n += row.metadata
+            WITH n, row
+            CALL db.create.setNodeVectorProperty(n, '{embedding_node_property}', row.embedding)
+            RETURN row.id AS id
+        """)
+
+        batches = []
+        for index in range(0, len(rows), batch_size):
+            batch = rows[index:index + batch_size]
+            batches.append((query, {"rows": batch}, len(batch)))
+        return batches
+
+    def _link_on_insert_options(self, link_similar=None, similarity_threshold=None, max_nodes=None):
+        """
+        Resolve the options for linking new nodes to their similar nodes at insert time.
+
+        Returns:
+            tuple: (k, similarity_threshold), or None if new nodes are not linked.
+        """
+        job_config = self.config.get("SIMILARITY_GRAPH", {})
+        if link_similar is None:
+            link_similar = job_config.get("LINK_ON_INSERT", False)
+        if not link_similar:
+            return None
+        if similarity_threshold is None:
+            similarity_threshold = job_config.get("SIMILARITY_THRESHOLD", self.config["VECTOR_INDEX"]["SIMILARITY_THRESHOLD"])
+        k = max_nodes or job_config.get("K", self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10))
+        return int(k), float(similarity_threshold)
+
+    def _similar_candidates(self, rows, k, similarity_threshold):
+        # Neighbors among the new rows themselves, which the vector index does not contain yet
+        candidates = [[] for row in rows]
+        if len(rows) < 2:
+            return candidates
+        indices, scores = top_k_neighbors(normalize_rows([row["embedding"] for row in rows]), 0, len(rows), min(k, len(rows) - 1))
+        for row_candidates, neighbors, neighbor_scores in zip(candidates, indices, scores):
+            for neighbor, score in zip(neighbors, neighbor_scores):
+                if similarity_threshold < score < 1:
+                    row_candidates.append({"id": rows[neighbor]["id"], "score": float(score)})
+        return candidates
+
+    def _link_on_insert_batches(self, rows, k, similarity_threshold, index_neighbors=None, batch_size=None, stats=None):
+        """
+        Build the UNWIND queries that link new nodes to their k most similar nodes.
+
+        Run them after the queries of _create_nodes_batches, in the same transaction. Each new
+        node is linked to the best k of its neighbors in the vector index (`index_neighbors`,
+        looked up beforehand with Graph._index_neighbors) and among the other new rows (computed
+        locally). The edges are written like the batch job's (see Graph.build_similarity_graph),
+        in the direction set by SIMILARITY_GRAPH.BIDIRECTIONAL.
+
+        Returns:
+            List[tuple]: (query, parameters, batch length) for every batch. Each query returns the created and updated links.
+        """
+        if stats is None:
+            stats = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+        candidates = self._similar_candidates(rows, k, similarity_threshold)
+
+        pairs = []
+        for position, row in enumerate(rows):
+            neighbors = {candidate["id"]: candidate["score"] for candidate in candidates[position]}
+            for neighbor_id, score in (index_neighbors[position] if index_neighbors else []):
+                if neighbor_id != row["id"] and similarity_threshold < score < 1:
+                    neighbors[neighbor_id] = max(score, neighbors.get(neighbor_id, score))
+            best = sorted(neighbors.items(), key=lambda item: item[1], reverse=True)[:k]
+            pairs.extend((row["id"], neighbor_id, {"similarity": score}) for neighbor_id, score in best)
+
+        bidirectional = self.config.get("SIMILARITY_GRAPH", {}).get("BIDIRECTIONAL", False)
+        return self._link_batches(pairs, "SIMILAR_TO", {}, False, bidirectional, batch_size, stats)
+
+    def _sequence_pairs(self, targets, origins, close_loop):
+        # Chain each origin through all targets, optionally closing the loop
+        pairs = []
+        for origin in origins:
+            for target in targets:
+                pairs.append((origin, target))
+                origin = target
+
+            # Close the loop if required
+            if close_loop:
+                pairs.append((targets[-1], origins[0]))
+        return pairs
+
+
+class Graph(GraphQueries):
+    def __init__(self):
+        neo4j_config = config().get_neo4j_config()
+        self._init_queries()
         self.vector_store = VectorStore(graph=self)
         self.graph = self
+        self.write_buffer = None
+        self.local_indexes = {}
+        self._vector_indexes = set()
         self.graph_database = GraphDatabaseConnection(
             uri=neo4j_config['URI'],
             user=neo4j_config['USER'],
-            password=neo4j_config['PASSWORD']
+            password=neo4j_config['PASSWORD'],
+            database=neo4j_config.get('DATABASE'),
+            max_connection_pool_size=neo4j_config.get('MAX_CONNECTION_POOL_SIZE'),
+            fetch_size=neo4j_config.get('FETCH_SIZE'),
+            max_transaction_retry_time=neo4j_config.get('MAX_TRANSACTION_RETRY_TIME')
         )
 
-    def find_node_by_id(self, node_id):
+        if self.config.get("SCHEMA", {}).get("MIGRATE_ON_STARTUP", False):
+            SchemaManager(self).migrate()
+
+    def get_vector_store(self, index_name=None, node_label=None):
+        """
+        Return a vector store for the given index and label that writes to this graph.
+
+        Args:
+            index_name (str, optional): Name of the vector index. Defaults to the node label.
+            node_label (str, optional): Label of the nodes in the index.
+
+        Returns:
+            VectorStore: The vector store.
+        """
+        return VectorStore(index_name=index_name, node_label=node_label, graph=self)
+
+    def local_index(self, node_label):
+        """
+        Return the in-process vector index mirror of a label, opened and synced on first use.
+
+        Args:
+            node_label (str): Label of the mirrored nodes.
+
+        Returns:
+            LocalVectorIndex: The mirror (see database.local_index), or None if it could not be opened.
+                The failure is remembered, so the label is not streamed again on every search.
+        """
+        if node_label in self.local_indexes:
+            return self.local_indexes[node_label]
+        try:
+            index = LocalVectorIndex(self, node_label)
+            index.sync()
+        except Exception as e:
+            self.error_handler.warning(f"Local index of {node_label} disabled, searching Neo4j instead: {e}")
+            index = None
+        self.local_indexes[node_label] = index
+        return index
+
+    def find_node_by_id(self, node_id, projection=None):
+        """
+        Find a node by its internal ID or UID.
+
+        Args:
+            node_id (int or str): The ID or UID of the node.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+
+        Returns:
+            Node: The node if found, otherwise None.
+        """
         self.error_handler.debug_info(f"Finding node with id {node_id}")
 
         # Check if node_id is integer or string
@@ -72,151 +1011,339 @@ class Graph:
             self.error_handler.generic_error(f"Invalid node ID: {node_id}")
             return None
 
-        # If node_id is of integer type, then we assume it's Neo4j's internal ID.
-        # Otherwise, we assume it's a UUID.
-        if isinstance(node_id, int):
-            query = "MATCH (n) WHERE id(n) = $node_id RETURN n"
-        else:
-            query = "MATCH (n) WHERE n.id = $node_id RETURN n"
-        
-        params = {"node_id": node_id}
-        
-        
+        query, params = self._node_by_id_query(node_id, projection)
         records = self.graph_database.read(query, params)
         try:
             if len(records) > 0:
                 self.error_handler.success(f"Found {len(records)} nodes")
-                return records[0]['n']
+                return self._to_node(records[0]['n'])
         except Exception as e:
             self.error_handler.exception(sys.exc_info())
             return None
     
-    def find_nodes_by_properties(self, properties, node_label=None):
+    def find_nodes_by_properties(self, properties, node_label=None, projection=None):
         """
         Find nodes based on multiple properties and an optional label.
 
         Args:
             properties (dict): Dictionary containing key-value pairs of properties.
             label (str, optional): Label of the nodes to search for. If not provided, all nodes will be searched.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
 
         Returns:
             List: List of nodes that match the label (if provided) and properties.
         """
         
-        conditions = [f"n.{property} = ${property}" for property in properties.keys()]
-        query_condition = " AND ".join(conditions)
-        
-        if node_label:
-            query = f"MATCH (n:{node_label})"
-        else:
-            query = "MATCH (n)"
-        
-        if query_condition:
-            query += f" WHERE {query_condition}"
-
-        query += " RETURN n"
+        query, params = self._nodes_by_properties_query(properties, node_label, projection)
 
         try:
-            records = self.graph_database.read(query, properties)
-            return [record['n'] for record in records]
+            records = self.graph_database.read(query, params)
+            return [self._to_node(record['n']) for record in records]
         except Exception as e:
             self.error_handler.exception(exc_info=sys.exc_info())
             return []
 
 
-    def find_parent_node_by_id(self, node_id, parent_label):
+    def count_nodes(self, node_label, property_key=None):
+        """
+        Count the nodes of a label.
+
+        Args:
+            node_label (str): Label of the nodes.
+            property_key (str, optional): Only count nodes that have this property.
+
+        Returns:
+            int: Number of nodes, or None if the query failed.
+        """
+        query, params = self._count_nodes_query(node_label, property_key)
+        records = self.graph_database.read(query, params)
+        if records is None:
+            return None
+        return records[0]["count"]
+
+    def iter_nodes(self, node_label, projection=None, fetch_size=None):
+        """
+        Stream all nodes of a label.
+
+        Args:
+            node_label (str): Label of the nodes.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+            fetch_size (int, optional): Records pulled per round trip. Defaults to NEO4J.FETCH_SIZE.
+
+        Yields:
+            Node: The nodes of the label.
+        """
+        return self.iter_nodes_by_properties({}, node_label=node_label, projection=projection, fetch_size=fetch_size)
+
+    def iter_nodes_by_properties(self, properties, node_label=None, projection=None, fetch_size=None):
+        """
+        Generator variant of find_nodes_by_properties that yields nodes as they arrive.
+        """
+        query, params = self._nodes_by_properties_query(properties, node_label, projection)
+        for record in self.graph_database.stream(query, params, fetch_size=fetch_size):
+            yield self._to_node(record['n'])
+
+    def iter_nodes_indexed_since(self, node_label, since=None, projection=None, fetch_size=None):
+        """
+        Stream the nodes of a label whose last_indexed timestamp is at or after `since`, oldest first.
+
+        Args:
+            node_label (str): Label of the nodes.
+            since (str, optional): Timestamp in Timestamp().now format. Defaults to None (all nodes).
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+            fetch_size (int, optional): Records pulled per round trip. Defaults to NEO4J.FETCH_SIZE.
+
+        Yields:
+            Node: The nodes, ordered by last_indexed.
+        """
+        query, params = self._nodes_indexed_since_query(node_label, since, projection)
+        for record in self.graph_database.stream(query, params, fetch_size=fetch_size):
+            yield self._to_node(record['n'])
+
+    def ensure_content_hash_constraint(self, node_label):
+        """
+        Create the uniqueness constraint on the content hash property of a label (once per process).
+
+        Args:
+            node_label (str): Label to constrain.
+
+        Returns:
+            bool: True if the constraint exists, False otherwise.
+        """
+        return self._ensure_unique_constraint(node_label, self.hash_property)
+
+    def ensure_id_constraint(self, node_label):
+        """
+        Create the uniqueness constraint (and with it the index) on the UID of a label (once per process).
+
+        Args:
+            node_label (str): Label to constrain.
+
+        Returns:
+            bool: True if the constraint exists, False otherwise.
+        """
+        return self._ensure_unique_constraint(node_label, "id")
+
+    def _ensure_unique_constraint(self, node_label, property_key):
+        if (node_label, property_key) in self._unique_constraints:
+            return True
+
+        self.queries.label(node_label)
+        self.queries.property(property_key)
+        query = f"""
+            CREATE CONSTRAINT {node_label.lower()}_{property_key}_unique IF NOT EXISTS
+            FOR (n:{node_label}) REQUIRE n.{property_key} IS UNIQUE
+        """
+        if self.graph_database.write(query) is False:
+            self.error_handler.warning(f"Could not create {property_key} constraint for label {node_label}")
+            return False
+
+        self._unique_constraints.add((node_label, property_key))
+        return True
+
+    def load_content_hash_filter(self, node_label):
+        """
+        Load all known content hashes of a label into an in-process Bloom filter.
+
+        Once loaded, hash lookups for the label skip the database for hashes that are
+        definitely new. The filter only knows about nodes written by this process after
+        loading, so it should not be used when other processes write to the same label
+        concurrently (the uniqueness constraint still prevents duplicates in that case).
+
+        Args:
+            node_label (str): Label whose hashes should be loaded.
+
+        Returns:
+            BloomFilter: The loaded filter, or None if the hashes could not be loaded completely.
+        """
+        deduplication_config = self.config.get("DEDUPLICATION", {})
+        bloom_filter = BloomFilter(
+            capacity=int(deduplication_config.get("BLOOM_FILTER_CAPACITY", 1000000)),
+            error_rate=float(deduplication_config.get("BLOOM_FILTER_ERROR_RATE", 0.001))
+        )
+
+        query, params = self._content_hashes_query(node_label)
+        try:
+            bloom_filter.update(record["content_hash"] for record in self.graph_database.stream(query, params))
+        except Exception:
+            # A partial filter would report existing hashes as new, so lookups keep going to the database
+            self.error_handler.warning(f"Could not load the content hashes of label {node_label}")
+            return None
+        self.content_hash_filters[node_label] = bloom_filter
+        self.error_handler.debug_info(f"Loaded {len(bloom_filter)} content hashes for label {node_label}")
+        return bloom_filter
+
+    def find_nodes_by_content_hashes(self, hashes, node_label=None, projection=None, batch_size=None):
+        """
+        Find existing nodes for many content hashes with one query per batch.
+
+        Args:
+            hashes (List[str]): Content hashes to look up (see utils.hashing.content_hash).
+            node_label (str, optional): Label of the nodes to search for. Strongly recommended, as the
+                uniqueness constraint (and its index) is defined per label.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+            batch_size (int, optional): Maximum number of hashes per query. Defaults to NEO4J.BATCH_SIZE.
+
+        Returns:
+            dict: Mapping of content hash to node for every hash that exists on the graph. Nodes
+                queued in the write buffer (see write_behind) are included with their UID as ID.
+        """
+        # Nodes that are queued but not committed yet are neither on the graph nor in the Bloom filter
+        nodes = {}
+        if self.write_buffer is not None and node_label:
+            for digest, uid in self.write_buffer.queued_nodes(hashes, node_label).items():
+                nodes[digest] = NodeRecord(uid, labels=[node_label], properties={self.hash_property: digest, "id": uid})
+            hashes = [digest for digest in hashes if digest not in nodes]
+
+        # Skip the round trip for hashes that are definitely new
+        if node_label and self.use_content_hash_filter and node_label not in self.content_hash_filters:
+            self.load_content_hash_filter(node_label)
+        hashes = self._filter_known_hashes(hashes, node_label)
+
+        if not hashes:
+            return nodes
+
+        batch_size = batch_size or self.batch_size
+        query, params = self._nodes_by_content_hashes_query(node_label, projection)
+
+        for index in range(0, len(hashes), batch_size):
+            records = self.graph_database.read(query, {**params, "hashes": hashes[index:index + batch_size]})
+            for record in records or []:
+                nodes[record["content_hash"]] = self._to_node(record["n"])
+        return nodes
+
+    def find_nodes_by_text(self, texts, node_label=None, projection=None):
+        """
+        Find existing nodes by text through their content hash.
+
+        Args:
+            texts (str or List[str]): Text(s) to look up.
+            node_label (str, optional): Label of the nodes to search for.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+
+        Returns:
+            dict: Mapping of content hash to node for every text that exists on the graph.
+        """
+        if not isinstance(texts, list):
+            texts = [texts]
+        return self.find_nodes_by_content_hashes(
+            [content_hash(text) for text in texts],
+            node_label=node_label,
+            projection=projection
+        )
+
+    def backfill_content_hashes(self, node_label, text_node_property="text", batch_size=None):
+        """
+        Compute and store the content hash of nodes that were created before hashing was introduced.
+        Nodes with identical text have to be merged first, otherwise the uniqueness constraint rejects the batch.
+
+        Args:
+            node_label (str): Label of the nodes to update.
+            text_node_property (str, optional): Property holding the text. Defaults to "text".
+            batch_size (int, optional): Maximum number of nodes per write. Defaults to NEO4J.BATCH_SIZE.
+
+        Returns:
+            int: Number of nodes that were updated.
+
+        Raises:
+            Exception: If reading the nodes fails. The batches written until then are kept, so the
+                backfill can simply be run again.
+        """
+        batch_size = batch_size or self.batch_size
+        self.queries.label(node_label)
+        self.queries.property(text_node_property)
+
+        records = self.graph_database.stream(f"""
+            MATCH (n:{node_label})
+            WHERE n.{self.hash_property} IS NULL AND n.{text_node_property} IS NOT NULL
+            RETURN id(n) AS node_id, n.{text_node_property} AS text
+        """)
+
+        query = f"""
+            UNWIND $rows AS row
+            MATCH (n) WHERE id(n) = row.node_id
+            SET n.{self.hash_property} = row.hash
+        """
+        updated = 0
+        batch = []
+
+        def write_batch(batch):
+            if self.graph_database.write(query, {"rows": batch}) is False:
+                return 0
+            self.register_content_hashes([row["hash"] for row in batch], node_label)
+            return len(batch)
+
+        # Hash and write while streaming, so memory stays bounded by the batch size
+        for record in records:
+            batch.append({"node_id": record["node_id"], "hash": content_hash(record["text"])})
+            if len(batch) >= batch_size:
+                updated += write_batch(batch)
+                batch = []
+        if batch:
+            updated += write_batch(batch)
+
+        return updated
+
+    def find_parent_node_by_id(self, node_id, parent_label, projection=None):
         """
         Given a node's ID, follow a specified relationship backwards to retrieve its parent node of a specific label.
 
         Args:
             node_id (int or str): The ID or UID of the node which's parent should be found.
             parent_label (str): The label of the parent node.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
 
         Returns:
             Node: The parent node object if found, otherwise None.
         """
         self.error_handler.debug_info(f"--- Inside function {sys._getframe().f_code.co_name}")
 
-        # If node_id is of integer type, then we assume it's Neo4j's internal ID.
-        # Otherwise, we assume it's a UUID.
-        if isinstance(node_id, int):
-            query = f"""
-            MATCH (parent:{parent_label})-->(chunk) 
-            WHERE id(chunk) = $node_id 
-            RETURN parent
-            """
-        else:
-            query = f"""
-            MATCH (parent:{parent_label})-->(chunk) 
-            WHERE chunk.id = $node_id 
-            RETURN parent
-            """
-        
-        records = self.graph_database.read(query, {"node_id": node_id})
+        query, params = self._parent_node_query(node_id, parent_label, projection)
+        records = self.graph_database.read(query, params)
 
         self.error_handler.debug_info(query)
         
         if records:
-            return records[0]['parent']
+            return self._to_node(records[0]['parent'])
         else:
             return None
 
 
-    def find_child_nodes(self, parent_id, node_label=None, sequence_label=None):
+    def find_child_nodes(self, parent_id, node_label=None, sequence_label=None, offset=0, limit=None, projection=None):
         """
         Find all child nodes of a parent node.
 
         Args:
             parent_id (int or str): The ID or UID of the parent node.
             node_label (str, optional): The label of the child nodes to search for. If not provided, all nodes will be searched.
-            sequence_label (str, optional): The label of the sequence nodes to search for. If not provided, only the first child node will be returned.
+            sequence_label (str, optional): The label of the sequence relationship to follow. If provided, each direct
+                child that starts a sequence is returned followed by its whole chain, in order, using a single query.
+                If not provided, only the direct child nodes will be returned.
+            offset (int, optional): Number of nodes to skip from the start of the ordered chain. Defaults to 0.
+            limit (int, optional): Maximum number of nodes to return. Defaults to None (no limit).
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
 
         Returns:
             List: List of child nodes.
         """
         
-        # Base match for the parent and direct child
-        if isinstance(parent_id, int):
-            base_query = f"""
-            MATCH (parent)-->(first_child)
-            WHERE id(parent) = $parent_id 
-            """
-        else:
-            base_query = f"""
-            MATCH (parent)-->(first_child)
-            WHERE parent.id = $parent_id 
-            """
-        
-        # Filter by the node_label if provided
-        if node_label:
-            base_query = base_query.replace("-->(first_child)", f"-->(first_child:{node_label})")
-
-        children = []
-
-        # Fetch the direct children first
-        direct_children_query = base_query + "RETURN first_child"
-        records = self.graph_database.read(direct_children_query, {"parent_id": parent_id})
-        
-        for record in records:
-            children.append(record['first_child'])
-            
-            # If a sequence_label is provided, traverse through the sequence for each child
-            if sequence_label:
-                sequence_query = f"""
-                MATCH (first_child)-[:{sequence_label}*]->(next_child)
-                WHERE id(first_child) = {record['first_child'].id}
-                RETURN next_child
-                """
-                sequence_records = self.graph_database.read(sequence_query)
-                for seq_record in sequence_records:
-                    children.append(seq_record['next_child'])
-
-        return children
+        query, params = self._child_nodes_query(parent_id, node_label, sequence_label, offset, limit, projection)
+        records = self.graph_database.read(query, params)
+        if not records:
+            return []
 
+        return [self._to_node(record['child']) for record in records]
 
 
+    def iter_child_nodes(self, parent_id, node_label=None, sequence_label=None, offset=0, limit=None, projection=None, fetch_size=None):
+        """
+        Generator variant of find_child_nodes that yields the (ordered) children as they arrive.
+        """
+        query, params = self._child_nodes_query(parent_id, node_label, sequence_label, offset, limit, projection)
+        for record in self.graph_database.stream(query, params, fetch_size=fetch_size):
+            yield self._to_node(record['child'])
 
-    def find_child_nodes_by_properties(self, properties, parent_id=None, node_label=None):
+    def find_child_nodes_by_properties(self, properties, parent_id=None, node_label=None, projection=None):
         """
         Find nodes based on multiple properties and an optional label.
 
@@ -224,42 +1351,32 @@ class Graph:
             properties (dict): Dictionary containing key-value pairs of properties.
             parent_id (Node, optional): The parent node to limit the search to.
             node_label (str, optional): Label of the nodes to search for. If not provided, all nodes will be searched.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
 
         Returns:
             List: List of nodes that match the label (if provided) and properties.
         """
         
-        conditions = [f"child.{property} = ${property}" for property in properties.keys()]
-        query_condition = " AND ".join(conditions)
-
-        # If a parent_id is provided, we should limit our search to children of that specific parent
-        if parent_id:
-            # If parent_id is of integer type, then we assume it's Neo4j's internal ID.
-            # Otherwise, we assume it's a UUID.
-            if isinstance(parent_id, int):
-                parent_condition = f"MATCH (parent)-->(child) WHERE id(parent) = $parent_id"
-            else:
-                parent_condition = f"MATCH (parent)-->(child) WHERE parent.id = $parent_id"
-        else:
-            parent_condition = "MATCH (child)"
-
-        # Adding optional node_label
-        if node_label:
-            parent_condition = parent_condition.replace("(child)", f"(child:{node_label})")
-
-        query = f"{parent_condition} WHERE {query_condition} RETURN child"
+        query, params = self._child_nodes_by_properties_query(properties, parent_id, node_label, projection)
 
         try:
-            records = self.graph_database.read(query, {**properties, "parent_id": parent_id})
-            return [record['child'] for record in records]
+            records = self.graph_database.read(query, params)
+            return [self._to_node(record['child']) for record in records]
         except Exception as e:
             self.error_handler.exception(exc_info=sys.exc_info())
             return []
 
 
+    def iter_child_nodes_by_properties(self, properties, parent_id=None, node_label=None, projection=None, fetch_size=None):
+        """
+        Generator variant of find_child_nodes_by_properties that yields nodes as they arrive.
+        """
+        query, params = self._child_nodes_by_properties_query(properties, parent_id, node_label, projection)
+        for record in self.graph_database.stream(query, params, fetch_size=fetch_size):
+            yield self._to_node(record['child'])
+
     def find_edge_by_id(self, edge_id):
-        query = "MATCH ()-[r]-() WHERE id(r) = $edge_id RETURN r"
-        params = {"edge_id": edge_id}
+        query, params = self._edge_by_id_query(edge_id)
         records = self.graph_database.read(query, params)
         if len(records) > 0:
             return records[0]['r']
@@ -267,28 +1384,21 @@ class Graph:
             return None
         
     def find_edges_by_property(self, property, value, origin_id=None, target_id=None):
-        # Determine the type of origin_id and target_id to form the correct query condition
-        if origin_id is not None:
-            origin_condition = f"id(start) = {origin_id}" if isinstance(origin_id, int) else f"start.id = '{origin_id}'"
-        else:
-            origin_condition = ""
-
-        if target_id is not None:
-            target_condition = f"id(end) = {target_id}" if isinstance(target_id, int) else f"end.id = '{target_id}'"
-        else:
-            target_condition = ""
+        """
+        Find edges by the value of one of their properties and optional origin or target node ID.
 
-        # Construct the query based on the provided conditions
-        conditions = [f"r.{property} = '{value}'"]
-        if origin_condition:
-            conditions.append(origin_condition)
-        if target_condition:
-            conditions.append(target_condition)
+        Args:
+            property (str): Name of the edge property.
+            value: Value the property must have. Compared with its type, e.g. 0.9 does not match "0.9".
+            origin_id (int or str, optional): ID or UID of the origin node.
+            target_id (int or str, optional): ID or UID of the target node.
 
-        query = f"MATCH (start)-[r]->(end) WHERE {' AND '.join(conditions)} RETURN r"
-        
-        records = self.graph_database.read(query)
-        return [record['r'] for record in records]
+        Returns:
+            List: List of edges that match the criteria.
+        """
+        query, params = self._edges_by_property_query(property, value, origin_id, target_id)
+        records = self.graph_database.read(query, params)
+        return [record['r'] for record in records or []]
     
     def find_edges_by_relationship(self, relationship_name, origin_id=None, target_id=None):
         """
@@ -303,21 +1413,17 @@ class Graph:
             List: List of edges that match the criteria.
         """
         
-        # Determine if the IDs are internal Neo4j IDs or uids
-        origin_id_key = "id(start)" if isinstance(origin_id, int) else "start.id"
-        target_id_key = "id(end)" if isinstance(target_id, int) else "end.id"
-
-        if origin_id is not None and target_id is not None:
-            query = f"MATCH (start)-[r:{relationship_name}]->(end) WHERE {origin_id_key} = $origin_id AND {target_id_key} = $target_id RETURN r"
-        elif origin_id is not None:
-            query = f"MATCH (start)-[r:{relationship_name}]->(end) WHERE {origin_id_key} = $origin_id RETURN r"
-        elif target_id is not None:
-            query = f"MATCH (start)-[r:{relationship_name}]->(end) WHERE {target_id_key} = $target_id RETURN r"
-        else:
-            query = f"MATCH (start)-[r:{relationship_name}]->(end) RETURN r"
+        query, params = self._edges_by_relationship_query(relationship_name, origin_id, target_id)
+        records = self.graph_database.read(query, params)
+        return [record['r'] for record in records or []]
 
-        records = self.graph_database.read(query, {"origin_id": origin_id, "target_id": target_id})
-        return [record['r'] for record in records]
+    def iter_edges_by_relationship(self, relationship_name, origin_id=None, target_id=None, fetch_size=None):
+        """
+        Generator variant of find_edges_by_relationship that yields edges as they arrive.
+        """
+        query, params = self._edges_by_relationship_query(relationship_name, origin_id, target_id)
+        for record in self.graph_database.stream(query, params, fetch_size=fetch_size):
+            yield record['r']
 
     def check_if_node_exists(self, node_id):
         node = self.find_node_by_id(node_id)
@@ -368,51 +1474,65 @@ class Graph:
             self.error_handler.warning("No valid target nodes provided. Skipping.")
             return False
 
-        for origin in origins:
-            # Go through all target nodes
-            for target in targets:
-                # Determine if the IDs are internal Neo4j IDs or uids for each target
-                origin_id_key = "id(start)" if isinstance(origin, int) else "start.id"
-                target_id_key = "id(end)" if isinstance(target, int) else "end.id"
-
-                # Check if a link already exists between the origin node and the target node
-                edges_origin_to_target = self.find_edges_by_relationship(relationship_name, origin_id=origin, target_id=target)
-                edges_target_to_origin = self.find_edges_by_relationship(relationship_name, origin_id=target, target_id=origin) if bidirectional else []
-
-                if len(edges_origin_to_target) > 0 and (not bidirectional or len(edges_target_to_origin) > 0):
-                    self.error_handler.warning(f"Link between {origin} and {target} already exists")
-                    if not force:
-                        continue  # Skip the current iteration and move to the next target
-                else:
-                    self.error_handler.debug_info(f"Linking {origin} and {target}")
-
-                # Link target nodes to origin node
-                query = f"""
-                        MATCH (start) WHERE {origin_id_key} = $start_id
-                        MATCH (end) WHERE {target_id_key} = $end_id
-                        MERGE (start)-[r1:{relationship_name}]->(end)
-                        SET r1 += $edge_values
-                """
-                
-                # If bidirectional is True, link the target node to the origin node as well
-                if bidirectional:
-                    query += f"""
-                            MERGE (start)<-[r2:{relationship_name}]-(end)
-                            SET r2 += $edge_values
-                    """
-                
-                try:
-                    response = self.graph_database.write(query, {
-                        "start_id": origin, 
-                        "end_id": target, 
-                        "edge_values": edge_values
-                    })
-                except Exception as e:
-                    self.error_handler.generic_error(f"Error linking nodes {origin} and {target}", e)
-                    return False
-                
+        pairs = [(origin, target) for origin in origins for target in targets]
+        stats = self.link_nodes_bulk(
+            pairs,
+            relationship_name=relationship_name,
+            edge_values=edge_values,
+            force=force,
+            bidirectional=bidirectional
+        )
+
         # Returns True if all nodes were linked successfully.
-        return True
+        return stats["failed"] == 0
+
+    def link_nodes_bulk(
+            self,
+            pairs,
+            relationship_name="LINKS_TO",
+            edge_values=None,
+            force=False,
+            bidirectional=False,
+            batch_size=None
+        ):
+        """
+        Link many origin/target pairs with a single UNWIND query per batch.
+
+        The existence check, MERGE, property SET and the reverse edge (if bidirectional)
+        all run server-side, so each batch costs one round trip instead of two or three
+        per pair.
+
+        Args:
+            pairs (List[tuple]): (origin, target) or (origin, target, edge_values) tuples of IDs or UIDs.
+                Per-pair edge_values are merged over the shared edge_values.
+            relationship_name (str, optional): Type of relationship. Defaults to "LINKS_TO".
+            edge_values (dict, optional): Properties to assign to every relationship. Defaults to None.
+            force (bool, optional): If True, overwrite the properties of relationships that already exist. Defaults to False.
+            bidirectional (bool, optional): If True, create a bidirectional relationship. Defaults to False.
+            batch_size (int, optional): Maximum number of pairs per query. Defaults to NEO4J.BATCH_SIZE.
+
+        Returns:
+            dict: Number of pairs that were "created", "updated" (existing edges rewritten because of force),
+                "skipped" (edge already existed, self-link or missing node) and "failed".
+                Inside write_behind() the pairs are only queued and reported as "queued".
+        """
+        stats = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+        if self.write_buffer is not None:
+            self.write_buffer.add_links(pairs, relationship_name, edge_values, force, bidirectional)
+            stats["queued"] = len(pairs)
+            return stats
+
+        batches = self._link_batches(pairs, relationship_name, edge_values, force, bidirectional, batch_size, stats)
+
+        for query, params, batch_length in batches:
+            records = self.graph_database.write(query, params)
+            self._count_links(stats, records, batch_length, relationship_name)
+
+        self.error_handler.debug_info(
+            f"Linked {relationship_name}: {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['skipped']} skipped, {stats['failed']} failed"
+        )
+        return stats
 
 
     def link_nodes_sequentially(
@@ -448,30 +1568,309 @@ class Graph:
             origins = [targets[0]]
             targets = targets[1:]
 
-        for origin in origins:
-            for target in targets:
-                success = self.link_nodes(
-                    origins=[origin], 
-                    targets=[target], 
-                    relationship_name=relationship_name, 
-                    edge_values=edge_values, 
-                    force=force, 
-                    bidirectional=bidirectional
-                )
-                
-                if not success:
-                    self.error_handler.warning(f"Failed to link node {origin} to node {target}.")
-                origin = target
+        # Collect the chain of pairs and send them in one bulk operation
+        pairs = self._sequence_pairs(targets, origins, close_loop)
+        stats = self.link_nodes_bulk(
+            pairs,
+            relationship_name=relationship_name,
+            edge_values=edge_values,
+            force=force,
+            bidirectional=bidirectional
+        )
 
-            # Close the loop if required
-            if close_loop:
-                success = self.link_nodes([targets[-1]], [origins[0]], relationship_name, edge_values, force, bidirectional)
-                if not success:
-                    self.error_handler.warning(f"Failed to close the loop between {targets[-1]} and {origins[0]}.")
-                    return False
+        if stats["failed"]:
+            self.error_handler.warning(f"Failed to link {stats['failed']} of {len(pairs)} node pairs sequentially.")
+            return False
 
         return True
     
+    def find_similar_nodes(self, node_id, k=None, index_name=None, similarity_threshold=None, projection=None):
+        """
+        Find the nearest neighbors of a node by querying the vector index with its stored embedding.
+
+        No embedding is computed, so this costs one query and no embedding API call.
+
+        Args:
+            node_id (int or str): ID or UID of the node.
+            k (int, optional): Maximum number of neighbors. Defaults to VECTOR_INDEX.NEAREST_NEIGHBORS.
+            index_name (str, optional): Name of the vector index. Defaults to the node's first label.
+            similarity_threshold (float, optional): Only return neighbors scoring above this. Defaults to 0.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+                Pass [] to only return ids and labels.
+
+        Returns:
+            List[tuple]: (node, score) tuples, best first, without the node itself. Empty if the node
+                does not exist or has no embedding.
+        """
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+
+        query, params = self._similar_nodes_query(node_id, k, index_name, similarity_threshold or 0, projection)
+        try:
+            records = self.graph_database.read(query, params)
+        except Exception as e:
+            self.error_handler.warning(f"Error finding similar nodes for node {node_id}: {e}")
+            self.error_handler.exception(sys.exc_info())
+            return []
+        return [(self._to_node(record["node"]), record["score"]) for record in records or []]
+
+    def find_similar_nodes_by_vector(self, vector, k=None, index_name=None, similarity_threshold=None, projection=None):
+        """
+        Find the nearest neighbors of an embedding vector.
+
+        Args:
+            vector (List[float]): Query vector.
+            k (int, optional): Maximum number of neighbors. Defaults to VECTOR_INDEX.NEAREST_NEIGHBORS.
+            index_name (str): Name of the vector index.
+            similarity_threshold (float, optional): Only return neighbors scoring above this. Defaults to 0.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+
+        Returns:
+            List[tuple]: (node, score) tuples, best first.
+        """
+        if not index_name:
+            raise ValueError("index_name is required to search by vector")
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+
+        query, params = self._similar_nodes_by_vector_query(vector, k, index_name, similarity_threshold or 0, projection)
+        try:
+            records = self.graph_database.read(query, params)
+        except Exception as e:
+            self.error_handler.warning(f"Error performing k-NN search on index {index_name}: {e}")
+            self.error_handler.exception(sys.exc_info())
+            return []
+        return [(self._to_node(record["node"]), record["score"]) for record in records or []]
+
+    def find_nodes_by_fulltext(self, text, node_label, limit=None, projection=None, with_embeddings=False):
+        """
+        Find the nodes of a label whose text, title or topics match a text in the label's full-text index.
+
+        The text is escaped, so it matches as plain terms rather than Lucene syntax. No embedding is computed.
+
+        Args:
+            text (str): Query text.
+            node_label (str): Label of the nodes.
+            limit (int, optional): Maximum number of nodes. Defaults to HYBRID_SEARCH.CANDIDATES.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+            with_embeddings (bool, optional): If True, also return each node's stored embedding. Defaults to False.
+
+        Returns:
+            List[tuple]: (node, score) tuples, or (node, score, embedding) with_embeddings, best lexical match first.
+        """
+        if not str(text).strip():
+            return []
+        if limit is None:
+            limit = self.config.get("HYBRID_SEARCH", {}).get("CANDIDATES", 50)
+
+        query, params = self._fulltext_nodes_query(text, node_label, limit, projection, with_embeddings)
+        try:
+            records = self.graph_database.read(query, params)
+        except Exception as e:
+            self.error_handler.warning(f"Error performing full-text search on {node_label}: {e}")
+            self.error_handler.exception(sys.exc_info())
+            return []
+        if with_embeddings:
+            return [(self._to_node(record["node"]), record["score"], record["embedding"]) for record in records or []]
+        return [(self._to_node(record["node"]), record["score"]) for record in records or []]
+
+    def find_similar_nodes_in_scope(
+            self,
+            parent_id,
+            node_label,
+            node_id=None,
+            vector=None,
+            k=None,
+            index_name=None,
+            similarity_threshold=None,
+            relationship_name="CONTAINS",
+            max_depth=None,
+            projection=None
+        ):
+        """
+        Find the nearest neighbors of a node or vector among the nodes in a parent's subtree.
+
+        Unlike filtering a global top-k, this returns up to k in-scope neighbors. Scopes of up to
+        VECTOR_INDEX.EXACT_SCOPE_SIZE nodes are scored exactly; larger ones are searched in the
+        vector index with an over-fetch sized to the scope's share of the label, which grows
+        when too few candidates fall into the scope (see GraphQueries._scope_candidates), but not
+        when the threshold cut the results (see GraphQueries._scoped_results).
+
+        Args:
+            parent_id (int or str): ID or UID of the parent, e.g. a Document.
+            node_label (str): Label of the nodes to search, e.g. "Section".
+            node_id (int or str, optional): ID or UID of the node whose stored embedding is the query.
+            vector (List[float], optional): Query vector, if no node_id is given.
+            k (int, optional): Maximum number of neighbors. Defaults to VECTOR_INDEX.NEAREST_NEIGHBORS.
+            index_name (str, optional): Name of the vector index. Defaults to node_label.
+            similarity_threshold (float, optional): Only return neighbors scoring above this. Defaults to 0.
+            relationship_name (str, optional): Relationship that spans the subtree. Defaults to "CONTAINS".
+            max_depth (int, optional): Maximum depth below the parent. Defaults to None (the whole subtree).
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+
+        Returns:
+            List[tuple]: (node, score) tuples, best first, without the query node itself.
+        """
+        if node_id is None and vector is None:
+            raise ValueError("node_id or vector is required for a scoped search")
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+
+        query, params = self._scope_size_query(parent_id, node_label, relationship_name, max_depth)
+        try:
+            records = self.graph_database.read(query, params)
+        except Exception as e:
+            self.error_handler.warning(f"Error measuring the scope of parent {parent_id}: {e}")
+            self.error_handler.exception(sys.exc_info())
+            return []
+        if not records or not records[0]["scope_size"]:
+            return []
+        scope_size, label_size = records[0]["scope_size"], records[0]["label_size"]
+
+        candidates = self._scope_candidates(k, scope_size, label_size)
+        while True:
+            self.error_handler.debug_info(f"Searching {scope_size} {node_label} nodes of parent {parent_id} ({candidates or 'exact'} candidates)")
+            query, params = self._scoped_similar_nodes_query(
+                parent_id, node_label, k, node_id, vector, index_name, similarity_threshold or 0,
+                relationship_name, max_depth, candidates, projection
+            )
+            try:
+                records = self.graph_database.read(query, params)
+            except Exception as e:
+                self.error_handler.warning(f"Error performing scoped k-NN search in parent {parent_id}: {e}")
+                self.error_handler.exception(sys.exc_info())
+                return []
+            results, done = self._scoped_results(records or [], k, candidates, label_size, similarity_threshold or 0)
+            if done:
+                return results
+            candidates = self._scope_candidates(k, scope_size, label_size, previous=candidates)
+
+    def vector_index_exists(self, index_name):
+        """
+        Return True if a vector index with this name exists. Found indexes are remembered.
+        """
+        if index_name in self._vector_indexes:
+            return True
+        records = self.graph_database.read(
+            "SHOW INDEXES YIELD name, type WHERE type = 'VECTOR' AND name = $name RETURN name",
+            {"name": index_name}
+        )
+        if not records:
+            return False
+        self._vector_indexes.add(index_name)
+        return True
+
+    def _index_neighbors(self, rows, node_label, k, similarity_threshold, index_name=None):
+        """
+        Find the nearest neighbors of new rows in the vector index, searched with the rows' vectors.
+
+        Returns:
+            List[List[tuple]]: (node ID, score) tuples per row, or None if the index does not exist.
+        """
+        index_name = index_name or node_label
+        if not self.vector_index_exists(index_name):
+            self.error_handler.warning(f"Vector index {index_name} does not exist, new {node_label} nodes are only linked to each other")
+            return None
+        matches = self.find_similar_nodes_by_vectors(
+            [row["embedding"] for row in rows],
+            k=k + 1,
+            index_name=index_name,
+            similarity_threshold=similarity_threshold,
+            projection=["id"]
+        )
+        return [[(node.get("id", node.id), score) for node, score in row_matches] for row_matches in matches]
+
+    def find_similar_nodes_by_vectors(self, vectors, k=None, index_name=None, similarity_threshold=None, projection=None):
+        """
+        Find the nearest neighbors of many embedding vectors with one UNWIND query per batch.
+
+        Args:
+            vectors (List[List[float]]): Query vectors.
+            k (int, optional): Maximum number of neighbors per vector. Defaults to VECTOR_INDEX.NEAREST_NEIGHBORS.
+            index_name (str): Name of the vector index.
+            similarity_threshold (float, optional): Only return neighbors scoring above this. Defaults to 0.
+            projection (list, optional): Properties to return. Defaults to all properties except the embedding.
+
+        Returns:
+            List[List[tuple]]: (node, score) tuples per vector, best first, in the order of the vectors.
+        """
+        if not index_name:
+            raise ValueError("index_name is required to search by vector")
+        if k is None:
+            k = self.config["VECTOR_INDEX"].get("NEAREST_NEIGHBORS", 10)
+
+        results = [[] for _ in vectors]
+        for query, params, start in self._similar_nodes_by_vectors_batches(vectors, k, index_name, similarity_threshold or 0, projection):
+            try:
+                records = self.graph_database.read(query, params)
+            except Exception as e:
+                self.error_handler.warning(f"Error performing k-NN search on index {index_name}: {e}")
+                self.error_handler.exception(sys.exc_info())
+                continue
+            for record in records or []:
+                results[start + record["position"]] = [(self._to_node(match["node"]), match["score"]) for match in record["matches"]]
+        return results
+
+    def _similar_node_pairs(self, origin_node, similarity_threshold, node_label=None, index_name=None, max_nodes=None, parent_id=None):
+        # (origin, neighbor, {"similarity": score}) pairs for the neighbors of a node that should be linked
+        if node_label and node_label not in origin_node.labels:
+            self.error_handler.warning(f"Skipping node {origin_node.id} because it is not of type {node_label}")
+            return []
+
+        self.error_handler.debug_info(f"Finding neighbors for node {origin_node.id}")
+        if parent_id is not None:
+            neighbors = self.find_similar_nodes_in_scope(
+                parent_id,
+                node_label or index_name or min(origin_node.labels),
+                node_id=origin_node.id,
+                k=max_nodes,
+                index_name=index_name,
+                similarity_threshold=similarity_threshold,
+                projection=[]
+            )
+        else:
+            neighbors = self.find_similar_nodes(
+                origin_node.id,
+                k=max_nodes,
+                index_name=index_name or node_label,
+                similarity_threshold=similarity_threshold,
+                projection=[]
+            )
+
+        pairs = []
+        for neighbor_node, score in neighbors:
+            self.error_handler.debug_info(f"Neighbor: {neighbor_node.id} Score: {score}")
+
+            # Skip if similarity is >= 1 (identical content)
+            if score >= 1:
+                self.error_handler.warning(f"Skipping node {neighbor_node.id} because it is identical to the origin node")
+                continue
+
+            # Skip if the neighbor node is not of the specified type
+            if node_label and node_label not in neighbor_node.labels:
+                self.error_handler.warning(f"Skipping link between {origin_node.id} and {neighbor_node.id} because {neighbor_node.id} is not of type {node_label}")
+                continue
+
+            self.error_handler.debug_info(f"Linking node {origin_node.id} to {neighbor_node.id} with score {score}")
+            pairs.append((origin_node.id, neighbor_node.id, {"similarity": score}))
+        return pairs
+
+    def _link_similar_node_pairs(self, pairs, bidirectional=False, force=False):
+        if not pairs:
+            return True
+        try:
+            stats = self.link_nodes_bulk(
+                pairs,
+                relationship_name="SIMILAR_TO",
+                edge_values={},
+                bidirectional=bidirectional,
+                force=force
+            )
+        except Exception as e:
+            self.error_handler.debug_info(f"Error linking {len(pairs)} similar nodes: {e}")
+            return False
+        return not stats["failed"]
+
     def find_and_link_similar_nodes_by_id(
         self,
         origin_node_id, 
@@ -480,113 +1879,44 @@ class Graph:
         index_name=None,
         max_nodes=None,
         bidirectional=False,
-        force=False
+        force=False,
+        limit_to_children_of_parent_id=None
     ):
         """
-        Find and link nodes that are similar to the provided node based on its text content.
+        Find and link nodes that are similar to the provided node based on its stored embedding.
+
+        The neighbors come straight from the vector index (see find_similar_nodes) and are
+        linked with one bulk write, so no embedding is computed and no neighbor is looked up.
 
         Args:
             origin_node_id (str): UID of the origin node whose similar nodes are to be found and linked.
             similarity_threshold (float, optional): Threshold for similarity score. Defaults to value from configuration.
             node_label (str, optional): Label of the nodes to search for. If not provided, all nodes will be searched.
             index_name (str, optional): Name of the vector index to use. If not provided, the node_label will be used.
-            limit_to_children_of_parent_id (int, optional): ID of the parent node to limit the search to. Defaults to None.
-            # TODO: Implement scope to limit search to parent nodes - rethink node_label vs. scope logic
-            max_nodes (int, optional): Maximum number of nodes to link. If not provided, links all nodes above the threshold.
+            max_nodes (int, optional): Maximum number of nodes to link. Defaults to VECTOR_INDEX.NEAREST_NEIGHBORS.
             bidirectional (bool, optional): If True, create a bidirectional relationship. Defaults to False.
             force (bool, optional): If True, forcefully create the relationship even if one exists. Defaults to False.
+            limit_to_children_of_parent_id (int or str, optional): ID of a parent node; only nodes in its
+                CONTAINS subtree are linked (see find_similar_nodes_in_scope). Defaults to None.
 
         Returns:
             bool: True if the linking succeeds for all neighbors above the threshold, False otherwise.
         """
-
-        # Initialize the vector store for the correct label
         self.error_handler.debug_info(f"--- Inside function {sys._getframe().f_code.co_name}")
-        vector_store = VectorStore(index_name=index_name, node_label=node_label)
-        
         self.error_handler.debug_info(f"Finding similar nodes for node {origin_node_id}")
 
         # If no similarity_threshold is passed, fetch it from the configuration
         if similarity_threshold is None:
             similarity_threshold = self.config["VECTOR_INDEX"]["SIMILARITY_THRESHOLD"]
-        
-        # Fetch the node
-        node = self.find_node_by_id(origin_node_id)
-        origin_node_label = list(node.labels)[0]
 
-        if not node:
+        # Fetch the node, so that both origin and target nodes use the same ID format
+        node = self.find_node_by_id(origin_node_id, projection=[])
+        if node is None:
             self.error_handler.warning(f"Node {origin_node_id} not found.")
             return False
-        
-        # Overwrite the origin_node_id with the actual node id from the graph so 
-        # that both origin and target nodes use the same format
-        origin_node_id = node.id
-        text = node["text"]
-        
-        # Fetch similar nodes from VectorStore based on text similarity
-        self.error_handler.debug_info(f"Finding neighbors for node {origin_node_id}")
-        self.error_handler.success(f"Performing similarity search for node {origin_node_id}")
-        neighbors = vector_store.similarity_search_by_text(
-            text, 
-            similarity_threshold=similarity_threshold,
-            index_name=index_name,
-            node_label=node_label
-        )
-        
-        # Sort neighbors by similarity score in descending order
-        sorted_neighbors = sorted(neighbors, key=lambda x: x[1], reverse=True)
-        
-        # If max_nodes is provided, limit the neighbors list
-        if max_nodes:
-            sorted_neighbors = sorted_neighbors[:max_nodes]
-        
-        # Flag to track if any linking operation failed
-        linking_succeeded = True
-        
-        for neighbor, score in sorted_neighbors:
-            # Find the node on the graph
-            neighbor_node = self.find_nodes_by_properties(
-                {
-                    "text": neighbor.page_content,
-                },
-                label=node_label,
-            )[0]
-            neighbor_node_label = list(neighbor_node.labels)[0]
-            
-            self.error_handler.debug_info(f"Neighbor: {neighbor_node.id} Score: {score}")
-            self.error_handler.debug_info(f"Neighbor node label: {neighbor_node_label}")
-
-            # Skip if the neighbor is the same as the origin or if similarity is >= 1
-            if neighbor_node.id == origin_node_id or score >= 1:
-                self.error_handler.warning(f"Skipping node {neighbor_node.id} because it is the same as the origin node")
-                continue
 
-            # Skip if relationship_name is specified and the neighbor node is not of the specified type
-            self.error_handler.debug_info(f"Origin node label: {origin_node_label}")
-
-            # Check if either the origin node or the neighbor node does not match the specified node_label
-            if node_label:
-                if origin_node_label != node_label or neighbor_node_label != node_label:
-                    self.error_handler.warning(f"Skipping link between {origin_node_id} and {neighbor_node.id} because either node is not of type {node_label}")
-                    continue
-
-            # Link nodes if score is above threshold
-            if score > similarity_threshold:
-                self.error_handler.debug_info(f"Linking node {origin_node_id} to {neighbor_node.id} with score {score}")
-                try:
-                    self.link_nodes(
-                        origins=origin_node_id, 
-                        targets=[neighbor_node.id], 
-                        relationship_name="SIMILAR_TO", 
-                        edge_values={"similarity": score}, 
-                        bidirectional=bidirectional,
-                        force=force
-                    )
-                except Exception as e:
-                    self.error_handler.debug_info(f"Error linking node {origin_node_id} to {neighbor_node.id}: {e}")
-                    linking_succeeded = False
-
-        return linking_succeeded
+        pairs = self._similar_node_pairs(node, float(similarity_threshold), node_label, index_name, max_nodes, limit_to_children_of_parent_id)
+        return self._link_similar_node_pairs(pairs, bidirectional=bidirectional, force=force)
     
     def find_and_link_similar_nodes_by_text(
             self, 
@@ -598,22 +1928,21 @@ class Graph:
             bidirectional=False,
             force=False
         ):
+        """
+        Find the node with exactly this text (through its content hash) and link it to its similar nodes.
+
+        Returns:
+            bool: True if the linking succeeds, False if no node has the text or linking fails.
+        """
         # Find node by text
-        try:
-            origin_node = self.find_nodes_by_properties(
-                {
-                    "text": text,
-                },
-                label=node_label,
-            )[0]
-        except IndexError:
-            origin_node = None
-        
-        if not origin_node:
+        origin_nodes = self.find_nodes_by_text(text, node_label=node_label, projection=[])
+        origin_node = next(iter(origin_nodes.values()), None)
+
+        if origin_node is None:
             self.error_handler.warning(f"No nodes found for text {text}")
             return False
         
-        self.find_and_link_similar_nodes_by_id(
+        return self.find_and_link_similar_nodes_by_id(
             origin_node.id,
             index_name=index_name,
             node_label=node_label,
@@ -633,54 +1962,113 @@ class Graph:
             bidirectional=False,
             force=False
         ):
+        """
+        Find the nodes most similar to a text and link each of them to its similar nodes.
+
+        The vector search returns the origin nodes' IDs, and all links are written with one
+        bulk write, so besides the search this costs one neighbor query per origin node.
+        A list of texts is searched with one batched similarity_search_nodes_many call.
+
+        Returns:
+            bool: True if the linking succeeds, False if no origin node is found or linking fails.
+        """
         self.error_handler.debug_info(f"--- Inside function {sys._getframe().f_code.co_name}")
         # Initialize the vector store for the correct label
-        vector_store = VectorStore(index_name=index_name, node_label=node_label)
+        vector_store = self.get_vector_store(index_name=index_name, node_label=node_label)
 
-        # Find origin documents
-        try:
-            self.error_handler.debug_info(f"Label scope: {node_label} Index name: {index_name}")
-            origin_documents = vector_store.similarity_search_by_text(
+        if similarity_threshold is None:
+            similarity_threshold = self.config["VECTOR_INDEX"]["SIMILARITY_THRESHOLD"]
+        similarity_threshold = float(similarity_threshold)
+
+        # Find origin nodes
+        self.error_handler.debug_info(f"Label scope: {node_label} Index name: {index_name}")
+        if isinstance(text, (list, tuple)):
+            results = vector_store.similarity_search_nodes_many(
+                text,
+                similarity_threshold=similarity_threshold,
+                k=max_nodes,
+                index_name=index_name,
+                node_label=node_label
+            )
+            # Texts can share origin nodes, which are linked once
+            origin_nodes = list({node.id: (node, score) for neighbors in results for node, score in neighbors}.values())
+        else:
+            origin_nodes = vector_store.similarity_search_nodes_by_text(
                 text, 
                 similarity_threshold=similarity_threshold,
                 k=max_nodes,
                 index_name=index_name,
                 node_label=node_label
             )
-            self.error_handler.inspect_object(origin_documents)
-        except IndexError:
-            origin_documents = None
-
-        # Find origin node on graph
-        origin_nodes = None
-        if origin_documents:
-            for origin_document, score in origin_documents:
-                try:
-                    origin_nodes = self.find_nodes_by_properties(
-                        {
-                            "text": origin_document.page_content,
-                        },
-                        label=node_label,
-                    )
-                except IndexError:
-                    self.error_handler.warning(f"No origin nodes found for text {text}")
-                    return False
-            
-            if origin_nodes:
-                for origin_node in origin_nodes:
-                    self.error_handler.debug_info(f"Linking origin node {origin_node.id} to similar nodes")
-
-                    # Link origin node to similar nodes
-                    self.find_and_link_similar_nodes_by_id(
-                        origin_node.id,
-                        similarity_threshold=similarity_threshold,
-                        node_label=node_label,
-                        index_name=index_name,
-                        max_nodes=max_nodes,
-                        bidirectional=bidirectional,
-                        force=force
-                    )
+        if not origin_nodes:
+            self.error_handler.warning(f"No origin nodes found for text {text}")
+            return False
+
+        pairs = []
+        for origin_node, score in origin_nodes:
+            self.error_handler.debug_info(f"Linking origin node {origin_node.id} to similar nodes")
+            pairs.extend(self._similar_node_pairs(origin_node, similarity_threshold, node_label, index_name, max_nodes))
+        return self._link_similar_node_pairs(pairs, bidirectional=bidirectional, force=force)
+
+
+    def build_similarity_graph(
+            self,
+            node_label,
+            k=None,
+            similarity_threshold=None,
+            bidirectional=None,
+            force=False,
+            workers=None,
+            resume=True
+        ):
+        """
+        Link every node of a label to its k most similar nodes of the same label in one batch job.
+
+        Much faster than calling find_and_link_similar_nodes_by_id per node: the vectors are
+        streamed out once, the neighbors are computed locally with numpy across a process pool
+        and the links are written in bulk. See database.similarity_graph.SimilarityGraphBuilder.
+
+        Args:
+            node_label (str): Label of the nodes to link.
+            k (int, optional): Neighbors per node. Defaults to SIMILARITY_GRAPH.K.
+            similarity_threshold (float, optional): Only link neighbors scoring above this. Defaults to SIMILARITY_GRAPH.SIMILARITY_THRESHOLD.
+            bidirectional (bool, optional): If True, create bidirectional relationships. Defaults to SIMILARITY_GRAPH.BIDIRECTIONAL.
+            force (bool, optional): If True, overwrite the properties of existing relationships. Defaults to False.
+            workers (int, optional): Number of processes. Defaults to SIMILARITY_GRAPH.WORKERS.
+            resume (bool, optional): If True, continue an interrupted run from its checkpoint. Defaults to True.
+
+        Returns:
+            dict: Job and link statistics.
+        """
+        return SimilarityGraphBuilder(
+            self,
+            node_label,
+            k=k,
+            similarity_threshold=similarity_threshold,
+            bidirectional=bidirectional,
+            force=force,
+            workers=workers,
+            resume=resume
+        ).run()
+
+    def export_vector_shards(self, node_label, directory=None, shard_size=None, workers=None):
+        """
+        Export the embeddings of a label to memory-mapped shards for exact batch kNN scans.
 
+        For analytics jobs (dedup sweeps, threshold tuning) that need exact neighbors of many
+        vectors: the export is scanned with block matrix products across a process pool
+        instead of one vector index query per vector. See database.vector_scan.VectorShards.
+
+        Args:
+            node_label (str): Label of the nodes.
+            directory (str, optional): Parent directory of the export. Defaults to VECTOR_SCAN.DIRECTORY.
+            shard_size (int, optional): Vectors per shard. Defaults to VECTOR_SCAN.SHARD_SIZE.
+            workers (int, optional): Number of processes of the scans. Defaults to VECTOR_SCAN.WORKERS.
+
+        Returns:
+            VectorShards: The export, or None if no node of the label has an embedding.
+        """
+        return VectorShards.export(self, node_label, directory=directory, shard_size=shard_size, workers=workers)
 
     def update_node_properties(self, node_id, properties):
         """
@@ -691,26 +2079,127 @@ class Graph:
             properties (dict): Dictionary of properties to update.
 
         Returns:
-            bool: True if the update succeeds, False otherwise.
+            bool: True if the update succeeds (or was queued inside write_behind()), False otherwise.
         """
-        # Determine if the ID is an internal Neo4j ID or a uid
-        node_id_key = "id(n)" if isinstance(node_id, int) else "n.id"
+        if self.write_buffer is not None:
+            self.write_buffer.add_update(node_id, properties)
+            return True
+
+        query, params = self._update_node_properties_query(node_id, properties)
 
-        # Construct the query
-        query = f"""
-            MATCH (n)
-            WHERE {node_id_key} = $node_id
-            SET n += $properties
-        """
-        
         # Execute the query
         try:
-            self.graph_database.write(query, {"node_id": node_id, "properties": properties})
-            return True
+            return self.graph_database.write(query, params) is not False
         except Exception as e:
             self.error_handler.handle_error(e)
             return False
 
+    def update_nodes_properties(self, updates, batch_size=None):
+        """
+        Update the properties of many nodes with one UNWIND query per batch.
+
+        Args:
+            updates (dict): Mapping of node ID or UID to the dictionary of properties to update.
+                Internal IDs and UIDs can be mixed.
+            batch_size (int, optional): Maximum number of nodes per query. Defaults to NEO4J.BATCH_SIZE.
+
+        Returns:
+            dict: Mapping of node ID or UID to True if the node was updated (or queued inside write_behind()),
+                False if it does not exist or its batch failed.
+        """
+        if self.write_buffer is not None:
+            for node_id, properties in updates.items():
+                self.write_buffer.add_update(node_id, properties)
+            return {node_id: True for node_id in updates}
+
+        results = {node_id: False for node_id in updates}
+        for query, params, batch_length in self._update_nodes_batches(list(updates.items()), batch_size):
+            records = self.graph_database.write(query, params)
+            if records is False:
+                self.error_handler.warning(f"Error updating batch of {batch_length} nodes")
+                continue
+            for record in records:
+                results[record["node_id"]] = True
+
+        self.error_handler.debug_info(f"Updated {sum(results.values())} of {len(results)} nodes")
+        return results
+
+    def create_nodes_bulk(
+            self,
+            rows,
+            node_label,
+            text_node_property="text",
+            embedding_node_property=None,
+            batch_size=None,
+            link_similar=None,
+            similarity_threshold=None,
+            max_nodes=None,
+            index_name=None
+        ):
+        """
+        Create nodes with their embeddings using one UNWIND query per batch, all in one transaction.
+
+        Args:
+            rows (List[dict]): Nodes to create, each with "id" (UID), "text", "metadata" (dict) and "embedding" (list of floats).
+            node_label (str): Label of the nodes.
+            text_node_property (str, optional): Property that holds the text. Defaults to "text".
+            embedding_node_property (str, optional): Property that holds the embedding. Defaults to VECTOR_INDEX.PROPERTY_KEY.
+            batch_size (int, optional): Maximum number of nodes per query. Defaults to NEO4J.BATCH_SIZE.
+            link_similar (bool, optional): If True, link each new node to its most similar nodes with SIMILAR_TO
+                in the same transaction, one extra query per batch. Defaults to SIMILARITY_GRAPH.LINK_ON_INSERT.
+            similarity_threshold (float, optional): Only link neighbors scoring above this. Defaults to SIMILARITY_GRAPH.SIMILARITY_THRESHOLD.
+            max_nodes (int, optional): Maximum number of neighbors to link per node. Defaults to SIMILARITY_GRAPH.K.
+            index_name (str, optional): Name of the vector index to search. Defaults to the node label.
+
+        Returns:
+            List[str]: UIDs of the created (or queued) nodes, or False if the transaction failed. A queued
+                row whose content hash is already queued is dropped and returns the UID of the queued node.
+        """
+        embedding_node_property = embedding_node_property or self.excluded_properties[0]
+        link_options = self._link_on_insert_options(link_similar, similarity_threshold, max_nodes)
+
+        if self.write_buffer is not None:
+            return self.write_buffer.add_nodes(rows, node_label, text_node_property, embedding_node_property, link_options, index_name)
+
+        # All batches are committed together, so either all nodes are created or none
+        batches = self._create_nodes_batches(rows, node_label, text_node_property, embedding_node_property, batch_size)
+        link_batches = []
+        link_stats = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+        if link_options:
+            # The index is searched in a read of its own, so a missing index cannot roll back the inserts
+            index_neighbors = self._index_neighbors(rows, node_label, *link_options, index_name=index_name)
+            link_batches = self._link_on_insert_batches(rows, *link_options, index_neighbors, batch_size, link_stats)
+        try:
+            results = self.graph_database.execute_write(_fetch_batches, batches + link_batches)
+        except Exception as e:
+            self.error_handler.warning(f"Error creating {len(rows)} {node_label} nodes: {e}")
+            self.error_handler.exception(sys.exc_info())
+            return False
+        self.register_content_hashes([row["metadata"][self.hash_property] for row in rows if row["metadata"].get(self.hash_property)], node_label)
+
+        if link_batches:
+            for (query, params, batch_length), records in zip(link_batches, results[len(batches):]):
+                self._count_links(link_stats, records, batch_length, "SIMILAR_TO")
+            self.error_handler.debug_info(f"Linked {len(rows)} new {node_label} nodes to {link_stats['created']} similar nodes")
+        return [record["id"] for records in results[:len(batches)] for record in records]
+
+    def write_behind(self, max_size=None, max_interval=None):
+        """
+        Buffer writes instead of sending them one by one.
+
+        Inside the returned context manager, update_node_properties, link_nodes* and
+        create_nodes_bulk queue their writes, which are committed in batches of one
+        transaction each (see WriteBuffer).
+
+        Args:
+            max_size (int, optional): Flush after this many queued operations. Defaults to WRITE_BUFFER.MAX_SIZE.
+            max_interval (float, optional): Flush when a write arrives this many seconds after the last flush. Defaults to WRITE_BUFFER.MAX_INTERVAL.
+
+        Returns:
+            WriteBuffer: The buffer, usable as a context manager.
+        """
+        return WriteBuffer(self, max_size=max_size, max_interval=max_interval)
+
     def save_and_link_sequentially(
             self,
             graph=None, 
@@ -722,6 +2211,7 @@ class Graph:
             sequence_relationship_name=None, 
             parent_ids=None,
             parent_linking_pattern="first_only", # "first_only", "all"
+            link_similar=None,
         ):
         """
         Save chunks of text as nodes in the graph and link them.
@@ -735,6 +2225,8 @@ class Graph:
             relationship_name (str, optional): Name of the relationship between parents and chunks.
             sequence_relationship_name (str, optional): Name of the sequential relationship between chunks.
             parent_ids (list[int], optional): List of IDs of the parent nodes.
+            link_similar (bool, optional): If True, link new chunks to their most similar nodes while saving them.
+                Defaults to SIMILARITY_GRAPH.LINK_ON_INSERT.
 
         Returns:
             List[int]: IDs of the created nodes.
@@ -749,7 +2241,7 @@ class Graph:
             if not documents and not parent_ids:
                 raise ValueError("Either text, documents or parent_ids must be provided.")
 
-        self.vector_store = VectorStore(index_name=node_label, node_label=node_label, graph=graph)
+        self.vector_store = graph.get_vector_store(index_name=node_label, node_label=node_label)
 
         # If parent_ids are provided, ensure it's a list
         if parent_ids is not None and not isinstance(parent_ids, list):
@@ -776,7 +2268,8 @@ class Graph:
             try:
                 chunk_ids = self.vector_store.add_documents(
                     documents=documents, 
-                    node_label=node_label
+                    node_label=node_label,
+                    link_similar=link_similar
                 )
                 error_handler.debug_info(f"Saved documents to graph: {chunk_ids}")
             except Exception as e:
@@ -788,28 +2281,28 @@ class Graph:
             error_handler.debug_info(f"Chunking text")
             chunks = chunker(text) if chunker else [text]
 
-            for chunk in chunks:
-                try:
-                    saved_chunks = self.vector_store.add_documents(text=chunk, node_label=node_label)
-                    for saved_chunk in saved_chunks:
-                        chunk_ids.append(saved_chunk)
-                        error_handler.debug_info(f"Added chunk to graph: {saved_chunk}")
-                except Exception as e:
-                    self.error_handler.generic_error(f"Error saving chunk", exception=e)
+            # Save all chunks as one batch, so they are embedded, written and linked together
+            try:
+                chunk_ids = self.vector_store.add_documents(text=chunks, node_label=node_label, link_similar=link_similar) or []
+                error_handler.debug_info(f"Added {len(chunk_ids)} chunks to graph")
+            except Exception as e:
+                self.error_handler.generic_error(f"Error saving chunks", exception=e)
 
         # Link chunks to parent nodes
         error_handler.inspect_object(chunk_ids)
-        if parent_linking_pattern == "first_only":
-            # Link the first chunk to the parent nodes
-            if parent_ids and chunk_ids:
-                for parent_id in parent_ids:
-                    error_handler.debug_info(f"Linking parent node {parent_id} to {chunk_ids[0]}")
-                    graph.link_nodes(origins=[parent_id], targets=[chunk_ids[0]], relationship_name=relationship_name)
-        elif parent_linking_pattern == "all":
-            # Link all chunks to the parent nodes
-            if parent_ids and chunk_ids:
-                for parent_id in parent_ids:
-                    graph.link_nodes(origins=[parent_id], targets=chunk_ids, relationship_name=relationship_name)
+        if parent_ids and chunk_ids:
+            if parent_linking_pattern == "first_only":
+                # Link the first chunk to the parent nodes
+                error_handler.debug_info(f"Linking parent nodes {parent_ids} to {chunk_ids[0]}")
+                pairs = [(parent_id, chunk_ids[0]) for parent_id in parent_ids]
+            elif parent_linking_pattern == "all":
+                # Link all chunks to the parent nodes
+                pairs = [(parent_id, chunk_id) for parent_id in parent_ids for chunk_id in chunk_ids]
+            else:
+                pairs = []
+
+            if pairs:
+                graph.link_nodes_bulk(pairs, relationship_name=relationship_name)
         
         # Link chunks sequentially
         if sequence_relationship_name and len(chunk_ids) > 1:
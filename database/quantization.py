@@ -0,0 +1,161 @@
+import numpy as np
+
+
+class ScalarQuantizer:
+    """
+    Int8 scalar quantization: every dimension is mapped linearly onto 256 levels between the
+    minimum and maximum the dimension takes in the training sample. 4x smaller than float32.
+
+    Queries are not quantized (asymmetric distance computation): the score of a code is
+    the dot product of the float query with the code's reconstruction.
+    """
+    kind = "int8"
+    dtype = np.int8
+
+    def __init__(self, minimum=None, step=None):
+        self.minimum = minimum
+        self.step = step
+
+    @property
+    def code_size(self):
+        return len(self.minimum)
+
+    def train(self, sample, generator=None):
+        sample = np.asarray(sample, dtype=np.float32)
+        self.minimum = sample.min(axis=0)
+        self.step = (sample.max(axis=0) - self.minimum) / 255
+        self.step[self.step == 0] = 1
+        return self
+
+    def encode(self, vectors):
+        levels = np.rint((np.asarray(vectors, dtype=np.float32) - self.minimum) / self.step)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def scores(self, query, codes):
+        # q . (minimum + (code + 128) * step)
+        weights = query * self.step
+        return codes.astype(np.float32) @ weights + float(query @ self.minimum) + 128 * float(weights.sum())
+
+    def arrays(self):
+        return {"minimum": self.minimum, "step": self.step}
+
+
+class ProductQuantizer:
+    """
+    Product quantization: the vectors are split into `subvectors` slices and every slice is
+    replaced by the index of its nearest of 256 centroids (one byte), trained with k-means
+    per slice. Slices of 4 dimensions make the codes 16x smaller than float32.
+
+    Queries are not quantized (asymmetric distance computation): the query slices are
+    scored against all centroids once, and the score of a code is the sum of its entries
+    in that table.
+    """
+    kind = "pq"
+    dtype = np.uint8
+
+    def __init__(self, subvectors=None, codebooks=None):
+        self.subvectors = subvectors if codebooks is None else len(codebooks)
+        self.codebooks = codebooks
+
+    @property
+    def code_size(self):
+        return self.subvectors
+
+    def _slices(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors.reshape(len(vectors), self.subvectors, -1)
+
+    def train(self, sample, iterations=10, generator=None):
+        sample = np.asarray(sample, dtype=np.float32)
+        if sample.shape[1] % self.subvectors:
+            raise ValueError(f"{sample.shape[1]} dimensions cannot be split into {self.subvectors} subvectors")
+        generator = generator or np.random.default_rng(0)
+        slices = self._slices(sample)
+        self.codebooks = np.stack([
+            _kmeans(slices[:, index], min(256, len(sample)), iterations, generator)
+            for index in range(self.subvectors)
+        ])
+        return self
+
+    def encode(self, vectors, block_size=4096):
+        slices = self._slices(vectors)
+        codes = np.empty((len(slices), self.subvectors), dtype=np.uint8)
+        for index, codebook in enumerate(self.codebooks):
+            for start in range(0, len(slices), block_size):
+                codes[start:start + block_size, index] = _nearest(slices[start:start + block_size, index], codebook)
+        return codes
+
+    def scores(self, query, codes):
+        table = np.einsum("md,mcd->mc", self._slices([query])[0], self.codebooks)
+        return table[np.arange(self.subvectors), codes].sum(axis=1)
+
+    def arrays(self):
+        return {"codebooks": self.codebooks}
+
+
+QUANTIZERS = {quantizer.kind: quantizer for quantizer in (ScalarQuantizer, ProductQuantizer)}
+
+
+def create_quantizer(kind, dimension, subvectors=None):
+    """
+    Create an untrained quantizer.
+
+    Args:
+        kind (str): "int8" or "pq".
+        dimension (int): Dimension of the vectors.
+        subvectors (int, optional): Bytes per vector of "pq". Defaults to a quarter of the dimension (16x smaller).
+
+    Returns:
+        The quantizer.
+
+    Raises:
+        ValueError: If the kind is unknown or the dimension cannot be split into the subvectors.
+    """
+    if kind == "int8":
+        return ScalarQuantizer()
+    if kind == "pq":
+        subvectors = int(subvectors or max(dimension // 4, 1))
+        if subvectors < 1 or dimension % subvectors:
+            raise ValueError(f"{dimension} dimensions cannot be split into {subvectors} subvectors")
+        return ProductQuantizer(subvectors)
+    raise ValueError(f"Unknown quantization {kind}")
+
+
+def save_quantizer(quantizer, path):
+    with open(path, "wb") as file:
+        np.savez(file, kind=quantizer.kind, **quantizer.arrays())
+
+
+def load_quantizer(path):
+    with np.load(path) as arrays:
+        quantizer = QUANTIZERS[str(arrays["kind"])]
+        return quantizer(**{key: arrays[key] for key in arrays.files if key != "kind"})
+
+
+def quantized_scores(quantizer, query, codes, rows, block_size=4096):
+    """
+    Approximate cosine scores of a normalized query against the codes of the given rows.
+    """
+    scores = np.empty(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), block_size):
+        scores[start:start + block_size] = quantizer.scores(query, np.asarray(codes[rows[start:start + block_size]]))
+    return scores
+
+
+def _nearest(vectors, centroids):
+    # Index of the closest centroid (euclidean) of every vector
+    distances = (centroids ** 2).sum(axis=1) - 2 * vectors @ centroids.T
+    return np.argmin(distances, axis=1)
+
+
+def _kmeans(vectors, clusters, iterations, generator):
+    centroids = vectors[generator.choice(len(vectors), clusters, replace=False)]
+    for iteration in range(iterations):
+        labels = _nearest(vectors, centroids)
+        sums = np.stack([np.bincount(labels, weights=vectors[:, column], minlength=clusters) for column in range(vectors.shape[1])], axis=1)
+        counts = np.bincount(labels, minlength=clusters)
+        empty = counts == 0
+        centroids = sums / np.maximum(counts, 1)[:, None]
+        # Reseed empty clusters with random vectors
+        centroids[empty] = vectors[generator.choice(len(vectors), int(empty.sum()))]
+    return centroids.astype(np.float32)
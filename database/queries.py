@@ -0,0 +1,105 @@
+import re
+import threading
+from utils.config_loader import ConfigLoader as config
+
+# Property keys are interpolated into templates and must be plain identifiers
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+DEFAULT_LABELS = ["Document", "Section", "Chunk"]
+DEFAULT_RELATIONSHIPS = ["CONTAINS", "NEXT", "LINKS_TO", "SIMILAR_TO"]
+
+# Characters and operators with a meaning in Lucene query syntax
+LUCENE_SPECIAL = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+LUCENE_OPERATORS = re.compile(r"\b(AND|OR|NOT)\b")
+
+
+def lucene_query(text):
+    """
+    Escape a text for use as a plain full-text (Lucene) query, so that every term matches literally.
+    """
+    text = LUCENE_SPECIAL.sub(r"\\\1", " ".join(str(text).split()))
+    return LUCENE_OPERATORS.sub(lambda match: match.group(1).lower(), text)
+
+
+class QueryBuilder:
+    """
+    Builds stable, parameterized Cypher templates for the Graph queries.
+
+    Cypher cannot take labels, relationship types or property keys as parameters, so
+    these are the only parts of a query that are interpolated: labels and relationship
+    types must be on the allowlist (SCHEMA.LABELS and SCHEMA.RELATIONSHIPS), property
+    keys must be plain identifiers. All values are passed as parameters. The query text
+    therefore only depends on the shape of a call, so Neo4j can reuse cached plans, and
+    built templates are cached locally by that shape.
+
+    Usage:
+        query = queries.template(("node_by_id", is_internal), lambda: f"MATCH (n) WHERE ...")
+    """
+    def __init__(self, labels=None, relationships=None):
+        configuration = config()
+        schema_config = configuration.get_config().get("SCHEMA", {})
+        vector_label = configuration.get_vector_index_config().get("LABEL")
+
+        self.labels = set(labels if labels is not None else schema_config.get("LABELS", DEFAULT_LABELS))
+        if vector_label and labels is None:
+            self.labels.add(vector_label)
+        self.relationships = set(relationships if relationships is not None else schema_config.get("RELATIONSHIPS", DEFAULT_RELATIONSHIPS))
+
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def allow_labels(self, *labels):
+        """
+        Add labels to the allowlist.
+        """
+        for label in labels:
+            self.labels.add(self.property(label))
+
+    def allow_relationships(self, *relationships):
+        """
+        Add relationship types to the allowlist.
+        """
+        for relationship in relationships:
+            self.relationships.add(self.property(relationship))
+
+    def label(self, label):
+        """
+        Return the label if it is on the allowlist, raise ValueError otherwise.
+        """
+        if label not in self.labels:
+            raise ValueError(f"Label {label!r} is not allowed. Add it to SCHEMA.LABELS.")
+        return label
+
+    def relationship(self, relationship):
+        """
+        Return the relationship type if it is on the allowlist, raise ValueError otherwise.
+        """
+        if relationship not in self.relationships:
+            raise ValueError(f"Relationship {relationship!r} is not allowed. Add it to SCHEMA.RELATIONSHIPS.")
+        return relationship
+
+    def property(self, key):
+        """
+        Return the property key if it is a plain identifier, raise ValueError otherwise.
+        """
+        if not isinstance(key, str) or not IDENTIFIER.match(key):
+            raise ValueError(f"Invalid property key {key!r}.")
+        return key
+
+    def template(self, key, build):
+        """
+        Return the cached template for `key`, building it with `build()` on first use.
+
+        Args:
+            key (tuple): Shape of the query, i.e. everything the query text depends on.
+            build (callable): Returns the query text. Only called on a cache miss.
+        """
+        template = self._templates.get(key)
+        if template is None:
+            template = build()
+            with self._lock:
+                self._templates.setdefault(key, template)
+        return template
+
+    def __len__(self):
+        return len(self._templates)
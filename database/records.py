@@ -0,0 +1,135 @@
+class NodeRecord:
+    """
+    Lightweight, read-only stand-in for a neo4j Node returned by projected queries.
+
+    Supports the parts of the driver's Node interface that the indexer relies on
+    (`id`, `labels`, item access, `get`, `keys`, `items`), but only carries the
+    properties that were projected on the server, so embedding vectors never
+    have to be transferred or decoded.
+    """
+    def __init__(self, id, labels=None, properties=None):
+        self.id = id
+        self.labels = frozenset(labels or [])
+        self._properties = dict(properties or {})
+
+    @classmethod
+    def from_value(cls, value):
+        """
+        Build a NodeRecord from the map returned by a projection clause.
+
+        Args:
+            value (dict): Map with the keys "id", "labels" and "properties", where
+                "properties" is a list of [key, value] pairs.
+
+        Returns:
+            NodeRecord: The record, or None if value is None.
+        """
+        if value is None:
+            return None
+        return cls(
+            id=value["id"],
+            labels=value["labels"],
+            properties={key: property_value for key, property_value in value["properties"]}
+        )
+
+    @classmethod
+    def from_document(cls, document, text_node_property="text"):
+        """
+        Build a NodeRecord from a Document returned by a vector search with RETRIEVAL_QUERY
+        (see database.vectorstore), whose metadata carries the node's ID and labels.
+
+        Args:
+            document (Document): The search result.
+            text_node_property (str, optional): Property the page content is stored in. Defaults to "text".
+
+        Returns:
+            NodeRecord: The record, or None if the metadata has no node ID.
+        """
+        metadata = dict(document.metadata)
+        node_id = metadata.pop("node_id", None)
+        if node_id is None:
+            return None
+        labels = metadata.pop("node_labels", [])
+        metadata[text_node_property] = document.page_content
+        return cls(id=node_id, labels=labels, properties=metadata)
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+    def __eq__(self, other):
+        return isinstance(other, NodeRecord) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<NodeRecord id={self.id} labels={set(self.labels)} properties={self._properties}>"
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def keys(self):
+        return self._properties.keys()
+
+    def values(self):
+        return self._properties.values()
+
+    def items(self):
+        return self._properties.items()
+
+
+class EdgeRecord:
+    """
+    Lightweight stand-in for a neo4j Relationship, returned by backends without a driver.
+
+    Supports `id`, `type`, `start_node`/`end_node` (as NodeRecords carrying only the ID)
+    and read access to the properties.
+    """
+    def __init__(self, id, type, start_id, end_id, properties=None):
+        self.id = id
+        self.type = type
+        self.start_node = NodeRecord(start_id)
+        self.end_node = NodeRecord(end_id)
+        self._properties = dict(properties or {})
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+    def __eq__(self, other):
+        return isinstance(other, EdgeRecord) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<EdgeRecord id={self.id} type={self.type} start={self.start_node.id} end={self.end_node.id} properties={self._properties}>"
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def keys(self):
+        return self._properties.keys()
+
+    def values(self):
+        return self._properties.values()
+
+    def items(self):
+        return self._properties.items()
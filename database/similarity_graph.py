@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from utils.error_handler import ErrorHandler
+from utils.config_loader import ConfigLoader as config
+
+error_handler = ErrorHandler()
+
+
+def _open_matrix(path, count, dimension):
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(count, dimension))
+
+
+def normalize_rows(vectors):
+    """
+    Return the vectors as a float32 matrix of unit rows (zero vectors stay zero).
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def top_k_matches(queries, matrix, k, column_block_size=16384, own_offset=None):
+    """
+    Top-k rows of a normalized matrix for each normalized query.
+
+    The scores are computed with one matrix product per column block, so memory stays
+    bounded by len(queries) x column_block_size.
+
+    Args:
+        queries (np.ndarray): Normalized query vectors, one per row.
+        matrix (np.ndarray): Normalized vectors, one per row (an array or a memmap).
+        k (int): Number of matches per query.
+        column_block_size (int, optional): Rows compared per matrix product. Defaults to 16384.
+        own_offset (int, optional): Matrix row of the first query if the queries are consecutive
+            rows of the matrix, so that a row is never its own match. Defaults to None.
+
+    Returns:
+        tuple: Matched row indices and cosine scores, best first, each of shape (len(queries), k).
+            Queries with fewer than k matches are padded with index -1 and score -inf.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    rows = len(queries)
+    best_scores = np.full((rows, k), -np.inf, dtype=np.float32)
+    best_indices = np.full((rows, k), -1, dtype=np.int64)
+    row_range = np.arange(rows)
+
+    for column in range(0, len(matrix), column_block_size):
+        block = np.asarray(matrix[column:column + column_block_size])
+        scores = queries @ block.T
+
+        # A row is not its own neighbor
+        if own_offset is not None:
+            own = row_range + own_offset - column
+            inside = (own >= 0) & (own < len(block))
+            scores[row_range[inside], own[inside]] = -np.inf
+
+        # Merge the block into the running top-k
+        candidate_scores = np.concatenate([best_scores, scores], axis=1)
+        candidate_indices = np.concatenate([best_indices, np.broadcast_to(np.arange(column, column + len(block)), scores.shape)], axis=1)
+        top = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(candidate_scores, top, axis=1)
+        best_indices = np.take_along_axis(candidate_indices, top, axis=1)
+
+    return sort_top_k(best_indices, best_scores)
+
+
+def sort_top_k(indices, scores):
+    """
+    Sort the rows of a top-k result best first.
+    """
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(indices, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+def top_k_neighbors(matrix, start, stop, k, column_block_size=16384):
+    """
+    Top-k neighbors of rows [start, stop) among all rows of a normalized matrix.
+
+    A row is never its own neighbor. See top_k_matches.
+
+    Args:
+        matrix (np.ndarray): Normalized vectors, one per row (an array or a memmap).
+        start (int): First query row.
+        stop (int): End of the query rows (exclusive).
+        k (int): Number of neighbors, less than the number of rows.
+        column_block_size (int, optional): Rows compared per matrix product. Defaults to 16384.
+
+    Returns:
+        tuple: Neighbor row indices and scores, best first, each of shape (stop - start, k).
+            Scores are scaled to [0, 1] like Neo4j's cosine vector index.
+    """
+    indices, scores = top_k_matches(matrix[start:stop], matrix, k, column_block_size, own_offset=start)
+    return indices, (1 + scores) / 2
+
+
+def _top_k_block(path, count, dimension, start, stop, k, column_block_size):
+    # Runs in the worker processes, which open the memmap themselves so the matrix is never pickled
+    indices, scores = top_k_neighbors(_open_matrix(path, count, dimension), start, stop, k, column_block_size)
+    return start, indices, scores
+
+
+class SimilarityGraphBuilder:
+    """
+    Batch job that builds the SIMILAR_TO kNN graph of a whole label.
+
+    The embeddings of the label are streamed out of the graph once and written, normalized,
+    to a float32 memmap in the checkpoint directory. The rows are then split into blocks and
+    the top-k neighbors of each block are computed with block matrix products in a process
+    pool. Neighbors above the threshold are written back with link_nodes_bulk as each block
+    finishes, and finished blocks are recorded in a progress file, so an interrupted run
+    resumes where it stopped (with the same snapshot of vectors) instead of starting over.
+
+    Usage:
+        stats = graph.build_similarity_graph("Section", k=10, similarity_threshold=0.85)
+    """
+    def __init__(
+            self,
+            graph,
+            node_label,
+            k=None,
+            similarity_threshold=None,
+            bidirectional=None,
+            force=False,
+            block_size=None,
+            column_block_size=None,
+            workers=None,
+            checkpoint_dir=None,
+            resume=True
+        ):
+        job_config = config().get_config().get("SIMILARITY_GRAPH", {})
+        vector_index_config = config().get_vector_index_config()
+
+        self.graph = graph
+        self.node_label = graph.queries.label(node_label)
+        self.error_handler = error_handler
+        self.k = int(k or job_config.get("K", vector_index_config.get("NEAREST_NEIGHBORS", 10)))
+        if similarity_threshold is None:
+            similarity_threshold = job_config.get("SIMILARITY_THRESHOLD", vector_index_config.get("SIMILARITY_THRESHOLD", 0.9))
+        self.similarity_threshold = float(similarity_threshold)
+        if bidirectional is None:
+            bidirectional = job_config.get("BIDIRECTIONAL", False)
+        self.bidirectional = bool(bidirectional)
+        self.force = force
+        self.block_size = int(block_size or job_config.get("BLOCK_SIZE", 2048))
+        self.column_block_size = int(column_block_size or job_config.get("COLUMN_BLOCK_SIZE", 16384))
+        self.workers = int(workers or job_config.get("WORKERS", 0) or os.cpu_count() or 1)
+        self.resume = resume
+
+        checkpoint_dir = checkpoint_dir or job_config.get("CHECKPOINT_DIR", ".cache/similarity_graph")
+        self.checkpoint_dir = os.path.join(checkpoint_dir, node_label)
+        self.matrix_path = os.path.join(self.checkpoint_dir, "vectors.f32")
+        self.ids_path = os.path.join(self.checkpoint_dir, "ids.json")
+        self.progress_path = os.path.join(self.checkpoint_dir, "progress.json")
+
+        self.stats = {"nodes": 0, "blocks": 0, "resumed_blocks": 0, "created": 0, "updated": 0, "skipped": 0, "failed": 0}
+
+    @property
+    def parameters(self):
+        # Finished blocks can only be reused if these are unchanged
+        return {"k": self.k, "similarity_threshold": self.similarity_threshold, "bidirectional": self.bidirectional, "block_size": self.block_size}
+
+    def run(self):
+        """
+        Build the kNN graph of the label.
+
+        Returns:
+            dict: Number of "nodes" and "blocks", blocks skipped because a previous run finished
+                them ("resumed_blocks"), and the link statistics of link_nodes_bulk.
+        """
+        started = time.monotonic()
+        progress = self._load_progress() if self.resume else None
+        if progress is None:
+            progress = self._export_vectors()
+        if progress is None:
+            return self.stats
+
+        count, dimension = progress["count"], progress["dimension"]
+        with open(self.ids_path) as file:
+            ids = json.load(file)
+        self.stats["nodes"] = count
+
+        k = min(self.k, count - 1)
+        if k < 1:
+            self.error_handler.warning(f"Not enough {self.node_label} nodes with embeddings to link")
+            self._remove_checkpoint()
+            return self.stats
+
+        done = set(progress["done"])
+        blocks = [start for start in range(0, count, self.block_size) if start not in done]
+        self.stats["blocks"] = len(range(0, count, self.block_size))
+        self.stats["resumed_blocks"] = self.stats["blocks"] - len(blocks)
+        self.error_handler.debug_info(f"Linking {count} {self.node_label} nodes in {len(blocks)} blocks ({len(done)} done before)")
+
+        tasks = [(self.matrix_path, count, dimension, start, min(start + self.block_size, count), k, self.column_block_size) for start in blocks]
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(_top_k_block, *task) for task in tasks]
+                for future in as_completed(futures):
+                    self._link_block(ids, *future.result(), progress)
+        else:
+            for task in tasks:
+                self._link_block(ids, *_top_k_block(*task), progress)
+
+        if self.stats["failed"]:
+            self.error_handler.warning(f"Failed to write {self.stats['failed']} SIMILAR_TO links; rerun to retry the unfinished blocks")
+        else:
+            self._remove_checkpoint()
+        self.error_handler.success(
+            f"Built similarity graph of {count} {self.node_label} nodes in {time.monotonic() - started:.1f}s: "
+            f"{self.stats['created']} created, {self.stats['updated']} updated, {self.stats['skipped']} skipped"
+        )
+        return self.stats
+
+    def _link_block(self, ids, start, indices, scores, progress):
+        pairs = []
+        for row, (neighbors, neighbor_scores) in enumerate(zip(indices, scores)):
+            for neighbor, score in zip(neighbors, neighbor_scores):
+                # Skip identical content, like find_and_link_similar_nodes_by_id
+                if neighbor < 0 or not self.similarity_threshold < score < 1:
+                    continue
+                pairs.append((ids[start + row], ids[neighbor], {"similarity": float(score)}))
+
+        stats = self.graph.link_nodes_bulk(
+            pairs,
+            relationship_name="SIMILAR_TO",
+            edge_values={},
+            bidirectional=self.bidirectional,
+            force=self.force
+        )
+        for key in ("created", "updated", "skipped", "failed"):
+            self.stats[key] += stats.get(key, 0)
+
+        # Only finished blocks are skipped on resume
+        if not stats.get("failed"):
+            progress["done"].append(start)
+            self._save_progress(progress)
+
+    def _export_vectors(self):
+        # Stream the vectors once into a normalized float32 matrix on disk
+        self._remove_checkpoint()
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        embedding_property = self.graph.excluded_properties[0]
+        expected = self.graph.count_nodes(self.node_label, embedding_property)
+        if expected is None:
+            self.error_handler.warning(f"Could not count the {self.node_label} nodes with embeddings")
+            self._remove_checkpoint()
+            return None
+
+        ids, dimension = [], None
+        with open(self.matrix_path, "wb") as file:
+            block = []
+            for node in self.graph.iter_nodes(self.node_label, projection=["id", embedding_property]):
+                vector = node.get(embedding_property)
+                if vector is None:
+                    continue
+                dimension = dimension or len(vector)
+                ids.append(node.get("id", node.id))
+                block.append(vector)
+                if len(block) >= self.block_size:
+                    self._write_block(file, block)
+                    block = []
+            if block:
+                self._write_block(file, block)
+
+        if not ids:
+            self.error_handler.warning(f"No {self.node_label} nodes with embeddings found")
+            self._remove_checkpoint()
+            return None
+        # A short export would link a subset of the label and then report success
+        if len(ids) < expected:
+            self.error_handler.warning(f"Exported only {len(ids)} of {expected} {self.node_label} vectors; rerun to export them again")
+            self._remove_checkpoint()
+            return None
+
+        with open(self.ids_path, "w") as file:
+            json.dump(ids, file)
+        progress = {"count": len(ids), "dimension": dimension, "parameters": self.parameters, "done": []}
+        self._save_progress(progress)
+        return progress
+
+    def _write_block(self, file, block):
+        file.write(normalize_rows(block).tobytes())
+
+    def _load_progress(self):
+        try:
+            with open(self.progress_path) as file:
+                progress = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self.matrix_path) or not os.path.exists(self.ids_path):
+            return None
+
+        # Vectors can be reused with other parameters, finished blocks cannot
+        if progress.get("parameters") != self.parameters:
+            progress["parameters"] = self.parameters
+            progress["done"] = []
+        self.error_handler.debug_info(f"Resuming similarity graph of {self.node_label} from {self.checkpoint_dir}")
+        return progress
+
+    def _save_progress(self, progress):
+        temporary_path = self.progress_path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(progress, file)
+        os.replace(temporary_path, self.progress_path)
+
+    def _remove_checkpoint(self):
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
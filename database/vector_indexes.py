@@ -0,0 +1,123 @@
+import threading
+from utils.error_handler import ErrorHandler
+
+error_handler = ErrorHandler()
+
+
+class VectorIndexRegistry:
+    """
+    Process-wide cache of Neo4jVector handles.
+
+    Creating a Neo4jVector opens a driver, verifies connectivity and the server version,
+    embeds a probe text and looks up the index. The registry does this once per
+    (database, index_name, node_label) and hands the same handle to every VectorStore.
+    Given the driver of the graph's GraphDatabaseConnection, the handle's own driver is
+    closed right after it was opened and the handle runs its queries on the shared driver,
+    so all indexes and the graph use one connection pool. The embedding model is shared
+    as well. Handles are created under a lock per key, so opening one index does not block
+    lookups of the others.
+    """
+    def __init__(self):
+        self._handles = {}
+        # Drivers that handles opened for themselves and still use, closed by close()
+        self._own_drivers = {}
+        self._key_locks = {}
+        self._embeddings = None
+        self._lock = threading.RLock()
+        self.error_handler = error_handler
+
+    def embeddings(self):
+        """
+        Return the shared Embeddings instance, created on first use.
+        """
+        with self._lock:
+            if self._embeddings is None:
+                from functions.embeddings import Embeddings
+                self._embeddings = Embeddings()
+            return self._embeddings
+
+    def get(self, database, index_name, node_label, create, driver=None):
+        """
+        Return the handle for an index, creating it with `create()` on first use.
+
+        Args:
+            database (str): Name of the database.
+            index_name (str): Name of the vector index.
+            node_label (str): Label of the indexed nodes.
+            create (callable): Returns a new Neo4jVector, or None if the index cannot be opened.
+            driver (neo4j.Driver, optional): Driver for the handle to share, e.g. GraphDatabaseConnection.driver.
+
+        Returns:
+            Neo4jVector: The shared handle, or None if it could not be created.
+        """
+        key = (database, index_name, node_label)
+        handle = self._handles.get(key)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # The network round trips of create() only hold the lock of this key
+        with key_lock:
+            # Another thread may have created the handle while we waited
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = create()
+                if handle is not None:
+                    own_driver = self._share_driver(handle, driver)
+                    with self._lock:
+                        self._handles[key] = handle
+                        if own_driver is not None:
+                            self._own_drivers[key] = own_driver
+                    self.error_handler.debug_info(f"Cached vector index handle {key}")
+            return handle
+
+    def _share_driver(self, handle, driver):
+        # Neo4jVector (langchain 0.0.325) always opens a driver of its own and takes none as argument,
+        # so swap it for the shared one. Returns the handle's driver if it keeps its own.
+        if driver is None:
+            return handle._driver
+        if handle._driver is not driver:
+            handle._driver.close()
+            handle._driver = driver
+        return None
+
+    def invalidate(self, database=None, index_name=None, node_label=None):
+        """
+        Drop cached handles matching all given arguments (all handles if none are given).
+        """
+        with self._lock:
+            for key in list(self._handles):
+                if all(value is None or value == part for value, part in zip((database, index_name, node_label), key)):
+                    del self._handles[key]
+                    self._close_own_driver(key)
+
+    def release(self, driver):
+        """
+        Drop the handles that run on a shared driver, before the driver is closed.
+        """
+        with self._lock:
+            for key, handle in list(self._handles.items()):
+                if handle._driver is driver:
+                    del self._handles[key]
+
+    def _close_own_driver(self, key):
+        own_driver = self._own_drivers.pop(key, None)
+        if own_driver is not None:
+            own_driver.close()
+
+    def close(self):
+        """
+        Drop all handles and close the drivers they opened for themselves. Shared drivers
+        belong to their GraphDatabaseConnection and stay open.
+        """
+        with self._lock:
+            for key in list(self._own_drivers):
+                self._close_own_driver(key)
+            self._handles.clear()
+
+    def __len__(self):
+        return len(self._handles)
+
+
+vector_indexes = VectorIndexRegistry()
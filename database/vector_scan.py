@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.error_handler import ErrorHandler
+from utils.config_loader import ConfigLoader as config
+
+from database.similarity_graph import _open_matrix, normalize_rows, top_k_matches, sort_top_k
+
+error_handler = ErrorHandler()
+
+# Vectors normalized and written at a time while exporting
+EXPORT_BLOCK_SIZE = 16384
+
+
+def _scan_shard(path, count, dimension, offset, queries, k, column_block_size, own_offset):
+    # Runs in the worker processes. `queries` is either a matrix or the (path, count, start, stop)
+    # slice of a shard, which the worker reads itself so the shard rows are never pickled
+    if isinstance(queries, tuple):
+        query_path, query_count, start, stop = queries
+        queries = np.asarray(_open_matrix(query_path, query_count, dimension)[start:stop])
+    if own_offset is not None:
+        own_offset -= offset
+    indices, scores = top_k_matches(queries, _open_matrix(path, count, dimension), min(k, count), column_block_size, own_offset)
+    indices[indices >= 0] += offset
+    return indices, scores
+
+
+def merge_top_k(results, k):
+    """
+    Merge the top-k results of several shards into one top-k, best first.
+
+    Args:
+        results (List[tuple]): (indices, scores) per shard, with global row indices.
+        k (int): Number of matches per query.
+
+    Returns:
+        tuple: Row indices and scores, each of shape (queries, k), padded with -1 and -inf.
+    """
+    indices = np.concatenate([result[0] for result in results], axis=1)
+    scores = np.concatenate([result[1] for result in results], axis=1)
+    if scores.shape[1] < k:
+        padding = k - scores.shape[1]
+        indices = np.pad(indices, ((0, 0), (0, padding)), constant_values=-1)
+        scores = np.pad(scores, ((0, 0), (0, padding)), constant_values=-np.inf)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return sort_top_k(np.take_along_axis(indices, top, axis=1), np.take_along_axis(scores, top, axis=1))
+
+
+class VectorShards:
+    """
+    Exact, multi-core kNN over an export of a label's embeddings.
+
+    `export()` streams the vectors of a label out of the graph once and writes them,
+    normalized, to float32 shards of SHARD_SIZE rows with a JSON id sidecar per shard.
+    Queries are split into blocks, and every (query block, shard) pair is scored with
+    block matrix products in a process pool; the per-shard top-k are merged in the parent.
+    The scan is exhaustive, so the results are exact, and scores are scaled like Neo4j's
+    cosine index. The shards are memory-mapped, so the workers share them through the
+    page cache and the export is reusable across jobs until it is exported again.
+
+    Usage:
+        shards = graph.export_vector_shards("Section")
+        results = shards.search(vectors, k=10)
+        for uid, neighbors in shards.neighbors(k=10, similarity_threshold=0.95):
+            ...
+    """
+    def __init__(self, directory, workers=None, query_block_size=None, column_block_size=None):
+        scan_config = config().get_config().get("VECTOR_SCAN", {})
+        self.error_handler = error_handler
+        self.directory = directory
+        self.workers = int(workers or scan_config.get("WORKERS", 0) or os.cpu_count() or 1)
+        self.query_block_size = int(query_block_size or scan_config.get("QUERY_BLOCK_SIZE", 1024))
+        self.column_block_size = int(column_block_size or scan_config.get("COLUMN_BLOCK_SIZE", 16384))
+
+        with open(os.path.join(directory, "manifest.json")) as file:
+            manifest = json.load(file)
+        self.node_label = manifest["node_label"]
+        self.dimension = manifest["dimension"]
+        self.shards = []
+        self.ids = []
+        for shard in manifest["shards"]:
+            with open(os.path.join(directory, shard["ids"])) as file:
+                ids = json.load(file)
+            self.shards.append((os.path.join(directory, shard["vectors"]), len(ids), len(self.ids)))
+            self.ids.extend(ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def export(cls, graph, node_label, directory=None, shard_size=None, **options):
+        """
+        Export the embeddings of a label to memory-mapped shards, replacing a previous export.
+
+        Args:
+            graph (Graph): Graph to export from.
+            node_label (str): Label of the nodes.
+            directory (str, optional): Parent directory of the export. Defaults to VECTOR_SCAN.DIRECTORY.
+            shard_size (int, optional): Vectors per shard. Defaults to VECTOR_SCAN.SHARD_SIZE.
+            **options: Passed on to VectorShards.
+
+        Returns:
+            VectorShards: The export, or None if no node of the label has an embedding.
+        """
+        scan_config = config().get_config().get("VECTOR_SCAN", {})
+        node_label = graph.queries.label(node_label)
+        shard_size = int(shard_size or scan_config.get("SHARD_SIZE", 262144))
+        directory = os.path.join(directory or scan_config.get("DIRECTORY", ".cache/vector_scan"), node_label)
+        embedding_property = graph.excluded_properties[0]
+        started = time.monotonic()
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        manifest = {"node_label": node_label, "dimension": None, "shards": []}
+        # Vectors are normalized and written to the open shard in blocks as they stream in,
+        # so only the ids of the open shard and one block of vectors are held in memory
+        ids, block, file = [], [], None
+
+        def write_block():
+            file.write(normalize_rows(block).tobytes())
+            block.clear()
+
+        def close_shard():
+            if block:
+                write_block()
+            file.close()
+            name = f"shard-{len(manifest['shards']):05d}"
+            with open(os.path.join(directory, name + ".ids.json"), "w") as ids_file:
+                json.dump(ids, ids_file)
+            manifest["shards"].append({"vectors": name + ".f32", "ids": name + ".ids.json"})
+            ids.clear()
+
+        try:
+            for node in graph.iter_nodes(node_label, projection=["id", embedding_property]):
+                vector = node.get(embedding_property)
+                if vector is None:
+                    continue
+                if file is None:
+                    file = open(os.path.join(directory, f"shard-{len(manifest['shards']):05d}.f32"), "wb")
+                manifest["dimension"] = manifest["dimension"] or len(vector)
+                ids.append(node.get("id", node.id))
+                block.append(vector)
+                if len(block) >= EXPORT_BLOCK_SIZE:
+                    write_block()
+                if len(ids) >= shard_size:
+                    close_shard()
+                    file = None
+            if file is not None:
+                close_shard()
+                file = None
+        finally:
+            if file is not None:
+                file.close()
+
+        if not manifest["shards"]:
+            error_handler.warning(f"No {node_label} nodes with embeddings found")
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+
+        # The manifest is written last, so an interrupted export is never opened
+        with open(os.path.join(directory, "manifest.json"), "w") as file:
+            json.dump(manifest, file)
+        shards = cls(directory, **options)
+        error_handler.debug_info(f"Exported {len(shards)} {node_label} vectors to {len(shards.shards)} shards in {time.monotonic() - started:.1f}s")
+        return shards
+
+    def _scan(self, query_blocks, k):
+        # Top-k of each query block over all shards; the tasks of a window of blocks run in parallel
+        window = max(self.workers, 1)
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for start in range(0, len(query_blocks), window):
+                tasks = [
+                    [(path, count, self.dimension, offset, queries, k, self.column_block_size, own_offset) for path, count, offset in self.shards]
+                    for queries, own_offset in query_blocks[start:start + window]
+                ]
+                if executor is None:
+                    results = [[_scan_shard(*task) for task in block] for block in tasks]
+                else:
+                    futures = [[executor.submit(_scan_shard, *task) for task in block] for block in tasks]
+                    results = [[future.result() for future in block] for block in futures]
+                for block in results:
+                    yield merge_top_k(block, k)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _results(self, indices, scores, similarity_threshold):
+        scores = (1 + scores) / 2
+        return [
+            [(self.ids[index], float(score)) for index, score in zip(row_indices, row_scores)
+             if index >= 0 and (similarity_threshold is None or score > similarity_threshold)]
+            for row_indices, row_scores in zip(indices, scores)
+        ]
+
+    def search(self, vectors, k=10, similarity_threshold=None):
+        """
+        Exact top-k of a batch of query vectors.
+
+        Args:
+            vectors (List[List[float]]): Query vectors.
+            k (int, optional): Matches per query. Defaults to 10.
+            similarity_threshold (float, optional): Only return matches scoring above this.
+
+        Returns:
+            List[List[tuple]]: (uid, score) tuples per query, best first.
+        """
+        queries = normalize_rows(vectors)
+        if queries.shape[1] != self.dimension:
+            raise ValueError(f"Query vectors have {queries.shape[1]} dimensions, the {self.node_label} vectors have {self.dimension}")
+        started = time.monotonic()
+        query_blocks = [(queries[start:start + self.query_block_size], None) for start in range(0, len(queries), self.query_block_size)]
+        results = []
+        for indices, scores in self._scan(query_blocks, k):
+            results.extend(self._results(indices, scores, similarity_threshold))
+        self.error_handler.debug_info(f"Scanned {len(self)} {self.node_label} vectors for {len(queries)} queries in {time.monotonic() - started:.1f}s")
+        return results
+
+    def neighbors(self, k=10, similarity_threshold=None):
+        """
+        Exact top-k neighbors of every exported vector among the others (a full self-join).
+
+        Yields:
+            tuple: (uid, [(uid, score), ...]) per exported vector, in export order.
+        """
+        query_blocks = [
+            ((path, count, start, min(start + self.query_block_size, count)), offset + start)
+            for path, count, offset in self.shards
+            for start in range(0, count, self.query_block_size)
+        ]
+        row = 0
+        for indices, scores in self._scan(query_blocks, k):
+            for neighbors in self._results(indices, scores, similarity_threshold):
+                yield self.ids[row], neighbors
+                row += 1
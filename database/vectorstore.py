@@ -1,12 +1,141 @@
 import sys
+import uuid
+import numpy as np
 from langchain.vectorstores import Neo4jVector
 from utils.error_handler import ErrorHandler as error_handler
 from utils.config_loader import ConfigLoader as config
 from langchain.schema import Document
+from utils.hashing import content_hash
+
+from database.records import NodeRecord
+from database.vector_indexes import vector_indexes
+from database.similarity_graph import normalize_rows
+
+# Returns the node's internal ID and labels with every search result, so results can be
+# linked without looking the nodes up again (see NodeRecord.from_document)
+RETRIEVAL_QUERY = (
+    "RETURN node.text AS text, score, "
+    "node {.*, text: Null, embedding: Null, node_id: id(node), node_labels: labels(node)} AS metadata"
+)
+
+
+def hybrid_rerank(hits, k, similarity_threshold, vector):
+    """
+    Rerank full-text matches by the cosine of their stored embeddings to the query's embedding.
+
+    Args:
+        hits (List[tuple]): (node, lexical score, embedding) tuples, best lexical match first.
+        k (int): Maximum number of results.
+        similarity_threshold (float): Only return matches scoring above this.
+        vector (List[float]): Embedding of the query.
+
+    Returns:
+        List[tuple]: (node, score) tuples, best first. Scores are scaled like Neo4j's cosine index.
+    """
+    hits = [hit for hit in hits if hit[2] is not None]
+    if not hits:
+        return []
+    matrix = normalize_rows([embedding for _, _, embedding in hits])
+    scores = (1 + matrix @ normalize_rows([vector])[0]) / 2
+    order = np.argsort(-scores, kind="stable")
+    return [(hits[index][0], float(scores[index])) for index in order if scores[index] > similarity_threshold][:k]
+
+
+def save_documents(
+        graph,
+        documents,
+        embed_documents,
+        node_label,
+        index_name=None,
+        text_node_property="text",
+        embedding_node_property="embedding",
+        create_id_index=True,
+        force=False,
+        link_similar=None,
+        similarity_threshold=None,
+        max_nodes=None
+    ):
+    """
+    Embed and save the documents that are not on a graph yet (by content hash).
+
+    Shared by the vector stores of all backends, which only differ in how they build the
+    documents and embed texts. All documents are looked up with one batched hash query, all
+    new texts are embedded with one `embed_documents` call and written with one
+    `graph.create_nodes_bulk` call (or queued, inside graph.write_behind()).
+
+    Args:
+        graph (Graph): Graph to write to.
+        documents (List[Document]): Documents to save.
+        embed_documents (callable): Returns one embedding per text of a list.
+        node_label (str): Label of the nodes.
+        See VectorStore.add_documents for the other arguments.
+
+    Returns:
+        List[str]: IDs of the saved or existing nodes, in input order, or None.
+    """
+    hash_property = graph.hash_property
+    hashes = [content_hash(document.page_content) for document in documents]
+    graph.ensure_content_hash_constraint(node_label)
+    if create_id_index:
+        graph.ensure_id_constraint(node_label)
+    existing_nodes = graph.find_nodes_by_content_hashes(hashes, node_label=node_label, projection=[hash_property, "id"])
+
+    created_nodes = []
+    pending_documents = []
+    pending_hashes = set()
+    for document, document_hash in zip(documents, hashes):
+        node = existing_nodes.get(document_hash)
+
+        if node is not None and force and document_hash not in pending_hashes and not node.get("id"):
+            # Nodes are overwritten by their id, and a new node would break the content hash constraint
+            graph.error_handler.warning(f"Cannot overwrite node {node.id} without an id, keeping it")
+            created_nodes.append(node.id)
+        elif node is not None and (not force or document_hash in pending_hashes):
+            graph.error_handler.debug_info(f"Node already exists")
+            created_nodes.append(node.id)  # Use the ID of the existing node
+        else:
+            # Leave the caller's document untouched
+            metadata = {**document.metadata, hash_property: document_hash}
+            # Forced documents overwrite the existing node in place
+            new_node_id = node.get("id") if node is not None else str(uuid.uuid1())
+            pending_documents.append((new_node_id, document.page_content, metadata))
+            pending_hashes.add(document_hash)
+            created_nodes.append(new_node_id)  # Use the ID of the node that is about to be added
+            # Duplicates within the same batch resolve to the same new node
+            existing_nodes[document_hash] = NodeRecord(new_node_id)
+
+    if pending_documents:
+        embeddings = embed_documents([text for _, text, _ in pending_documents])
+        rows = [
+            {"id": node_id, "text": text, "metadata": metadata, "embedding": embedding}
+            for (node_id, text, metadata), embedding in zip(pending_documents, embeddings)
+        ]
+        created = graph.create_nodes_bulk(
+            rows,
+            node_label,
+            text_node_property,
+            embedding_node_property,
+            link_similar=link_similar,
+            similarity_threshold=similarity_threshold,
+            max_nodes=max_nodes,
+            index_name=index_name
+        )
+        if created is False:
+            graph.error_handler.warning(f"Error saving {len(rows)} documents")
+            return None
+        graph.error_handler.debug_info(f"Saved {len(rows)} documents, {len(documents) - len(rows)} already existed")
+
+    return created_nodes or None
 
-from functions.embeddings import Embeddings
 
 class VectorStore:
+    """
+    Vector index access for a Graph.
+
+    Creating a VectorStore is cheap: the Neo4jVector handle for an index is looked up
+    lazily in the process-wide registry (see database.vector_indexes), so all stores
+    for the same index share one handle and one driver.
+    """
     def __init__(
             self, 
             index_name=None, 
@@ -17,9 +146,18 @@ class VectorStore:
         self.error_handler = error_handler()
         self.config = config()
         self.neo4j_config = config().get_neo4j_config()
-        self.embeddings = Embeddings()
+        self.embeddings = vector_indexes.embeddings()
         self.embeddings_model = self.embeddings.model
-        self.vector_index = self.select_vector_store(index_name=index_name, node_label=node_label)
+        self.index_name, self.node_label = self._index_key(index_name, node_label)
+
+    @property
+    def vector_index(self):
+        return self.select_vector_store(index_name=self.index_name, node_label=self.node_label)
+
+    def _index_key(self, index_name=None, node_label=None):
+        # The label names the index ("vector" if neither is given), and indexes are opened with the index name as label
+        index_name = index_name or node_label or "vector"
+        return index_name, index_name
 
     def initialize_vector_store(
             self, 
@@ -29,7 +167,7 @@ class VectorStore:
         if index_name:
             node_label = index_name
             try:
-                self.vector_index = Neo4jVector.from_existing_index(
+                vector_index = Neo4jVector.from_existing_index(
                     embedding=self.embeddings_model,
                     username=self.neo4j_config['USER'],
                     password=self.neo4j_config['PASSWORD'],
@@ -38,8 +176,10 @@ class VectorStore:
                     embedding_node_property="embedding",
                     index_name=index_name,
                     node_label=node_label,
+                    retrieval_query=RETRIEVAL_QUERY,
                 )
                 self.error_handler.debug_info(f"Initialized vector store with index {index_name} and label {node_label}")
+                return vector_index
             except Exception as e:
                 self.error_handler.warning(f"Error initializing vector store with index {index_name}")
                 self.error_handler.debug_info(f"{e}")
@@ -47,7 +187,7 @@ class VectorStore:
                 # Initialize emtpy vector store to make sure the index is created
                     self.error_handler.debug_info(f"Initializing empty vector store for index {index_name}")
                     try:
-                        self.vector_index = Neo4jVector.from_documents(
+                        return Neo4jVector.from_documents(
                             documents=[
                                 Document(
                                     page_content=" ",
@@ -61,16 +201,17 @@ class VectorStore:
                             embedding_node_property="embedding",  # embedding by default
                             index_name=index_name,
                             node_label=node_label,
+                            retrieval_query=RETRIEVAL_QUERY,
                         )
-                        return self.vector_index
                     
                     except Exception as e:
                         self.error_handler.warning(f"Error initializing empty vector store for index {index_name}: {e}")
                         self.error_handler.exception(sys.exc_info())
                         return None
+                return None
         else:
             self.error_handler.debug_info(f"Initializing default vector store")
-            self.vector_index = Neo4jVector.from_texts(
+            return Neo4jVector.from_texts(
                 texts=[],
                 embedding=self.embeddings_model,
                 username=self.neo4j_config['USER'],
@@ -79,46 +220,38 @@ class VectorStore:
                 database=self.neo4j_config['DATABASE'],  # neo4j by default
                 embedding_node_property="embedding",  # embedding by default
                 index_name="vector",  # vector by default
+                retrieval_query=RETRIEVAL_QUERY,
             )
-        return self.vector_index
     
+    def _shared_driver(self):
+        # The driver of the graph's connection pool, shared by the index handles
+        graph_database = getattr(self.graph, "graph_database", None)
+        return getattr(graph_database, "driver", None)
+
     def select_vector_store(
             self, 
             index_name=None, 
             node_label=None
         ):
+        """
+        Make the given index the current one and return its shared Neo4jVector handle.
+        """
+        index_name, node_label = self._index_key(index_name, node_label)
+        if index_name != self.index_name:
+            self.error_handler.debug_info(f"Loading vector store with index [green]{index_name}[/green]")
+        self.index_name, self.node_label = index_name, node_label
 
         try:
-            vector_index = self.vector_index
-        except AttributeError:
-            vector_index = None
-
-        if not index_name:
-            if node_label:
-                index_name = node_label
-            else:
-                index_name = "vector"
-
-        if vector_index:
-            if vector_index.index_name != index_name:
-                self.error_handler.debug_info(f"Different vector store was requested.")
-                self.error_handler.debug_info(f"Current vector store: {vector_index.index_name}")
-                self.error_handler.debug_info(f"Loading vector store with index [green]{index_name}[/green]")
-                self.vector_index = self.initialize_vector_store(index_name=index_name, node_label=node_label)
-            else:
-                # self.error_handler.debug_info(f"Requested vector store is already loaded: [green]{self.vector_index.index_name}[/green]")
-                self.error_handler.debug_info(f"Requested vector store is already loaded: [green]{self.vector_index.index_name}[/green]")
-        else:
-            try:
-                self.vector_index = self.initialize_vector_store(index_name=index_name, node_label=node_label)
-            except Exception as e:
-                self.error_handler.warning(f"Error loading vector store with index {index_name}: {e}")
-                self.error_handler.exception(sys.exc_info())
-                return None
-
-        if self.vector_index:
-            return self.vector_index
-        else:
+            return vector_indexes.get(
+                self.neo4j_config['DATABASE'],
+                index_name,
+                node_label,
+                lambda: self.initialize_vector_store(index_name=index_name, node_label=node_label),
+                driver=self._shared_driver()
+            )
+        except Exception as e:
+            self.error_handler.warning(f"Error loading vector store with index {index_name}: {e}")
+            self.error_handler.exception(sys.exc_info())
             return None
 
     
@@ -131,10 +264,31 @@ class VectorStore:
             text_node_property="text",
             embedding_node_property="embedding",
             create_id_index=True,
-            force=False
+            force=False,
+            link_similar=None,
+            similarity_threshold=None,
+            max_nodes=None
         ):
+        """
+        Embed and save documents that are not on the graph yet (by content hash).
+
+        Args:
+            text (str or List[str], optional): Text(s) to save.
+            documents (Document or List[Document], optional): Documents to save.
+            node_label (str, optional): Label of the nodes. Defaults to "Chunk".
+            index_name (str, optional): Name of the vector index. Defaults to the node label.
+            create_id_index (bool, optional): Create the uniqueness constraint on the node UIDs. Defaults to True.
+            force (bool, optional): Re-embed and rewrite documents that already exist, keeping their UIDs. Defaults to False.
+            link_similar (bool, optional): If True, link the new nodes to their most similar nodes in the
+                same transaction (see Graph.create_nodes_bulk). Defaults to SIMILARITY_GRAPH.LINK_ON_INSERT.
+            similarity_threshold (float, optional): Only link neighbors scoring above this.
+            max_nodes (int, optional): Maximum number of neighbors to link per node.
 
+        Returns:
+            List[str]: IDs of the saved or existing nodes, in input order, or None.
+        """
         self.error_handler.debug_info(f"--- Inside function {sys._getframe().f_code.co_name}")
+        # Opening the handle makes sure the vector index exists
         self.vector_store = self.select_vector_store(index_name=index_name, node_label=node_label)            
 
         if not index_name:
@@ -143,7 +297,7 @@ class VectorStore:
         if text and not documents:
             if not isinstance(text, list):
                 text = [text]
-            documents = Embeddings().create_documents(text)
+            documents = self.embeddings.create_documents(text)
         elif documents:
             if not isinstance(documents, list):
                 documents = [documents]
@@ -151,41 +305,20 @@ class VectorStore:
             self.error_handler.warning(f"No text or document provided")
             return None
             
-        created_nodes = []
-
-        for document in documents:
-            node = None
-            try:
-                node = self.graph.find_nodes_by_properties(
-                    {text_node_property: document.page_content},
-                    node_label=node_label,
-                )[0]
-            except IndexError:
-                pass
-
-            if node:
-                self.error_handler.debug_info(f"Node already exists")
-                created_nodes.append(node.id)  # Use the ID of the existing node
-            else:
-                new_node_id = self.vector_index.add_documents(
-                    [document],
-                    embedding=self.embeddings_model,
-                    username=self.neo4j_config['USER'],
-                    password=self.neo4j_config['PASSWORD'],
-                    url=self.neo4j_config['URI'],
-                    database=self.neo4j_config['DATABASE'],
-                    embedding_node_property=embedding_node_property,
-                    index_name=index_name,
-                    node_label=node_label,
-                    text_node_property=text_node_property,
-                    create_id_index=create_id_index,
-                )[0]
-                created_nodes.append(new_node_id)  # Use the ID of the newly added node
-
-        if created_nodes:
-            return created_nodes
-        else:
-            return None
+        return save_documents(
+            self.graph,
+            documents,
+            self.embeddings.embed_documents,
+            node_label,
+            index_name=index_name,
+            text_node_property=text_node_property,
+            embedding_node_property=embedding_node_property,
+            create_id_index=create_id_index,
+            force=force,
+            link_similar=link_similar,
+            similarity_threshold=similarity_threshold,
+            max_nodes=max_nodes
+        )
 
     
     def find_document_by_text(
@@ -220,18 +353,42 @@ class VectorStore:
             k=5, 
             similarity_threshold=None,
             index_name=None,
-            node_label=None
+            node_label=None,
+            mode=None
         ):
-        self.error_handler.debug_info(f"--- Inside function {sys._getframe().f_code.co_name}")
+        """
+        Find the documents most similar to a text.
 
-        # Initialize the vector store for the correct label
-        vector_store = self.select_vector_store(index_name=index_name, node_label=node_label)
+        With mode "hybrid" (default HYBRID_SEARCH.MODE) and the query's embedding in the embedding
+        cache, the label's full-text index is asked first and its matches are reranked with their
+        stored embeddings (see hybrid_rerank), so repeated keyword and title lookups cost no
+        embedding call and no vector index query. If the query is not cached, or fewer than
+        HYBRID_SEARCH.MIN_HITS matches score above the threshold, it falls back to vector search.
+
+        Returns:
+            List[tuple]: (document, score) tuples, best first.
+        """
+        self.error_handler.debug_info(f"--- Inside function {sys._getframe().f_code.co_name}")
 
         if not similarity_threshold:
             similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
 
         if not isinstance(text, str):
             text = str(text)
+
+        if (mode or self.config.get_config().get("HYBRID_SEARCH", {}).get("MODE", "vector")) == "hybrid":
+            neighbors = self._hybrid_search(text, k, similarity_threshold, index_name, node_label)
+            if neighbors is not None:
+                return [(self._to_document(node), score) for node, score in neighbors]
+
+        # Answer from the in-process mirror if it is enabled
+        local_index = self._local_index(index_name, node_label)
+        if local_index is not None:
+            vector = self.embeddings_model.embed_query(text)
+            return [(self._to_document(node), score) for node, score in local_index.search(vector, k=k, similarity_threshold=similarity_threshold)]
+
+        # Make the label's index the current one, which self.vector_index searches
+        self.select_vector_store(index_name=index_name, node_label=node_label)
         
         self.error_handler.debug_info(f"Searching for similar documents to {text}")
         try:
@@ -248,3 +405,156 @@ class VectorStore:
             self.error_handler.warning(f"Error performing k-NN search: {e}")
             self.error_handler.exception(sys.exc_info())
 
+
+    def similarity_search_many(
+            self,
+            texts,
+            k=5,
+            similarity_threshold=None,
+            index_name=None,
+            node_label=None
+        ):
+        """
+        Like similarity_search_by_text, for many query texts at once.
+
+        All texts are embedded in batched requests, and the kNN lookups run as one UNWIND
+        query per batch of NEO4J.BATCH_SIZE vectors instead of one round trip per text.
+
+        Returns:
+            List[List[tuple]]: (document, score) tuples per text, best first, in the order of the texts.
+        """
+        return [
+            [(self._to_document(node), score) for node, score in neighbors]
+            for neighbors in self.similarity_search_nodes_many(texts, k, similarity_threshold, index_name, node_label)
+        ]
+
+    def similarity_search_nodes_many(
+            self,
+            texts,
+            k=5,
+            similarity_threshold=None,
+            index_name=None,
+            node_label=None
+        ):
+        """
+        Like similarity_search_many, but return the graph nodes of the results.
+
+        Returns:
+            List[List[tuple]]: (node, score) tuples per text, best first, in the order of the texts.
+        """
+        if not similarity_threshold:
+            similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
+        texts = [text if isinstance(text, str) else str(text) for text in texts]
+        if not texts:
+            return []
+
+        self.error_handler.debug_info(f"Searching for similar documents to {len(texts)} texts")
+        vectors = self.embeddings.embed_documents(texts)
+        local_index = self._local_index(index_name, node_label)
+        if local_index is not None:
+            return [local_index.search(vector, k=k, similarity_threshold=similarity_threshold) for vector in vectors]
+        index_name, node_label = self._index_key(index_name or self.index_name, node_label)
+        return self.graph.find_similar_nodes_by_vectors(vectors, k=k, index_name=index_name, similarity_threshold=similarity_threshold)
+
+    def _to_document(self, node):
+        # Same document shape as the results of RETRIEVAL_QUERY
+        metadata = {key: value for key, value in node.items() if key != "text"}
+        metadata.update(node_id=node.id, node_labels=list(node.labels))
+        return Document(page_content=node.get("text") or "", metadata=metadata)
+
+    def _hybrid_search(self, text, k, similarity_threshold, index_name=None, node_label=None):
+        # Full-text matches reranked with their stored embeddings, or None to fall back to vector search
+        hybrid_config = self.config.get_config().get("HYBRID_SEARCH", {})
+
+        # Scores are only cosines to the query if its own embedding is used, and it must cost no API call
+        cached = getattr(self.embeddings_model, "cached", None)
+        vector = cached(text) if cached is not None else None
+        if vector is None:
+            self.error_handler.debug_info("Query embedding is not cached, falling back to vector search")
+            return None
+
+        index_name, node_label = self._index_key(index_name or self.index_name, node_label)
+        hits = self.graph.find_nodes_by_fulltext(text, node_label, limit=hybrid_config.get("CANDIDATES", 50), with_embeddings=True)
+        neighbors = hybrid_rerank(hits, k, similarity_threshold, vector)
+        if len(neighbors) < int(hybrid_config.get("MIN_HITS", 1)):
+            self.error_handler.debug_info(f"Found {len(neighbors)} full-text matches, falling back to vector search")
+            return None
+        self.error_handler.debug_info(f"Found {len(neighbors)} neighbors in the full-text index")
+        return neighbors
+
+    def _local_index(self, index_name=None, node_label=None):
+        # The graph's local mirror of the index label if LOCAL_INDEX.ENABLED, otherwise None
+        if self.graph is None or not self.config.get_config().get("LOCAL_INDEX", {}).get("ENABLED", False):
+            return None
+        index_name, node_label = self._index_key(index_name or self.index_name, node_label)
+        return self.graph.local_index(node_label)
+
+    def similarity_search_nodes_by_text(
+            self,
+            text,
+            k=5,
+            similarity_threshold=None,
+            index_name=None,
+            node_label=None,
+            mode=None
+        ):
+        """
+        Like similarity_search_by_text, but return the graph nodes of the results.
+
+        The node IDs and labels come back with the search (see RETRIEVAL_QUERY), so no
+        node has to be looked up by its text.
+
+        Returns:
+            List[tuple]: (node, score) tuples, best first.
+        """
+        neighbors = self.similarity_search_by_text(
+            text,
+            k=k,
+            similarity_threshold=similarity_threshold,
+            index_name=index_name,
+            node_label=node_label,
+            mode=mode
+        )
+        nodes = [(NodeRecord.from_document(document), score) for document, score in neighbors or []]
+        return [(node, score) for node, score in nodes if node is not None]
+
+    def similarity_search_by_node_id(
+            self,
+            node_id,
+            k=5,
+            similarity_threshold=None,
+            index_name=None,
+            node_label=None
+        ):
+        """
+        Find the neighbors of a node using the embedding stored on it, without embedding any text.
+
+        Returns:
+            List[tuple]: (node, score) tuples of the graph's neighbor nodes, best first.
+        """
+        if not similarity_threshold:
+            similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
+        index_name, node_label = self._index_key(index_name or self.index_name, node_label)
+        return self.graph.find_similar_nodes(node_id, k=k, index_name=index_name, similarity_threshold=similarity_threshold)
+
+    def similarity_search_by_vector(
+            self,
+            vector,
+            k=5,
+            similarity_threshold=None,
+            index_name=None,
+            node_label=None
+        ):
+        """
+        Find the nodes closest to an embedding vector.
+
+        Returns:
+            List[tuple]: (node, score) tuples of the graph's nodes, best first.
+        """
+        if not similarity_threshold:
+            similarity_threshold = self.config.get_vector_index_config()["SIMILARITY_THRESHOLD"]
+        local_index = self._local_index(index_name, node_label)
+        if local_index is not None:
+            return local_index.search(vector, k=k, similarity_threshold=similarity_threshold)
+        index_name, node_label = self._index_key(index_name or self.index_name, node_label)
+        return self.graph.find_similar_nodes_by_vector(vector, k=k, index_name=index_name, similarity_threshold=similarity_threshold)
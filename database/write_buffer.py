@@ -0,0 +1,239 @@
+import sys
+import time
+import threading
+from utils.error_handler import ErrorHandler
+from utils.config_loader import ConfigLoader as config
+
+error_handler = ErrorHandler()
+
+
+def _run_batches(tx, batches):
+    # Run all queued queries in the same transaction and consume their results
+    return [[record for record in tx.run(query, params)] for kind, query, params, length in batches]
+
+
+class WriteBuffer:
+    """
+    Write-behind buffer for Graph writes.
+
+    While the buffer is active, `update_node_properties`, `link_nodes*` and `create_nodes_bulk`
+    on the graph only queue their writes. On flush, the queued writes are grouped by kind,
+    turned into UNWIND batches and committed in a single transaction. The buffer flushes when
+    it holds `max_size` operations, when a write arrives more than `max_interval` seconds after
+    the last flush, and when the context manager exits. Writes of a failed flush stay queued
+    for the next one; if the final flush on exit fails, the context manager raises.
+
+    Usage:
+        with graph.write_behind() as buffer:
+            for section_id, properties in updates.items():
+                graph.update_node_properties(section_id, properties)
+        print(buffer.stats)
+    """
+    def __init__(self, graph, max_size=None, max_interval=None):
+        buffer_config = config().get_config().get("WRITE_BUFFER", {})
+        self.graph = graph
+        self.error_handler = error_handler
+        self.max_size = int(max_size or buffer_config.get("MAX_SIZE", 5000))
+        self.max_interval = float(max_interval or buffer_config.get("MAX_INTERVAL", 5))
+
+        self._lock = threading.RLock()
+        self._previous_buffer = None
+        self._last_flush = time.monotonic()
+        self.last_error = None
+        # UID of every queued node by (label, content hash), until its flush succeeds
+        self._queued_hashes = {}
+        self._clear()
+
+        self.stats = {
+            "flushes": 0,
+            "operations": 0,
+            "queries": 0,
+            "failed": 0,
+            "links": {"created": 0, "updated": 0, "skipped": 0, "failed": 0},
+            "last_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+        }
+
+    def __enter__(self):
+        self._previous_buffer = self.graph.write_buffer
+        self.graph.write_buffer = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            flushed = self.flush()
+        finally:
+            self.graph.write_buffer = self._previous_buffer
+        # Do not mask an exception raised inside the block
+        if not flushed and exc_type is None:
+            raise RuntimeError(f"{len(self)} buffered writes could not be written") from self.last_error
+
+    def __len__(self):
+        return self._size
+
+    def _clear(self):
+        self.updates = []
+        self.links = {}
+        self.nodes = {}
+        self._size = 0
+
+    def _requeue(self, updates, links, nodes, size):
+        # Put the writes of a failed flush back in front of the writes queued since
+        with self._lock:
+            self.updates = updates + self.updates
+            for key, pairs in links.items():
+                self.links[key] = pairs + self.links.get(key, [])
+            for key, rows in nodes.items():
+                self.nodes[key] = rows + self.nodes.get(key, [])
+            self._size += size
+
+    def add_update(self, node_id, properties):
+        """
+        Queue a property update for one node.
+        """
+        with self._lock:
+            self.updates.append((node_id, properties))
+            self._size += 1
+        self._maybe_flush()
+
+    def add_links(self, pairs, relationship_name="LINKS_TO", edge_values=None, force=False, bidirectional=False):
+        """
+        Queue node pairs to link. Pairs with the same relationship options are linked together on flush.
+
+        Raises:
+            ValueError: If the relationship type is not on the allowlist, so it cannot fail the flush.
+        """
+        self.graph.queries.relationship(relationship_name)
+        # Resolve shared edge values now, so pairs queued with different values can share a batch
+        if edge_values:
+            pairs = [(pair[0], pair[1], {**edge_values, **(pair[2] if len(pair) > 2 and pair[2] else {})}) for pair in pairs]
+        with self._lock:
+            self.links.setdefault((relationship_name, force, bidirectional), []).extend(pairs)
+            self._size += len(pairs)
+        self._maybe_flush()
+
+    def add_nodes(self, rows, node_label, text_node_property="text", embedding_node_property="embedding", link_options=None, index_name=None):
+        """
+        Queue nodes to create (see Graph.create_nodes_bulk for the row format). With link_options,
+        a (k, similarity_threshold) tuple, the new nodes are linked to their similar nodes on flush.
+
+        A row with the content hash of a queued node of the same label is dropped, since the
+        uniqueness constraint on the hash would reject the whole flush.
+
+        Returns:
+            List[str]: UIDs of the nodes, in the order of the rows.
+        """
+        hash_property = self.graph.hash_property
+        node_ids, queued = [], []
+        with self._lock:
+            for row in rows:
+                digest = row.get("metadata", {}).get(hash_property)
+                if digest and (node_label, digest) in self._queued_hashes:
+                    node_ids.append(self._queued_hashes[(node_label, digest)])
+                    continue
+                if digest:
+                    self._queued_hashes[(node_label, digest)] = row["id"]
+                node_ids.append(row["id"])
+                queued.append(row)
+            self.nodes.setdefault((node_label, text_node_property, embedding_node_property, link_options, index_name), []).extend(queued)
+            self._size += len(queued)
+        self._maybe_flush()
+        return node_ids
+
+    def queued_nodes(self, hashes, node_label):
+        """
+        Return a dict of content hash to UID for the given hashes of queued nodes of a label.
+        """
+        with self._lock:
+            return {digest: self._queued_hashes[(node_label, digest)] for digest in hashes if (node_label, digest) in self._queued_hashes}
+
+    def _committed(self, nodes):
+        # The nodes of a successful flush are on the graph now, so their hashes may enter the Bloom filters
+        hash_property = self.graph.hash_property
+        for (node_label, *options), rows in nodes.items():
+            hashes = [row["metadata"][hash_property] for row in rows if row.get("metadata", {}).get(hash_property)]
+            for digest in hashes:
+                self._queued_hashes.pop((node_label, digest), None)
+            self.graph.register_content_hashes(hashes, node_label)
+
+    def _maybe_flush(self):
+        if self._size >= self.max_size or time.monotonic() - self._last_flush >= self.max_interval:
+            self.flush()
+
+    def _batches(self, updates, links, nodes, link_stats):
+        # The queries of a flush: nodes, links of new nodes, property updates, links
+        batches = []
+        for (node_label, text_node_property, embedding_node_property, link_options, index_name), rows in nodes.items():
+            for query, params, length in self.graph._create_nodes_batches(rows, node_label, text_node_property, embedding_node_property):
+                batches.append(("nodes", query, params, length))
+        # Link new nodes once all of them exist, so they can be each other's neighbors
+        for (node_label, text_node_property, embedding_node_property, link_options, index_name), rows in nodes.items():
+            if link_options:
+                index_neighbors = self.graph._index_neighbors(rows, node_label, *link_options, index_name=index_name)
+                for query, params, length in self.graph._link_on_insert_batches(rows, *link_options, index_neighbors, stats=link_stats):
+                    batches.append((("links", "SIMILAR_TO"), query, params, length))
+        for query, params, length in self.graph._update_nodes_batches(updates):
+            batches.append(("updates", query, params, length))
+        for (relationship_name, force, bidirectional), pairs in links.items():
+            for query, params, length in self.graph._link_batches(pairs, relationship_name, None, force, bidirectional, None, link_stats):
+                batches.append((("links", relationship_name), query, params, length))
+        return batches
+
+    def flush(self):
+        """
+        Commit all queued writes in one transaction.
+
+        Nodes are created first (and linked to their similar nodes if requested), then properties
+        are updated and finally nodes are linked, so writes queued in that order may refer to
+        nodes created in the same flush.
+
+        If building the queries or the transaction fails, nothing is written and all writes stay
+        queued, so the next flush retries them.
+
+        Returns:
+            bool: True if the flush succeeded (or there was nothing to flush), False otherwise.
+        """
+        with self._lock:
+            updates, links, nodes, size = self.updates, self.links, self.nodes, self._size
+            self._clear()
+            self._last_flush = time.monotonic()
+
+        if not size:
+            return True
+
+        link_stats = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+        batches = []
+        started = time.monotonic()
+        # Building the batches reads the vector index, so it can fail like the write itself
+        try:
+            batches = self._batches(updates, links, nodes, link_stats)
+            results = self.graph.graph_database.execute_write(_run_batches, batches)
+        except Exception as e:
+            self.error_handler.warning(f"Error flushing {size} buffered writes: {e}")
+            self.error_handler.exception(sys.exc_info())
+            self.last_error = e
+            results = None
+
+        duration = time.monotonic() - started
+        with self._lock:
+            self.stats["flushes"] += 1
+            self.stats["operations"] += size
+            self.stats["queries"] += len(batches)
+            self.stats["last_flush_seconds"] = duration
+            self.stats["total_flush_seconds"] += duration
+
+            if results is None:
+                self.stats["failed"] += size
+                self._requeue(updates, links, nodes, size)
+                return False
+            self.last_error = None
+            self._committed(nodes)
+
+            for (kind, query, params, length), records in zip(batches, results):
+                if isinstance(kind, tuple):
+                    self.graph._count_links(link_stats, records, length, kind[1])
+            for key, value in link_stats.items():
+                self.stats["links"][key] += value
+
+        self.error_handler.debug_info(f"Flushed {size} buffered writes in {len(batches)} queries ({duration:.3f}s)")
+        return True
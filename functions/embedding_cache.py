@@ -0,0 +1,201 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.hashing import content_hash
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache keyed by (model name, content hash).
+
+    Vectors are stored as float32 blobs in a SQLite file, with a small in-memory LRU
+    in front. Lookups and inserts work on batches, so a batch of texts costs one query
+    each way. When the file holds more than `max_entries` vectors, the least recently
+    used ones are evicted down to 90% of `max_entries`. Hits (in memory or on disk) are
+    recorded in memory and written to the file with the next insert, every `touch_batch_size`
+    hits, or on close, so lookups do not commit.
+    """
+    def __init__(self, path, max_entries=1000000, memory_entries=10000, touch_batch_size=1000):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.memory_entries = int(memory_entries)
+        self.touch_batch_size = int(touch_batch_size)
+        self._memory = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, hash)
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._connection.commit()
+        # Upper bound of the number of rows; replaced rows are counted twice until the next eviction
+        self._count = self._connection.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model, hashes):
+        """
+        Return a dict of content hash to vector for the hashes that are cached.
+        """
+        found = {}
+        with self._lock:
+            now = time.time()
+            missing = []
+            for digest in dict.fromkeys(hashes):
+                vector = self._memory.get((model, digest))
+                if vector is not None:
+                    self._memory.move_to_end((model, digest))
+                    self._touched[(model, digest)] = now
+                    found[digest] = vector
+                else:
+                    missing.append(digest)
+
+            # SQLite limits the number of parameters per statement
+            for index in range(0, len(missing), 500):
+                batch = missing[index:index + 500]
+                rows = self._connection.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({', '.join('?' * len(batch))})",
+                    [model, *batch]
+                ).fetchall()
+                for digest, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    found[digest] = vector
+                    self._remember((model, digest), vector)
+                    self._touched[(model, digest)] = now
+
+            if len(self._touched) >= self.touch_batch_size:
+                self._write_touched()
+                self._connection.commit()
+        return found
+
+    def put_many(self, model, vectors):
+        """
+        Store a dict of content hash to vector.
+        """
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, digest, np.asarray(vector, dtype=np.float32).tobytes(), now) for digest, vector in vectors.items()]
+            )
+            for digest, vector in vectors.items():
+                self._remember((model, digest), list(vector))
+                self._touched.pop((model, digest), None)
+            self._count += len(vectors)
+            self._write_touched()
+            self._evict()
+            self._connection.commit()
+
+    def _write_touched(self):
+        if self._touched:
+            self._connection.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                [(last_used, model, digest) for (model, digest), last_used in self._touched.items()]
+            )
+            self._touched = {}
+
+    def _evict(self):
+        if self._count <= self.max_entries:
+            return
+        self._count = self._connection.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+        if self._count > self.max_entries:
+            # Evict a tenth more than needed, so a full cache does not evict on every insert
+            keep = self.max_entries - self.max_entries // 10
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (self._count - keep,)
+            )
+            self._count = keep
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._write_touched()
+            self._connection.commit()
+            self._connection.close()
+
+
+class CachedEmbeddings:
+    """
+    Puts an EmbeddingCache in front of a LangChain embeddings model.
+
+    Implements `embed_documents` and `embed_query`, so it can be used wherever the
+    model is, and forwards all other attributes to the model. Only texts that are not
+    cached are sent to the model, in one call.
+    """
+    def __init__(self, embeddings, cache, model_name=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        return getattr(self.embeddings, name)
+
+    def embed_documents(self, texts, chunk_size=0):
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, hashes)
+
+        # Embed each missing text once, even if it occurs several times
+        missing = {}
+        for text, digest in zip(texts, hashes):
+            if digest not in vectors and digest not in missing:
+                missing[digest] = text
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            if chunk_size:
+                embedded = self.embeddings.embed_documents(list(missing.values()), chunk_size=chunk_size)
+            else:
+                embedded = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), embedded))
+            self.cache.put_many(self.model_name, new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[digest] for digest in hashes]
+
+    def cached(self, text):
+        """
+        Return the cached embedding of a text without calling the model, or None if it is not cached.
+        """
+        digest = content_hash(text)
+        vector = self.cache.get_many(self.model_name, [digest]).get(digest)
+        if vector is not None:
+            self.hits += 1
+        return vector
+
+    def embed_query(self, text):
+        digest = content_hash(text)
+        vector = self.cache.get_many(self.model_name, [digest]).get(digest)
+        if vector is not None:
+            self.hits += 1
+            return vector
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many(self.model_name, {digest: vector})
+        return vector
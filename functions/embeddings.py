@@ -1,10 +1,15 @@
 
+import hashlib
+import math
+import re
+import tiktoken
 from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.document_loaders import TextLoader
 from langchain.schema.document import Document
 from utils.config_loader import ConfigLoader
 from schema.schemas import Timestamp
+from functions.embedding_cache import EmbeddingCache, CachedEmbeddings
 
 class Embeddings:
     def __init__(self, config_file='config/configuration.toml'):
@@ -21,6 +26,23 @@ class Embeddings:
             openai_api_key=openai_config.get('API_KEY')  # Get API key from configuration
         )
 
+        # Limits for batched embedding requests
+        embeddings_config = self.config_loader.get_config().get("EMBEDDINGS", {})
+        self.batch_size = int(embeddings_config.get("BATCH_SIZE", 1000))
+        self.max_tokens_per_request = int(embeddings_config.get("MAX_TOKENS_PER_REQUEST", 250000))
+        self._encoding = None
+
+        # Serve texts that were embedded before from the disk cache
+        if embeddings_config.get("CACHE", False):
+            self.model = CachedEmbeddings(
+                self.model,
+                EmbeddingCache(
+                    embeddings_config.get("CACHE_PATH", ".cache/embeddings.sqlite"),
+                    max_entries=embeddings_config.get("CACHE_MAX_ENTRIES", 1000000),
+                    memory_entries=embeddings_config.get("CACHE_MEMORY_ENTRIES", 10000)
+                )
+            )
+
         self.text_splitter = RecursiveCharacterTextSplitter(
             # TODO: make sure this confirms with the chunking strategy
             chunk_size = 1000,
@@ -62,3 +84,69 @@ class Embeddings:
 
     def get_embeddings(self, text):
         return self.model.embed_query(text)
+
+    def count_tokens(self, text):
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model.model)
+            except Exception:
+                # Without the tokenizer files, estimate conservatively. The lookup is not retried.
+                self._encoding = False
+        if self._encoding is False:
+            return len(text) // 3 + 1
+        return len(self._encoding.encode(text))
+
+    def batch_texts(self, texts):
+        """
+        Split texts into request-sized batches of at most EMBEDDINGS.BATCH_SIZE texts
+        and EMBEDDINGS.MAX_TOKENS_PER_REQUEST tokens. A text above the token limit gets its own batch.
+        """
+        batch, batch_tokens = [], 0
+        for text in texts:
+            tokens = self.count_tokens(text)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + tokens > self.max_tokens_per_request):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def embed_documents(self, texts):
+        """
+        Embed many texts with as few API requests as the token limits allow.
+
+        Returns:
+            List[List[float]]: One embedding per text, in input order.
+        """
+        embeddings = []
+        for batch in self.batch_texts(texts):
+            embeddings.extend(self.model.embed_documents(batch, chunk_size=len(batch)))
+        return embeddings
+
+
+class HashingEmbeddings:
+    """
+    Deterministic local embeddings for offline runs and tests.
+
+    Every token is hashed into one of `dimension` buckets with a random sign, and
+    the resulting vector is normalized. Texts that share words get similar vectors,
+    which is enough to exercise the similarity code paths without calling an API.
+    It is not a substitute for a semantic embedding model.
+    """
+    def __init__(self, dimension=1536):
+        self.dimension = int(dimension)
+
+    def _embed(self, text):
+        vector = [0.0] * self.dimension
+        for token in re.findall(r"\w+", (text or "").lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+            vector[digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
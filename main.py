@@ -4,14 +4,14 @@
 from functions.llm import SchemaTagger
 
 from utils.error_handler import ErrorHandler
+from utils.hashing import content_hash
 from schema.schemas import *
 from schema.prompts import Prompts as prompts
 
-from database.neo4j import Graph
-from database.vectorstore import VectorStore
+from database.backends import create_graph
 
 error_handler = ErrorHandler()
-graph = Graph()
+graph = create_graph()
 
 # read text from file: tests/documents/text1
 with open("tests/documents/text1", "r") as f:
@@ -59,13 +59,14 @@ document = Document(
 
 # Check if document already exists on graph
 try:
-    document_node = graph.find_nodes_by_properties(
-        {"text": text},
+    document_hash = content_hash(text)
+    document_node = graph.find_nodes_by_content_hashes(
+        [document_hash],
         node_label="Document"
-    )[0]
+    )[document_hash]
     document_id = document_node.id
     error_handler.success(f"Found document on graph: [blue]{document_id}[/blue].")
-except IndexError:
+except KeyError:
     error_handler.debug_info("Saving document to graph.")
 
     # Extract metadata
@@ -78,7 +79,7 @@ except IndexError:
 
     # Save document to graph
     try:
-        vector_store = VectorStore(index_name="Document", graph=graph)
+        vector_store = graph.get_vector_store(index_name="Document")
         document_id = vector_store.add_documents(
             documents=document,
             node_label="Document",
@@ -159,57 +160,76 @@ except Exception as e:
 
 
 document_summaries = ""
+section_updates = {}
+# Sections whose updates are written together; bounds what an LLM failure can lose
+section_update_batch_size = int(graph.config.get("PIPELINE", {}).get("SECTION_UPDATE_BATCH_SIZE", 500))
 
-error_handler.debug_info(f"Extracting summaries for sections.")
-for section in sections:
-    # Extract summaries
-    section_number = section["section_number"]
-    section_summaries = section_summarizer.tag(
-        text=section["text"],
-        status_message=f"Summarizing section {section_number}."
-    )
-    # Save summaries for generating document summary
-    document_summaries += section_summaries.summary_short + "\n"
-
-    # Convert Section object to dict
-    section_summaries = section_summaries.dict()
-    del section_summaries["required"]
-
-    # Combine document metadata with section text to avoid false classification
-    # TODO: check if this really works
-    metadata_context = f"""
-    Title: {document_node["title"]}
-    Topics: {document_node["topics"]}
-    Text: {section["text"]}
-    """.strip()
-
-    error_handler.inspect_object(metadata_context)
-
-    # Extract metadata for section
-    section_metadata = metadata_extractor.tag(
-        text=metadata_context,
-        status_message=f"Extracting metadata for section {section_number}."
-    )
-    section_metadata.last_indexed = Timestamp().now
-
-    # Convert Metadata object to dict
-    section_metadata = section_metadata.dict()
-    del section_metadata["required"]
 
-    # Update section on graph
-    error_handler.debug_info(f"Updating section {section.id} on graph.")
+def save_section_updates(section_updates):
+    # Update sections on graph
+    if not section_updates:
+        return
+    error_handler.debug_info(f"Updating {len(section_updates)} sections on graph.")
     try:
-        updated_section_id = graph.update_node_properties(
-            node_id=section.id,
-            properties={
-                **section_metadata,
-                **section_summaries
-            }
-        )
-        error_handler.success(f"Updated section {updated_section_id}.")
+        updated_sections = graph.update_nodes_properties(section_updates)
+        for section_id, updated in updated_sections.items():
+            if updated:
+                error_handler.success(f"Updated section {section_id}.")
+            else:
+                error_handler.debug_info(f"Error updating section {section_id}.")
     except Exception as e:
-        error_handler.debug_info(f"Error updating section {section.id}.")
+        error_handler.debug_info(f"Error updating sections.")
         error_handler.handle_error(e)
+    section_updates.clear()
+
+
+error_handler.debug_info(f"Extracting summaries for sections.")
+try:
+    for section in sections:
+        # Extract summaries
+        section_number = section["section_number"]
+        section_summaries = section_summarizer.tag(
+            text=section["text"],
+            status_message=f"Summarizing section {section_number}."
+        )
+        # Save summaries for generating document summary
+        document_summaries += section_summaries.summary_short + "\n"
+
+        # Convert Section object to dict
+        section_summaries = section_summaries.dict()
+        del section_summaries["required"]
+
+        # Combine document metadata with section text to avoid false classification
+        # TODO: check if this really works
+        metadata_context = f"""
+        Title: {document_node["title"]}
+        Topics: {document_node["topics"]}
+        Text: {section["text"]}
+        """.strip()
+
+        error_handler.inspect_object(metadata_context)
+
+        # Extract metadata for section
+        section_metadata = metadata_extractor.tag(
+            text=metadata_context,
+            status_message=f"Extracting metadata for section {section_number}."
+        )
+        section_metadata.last_indexed = Timestamp().now
+
+        # Convert Metadata object to dict
+        section_metadata = section_metadata.dict()
+        del section_metadata["required"]
+
+        # Collect section updates and write them in batches
+        section_updates[section.id] = {
+            **section_metadata,
+            **section_summaries
+        }
+        if len(section_updates) >= section_update_batch_size:
+            save_section_updates(section_updates)
+finally:
+    # Keep the summaries computed so far if summarizing a section fails
+    save_section_updates(section_updates)
 
 document_summaries = summary_extractor.tag(text=document_summaries)
 
@@ -0,0 +1,204 @@
+import asyncio
+import unittest
+from unittest import mock
+from neo4j.exceptions import ServiceUnavailable
+from database.async_neo4j import AsyncGraph, AsyncGraphDatabaseConnection
+
+
+class AsyncStubConnection:
+    """
+    Asyncio counterpart of the stub connection in test_graph: records the queries and
+    answers reads with `records` and writes with `written`, or with their result if they
+    are callables taking (query, parameters).
+    """
+    def __init__(self, records=None, written=None):
+        self.records = records
+        self.written = written
+        self.reads = []
+        self.writes = []
+
+    def _answer(self, result, query, parameters):
+        return result(query, parameters) if callable(result) else result
+
+    async def read(self, query, parameters={}):
+        self.reads.append((query, parameters))
+        return self._answer(self.records, query, parameters)
+
+    async def write(self, query, parameters={}):
+        self.writes.append((query, parameters))
+        return self._answer(self.written, query, parameters)
+
+    async def stream(self, query, parameters={}, fetch_size=None):
+        self.reads.append((query, parameters))
+        for record in self._answer(self.records, query, parameters) or []:
+            yield record
+
+    async def close(self):
+        pass
+
+
+class OfflineAsyncGraph(AsyncGraph):
+    def __init__(self, connection=None):
+        self._init_queries()
+        self.graph_database = connection or AsyncStubConnection()
+
+
+def child(position, uid):
+    return {"child": {"id": position, "labels": ["Section"], "properties": [["id", uid]]}}
+
+
+class TestAsyncGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = OfflineAsyncGraph()
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_runs_the_same_queries_as_graph(self):
+        self.graph.graph_database.records = [child(0, "a"), child(1, "b")]
+        nodes = self.run_async(self.graph.find_child_nodes("doc", node_label="Section", sequence_label="NEXT", limit=5))
+
+        self.assertEqual([node["id"] for node in nodes], ["a", "b"])
+        self.assertEqual(self.graph.graph_database.reads, [self.graph._child_nodes_query("doc", "Section", "NEXT", 0, 5)])
+
+    def test_failed_reads_return_nothing(self):
+        self.assertIsNone(self.run_async(self.graph.find_node_by_id("a")))
+        self.assertIsNone(self.run_async(self.graph.find_parent_node_by_id("a", parent_label="Document")))
+        self.assertEqual(self.run_async(self.graph.find_nodes_by_properties({"id": "a"})), [])
+        self.assertEqual(self.run_async(self.graph.find_child_nodes("doc")), [])
+        self.assertEqual(self.run_async(self.graph.find_edges_by_relationship("NEXT")), [])
+        self.assertEqual(self.run_async(self.graph.find_nodes_by_text(["A fox"], node_label="Section")), {})
+        self.assertEqual(self.run_async(self.graph.find_similar_nodes("a", k=3)), [])
+        self.assertEqual(self.run_async(self.graph.find_similar_nodes_by_vectors([[1.0, 0.0]], k=3, index_name="Section")), [[]])
+        self.assertEqual(self.run_async(self.graph.find_similar_nodes_in_scope("doc", "Section", node_id="a")), [])
+        self.assertFalse(self.run_async(self.graph.check_if_node_exists("a")))
+
+    def test_vector_search_requires_an_index(self):
+        with self.assertRaises(ValueError):
+            self.run_async(self.graph.find_similar_nodes_by_vector([1.0, 0.0]))
+        with self.assertRaises(ValueError):
+            self.run_async(self.graph.find_similar_nodes_in_scope("doc", "Section"))
+
+    def test_iter_child_nodes(self):
+        self.graph.graph_database.records = [child(0, "a"), child(1, "b")]
+
+        async def collect():
+            return [node.id async for node in self.graph.iter_child_nodes("doc", node_label="Section", sequence_label="NEXT")]
+
+        self.assertEqual(self.run_async(collect()), [0, 1])
+
+    def test_link_nodes_bulk(self):
+        self.graph.graph_database.written = lambda query, params: False if params["pairs"][0]["start_id"] == "c" else [{"created": 1, "updated": 1}]
+        stats = self.run_async(self.graph.link_nodes_bulk([("a", "b"), ("b", "c"), ("c", "d"), ("d", "d")], relationship_name="NEXT", force=True, batch_size=2))
+
+        self.assertEqual(stats, {"created": 1, "updated": 1, "skipped": 1, "failed": 1})
+        self.assertTrue(all(params["force"] for _, params in self.graph.graph_database.writes))
+        with self.assertRaises(ValueError):
+            self.run_async(self.graph.link_nodes_bulk([("a", "b")], relationship_name="OWNS"))
+
+    def test_link_nodes_sequentially(self):
+        self.graph.graph_database.written = lambda query, params: [{"created": len(params["pairs"]), "updated": 0}]
+        self.assertTrue(self.run_async(self.graph.link_nodes_sequentially(["a", "b", "c"], relationship_name="NEXT", close_loop=True)))
+
+        pairs = [(pair["start_id"], pair["end_id"]) for _, params in self.graph.graph_database.writes for pair in params["pairs"]]
+        self.assertEqual(pairs, [("a", "b"), ("b", "c"), ("c", "a")])
+        self.assertFalse(self.run_async(self.graph.link_nodes_sequentially(["a"])))
+
+    def test_update_nodes_properties(self):
+        self.graph.graph_database.written = lambda query, params: [{"node_id": row["node_id"]} for row in params["rows"] if row["node_id"] != "b"]
+        results = self.run_async(self.graph.update_nodes_properties({"a": {"title": "A"}, "b": {"title": "B"}, 3: {"title": "C"}}))
+
+        self.assertEqual(results, {"a": True, "b": False, 3: True})
+        self.assertEqual(len(self.graph.graph_database.writes), 2)
+
+
+class FakeAsyncResult:
+    def __init__(self, records):
+        self.records = records
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self.records():
+            yield record
+
+
+class FakeAsyncTransaction:
+    def __init__(self, records):
+        self.records = records
+
+    async def run(self, query, parameters):
+        return FakeAsyncResult(self.records)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class FakeAsyncSession:
+    def __init__(self, records):
+        self.records = records
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def execute_read(self, work, *args, **kwargs):
+        return await work(FakeAsyncTransaction(self.records), *args, **kwargs)
+
+    async def execute_write(self, work, *args, **kwargs):
+        return await work(FakeAsyncTransaction(self.records), *args, **kwargs)
+
+    async def begin_transaction(self):
+        return FakeAsyncTransaction(self.records)
+
+
+class FakeAsyncDriver:
+    def __init__(self, records):
+        self.records = records
+
+    def session(self, **options):
+        return FakeAsyncSession(self.records)
+
+
+class TestAsyncGraphDatabaseConnection(unittest.TestCase):
+
+    def connect(self, records):
+        with mock.patch("database.async_neo4j.AsyncGraphDatabase.driver", return_value=FakeAsyncDriver(records)):
+            return AsyncGraphDatabaseConnection("bolt://localhost:7687", "neo4j", "secret")
+
+    def test_read_write_and_stream(self):
+        connection = self.connect(lambda: [{"n": 1}, {"n": 2}])
+
+        async def collect():
+            return [record async for record in connection.stream("MATCH (n) RETURN n")]
+
+        self.assertEqual(asyncio.run(connection.read("MATCH (n) RETURN n")), [{"n": 1}, {"n": 2}])
+        self.assertEqual(asyncio.run(connection.write("CREATE (n)")), [{"n": 1}, {"n": 2}])
+        self.assertEqual(asyncio.run(collect()), [{"n": 1}, {"n": 2}])
+
+    def test_errors(self):
+        def records():
+            yield {"n": 1}
+            raise ServiceUnavailable("connection lost")
+        connection = self.connect(records)
+
+        async def collect(streamed):
+            async for record in connection.stream("MATCH (n) RETURN n"):
+                streamed.append(record)
+
+        self.assertIsNone(asyncio.run(connection.read("MATCH (n) RETURN n")))
+        self.assertIs(asyncio.run(connection.write("CREATE (n)")), False)
+        streamed = []
+        with self.assertRaises(ServiceUnavailable):
+            asyncio.run(collect(streamed))
+        self.assertEqual(streamed, [{"n": 1}])
+
+if __name__ == '__main__':
+    unittest.main()
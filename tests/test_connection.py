@@ -0,0 +1,153 @@
+import unittest
+from unittest import mock
+from neo4j import READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import ServiceUnavailable
+from database.neo4j import GraphDatabaseConnection
+
+
+class FakeTransaction:
+    def __init__(self, session):
+        self.session = session
+
+    def run(self, query, parameters):
+        self.session.queries.append((query, parameters))
+        return iter(self.session.results())
+
+
+class FakeSession:
+    """
+    Pooled session of FakeDriver: runs units of work with a FakeTransaction whose queries
+    return `results()`.
+    """
+    def __init__(self, results, **options):
+        self.results = results
+        self.options = options
+        self.queries = []
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+    def execute_read(self, work, *args, **kwargs):
+        return work(FakeTransaction(self), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(FakeTransaction(self), *args, **kwargs)
+
+    def begin_transaction(self):
+        return FakeExplicitTransaction(self)
+
+
+class FakeExplicitTransaction(FakeTransaction):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class FakeDriver:
+    def __init__(self, results):
+        self.results = results
+        self.sessions = []
+        self.closed = False
+
+    def session(self, **options):
+        session = FakeSession(self.results, **options)
+        self.sessions.append(session)
+        return session
+
+    def close(self):
+        self.closed = True
+
+
+def fail(error):
+    def results():
+        raise error
+    return results
+
+
+def fail_after(records, error):
+    def results():
+        yield from records
+        raise error
+    return results
+
+
+class TestGraphDatabaseConnection(unittest.TestCase):
+
+    def connect(self, results=lambda: [{"n": 1}, {"n": 2}], **options):
+        self.driver = FakeDriver(results)
+        with mock.patch("database.neo4j.GraphDatabase.driver", return_value=self.driver) as driver:
+            connection = GraphDatabaseConnection("bolt://localhost:7687", "neo4j", "secret", database="graph", **options)
+        self.driver_options = driver.call_args
+        return connection
+
+    def test_driver_pool_options(self):
+        self.connect(max_connection_pool_size="20", max_transaction_retry_time="5")
+        self.assertEqual(self.driver_options.args, ("bolt://localhost:7687",))
+        self.assertEqual(self.driver_options.kwargs, {"auth": ("neo4j", "secret"), "max_connection_pool_size": 20, "max_transaction_retry_time": 5.0})
+
+    def test_read_and_write_borrow_a_session_per_call(self):
+        connection = self.connect(fetch_size="50")
+
+        self.assertEqual(connection.read("MATCH (n) RETURN n", {"id": 1}), [{"n": 1}, {"n": 2}])
+        self.assertEqual(connection.write("CREATE (n)"), [{"n": 1}, {"n": 2}])
+        read_session, write_session = self.driver.sessions
+        self.assertEqual(read_session.options, {"database": "graph", "default_access_mode": READ_ACCESS, "fetch_size": 50})
+        self.assertEqual(write_session.options["default_access_mode"], WRITE_ACCESS)
+        self.assertEqual(read_session.queries, [("MATCH (n) RETURN n", {"id": 1})])
+        self.assertTrue(read_session.closed and write_session.closed)
+
+    def test_failed_read_returns_none(self):
+        for error in (ServiceUnavailable("no routing servers"), ValueError("bad query")):
+            connection = self.connect(results=fail(error))
+            self.assertIsNone(connection.read("MATCH (n) RETURN n"))
+            self.assertTrue(self.driver.sessions[0].closed)
+
+    def test_failed_write_returns_false(self):
+        for error in (ServiceUnavailable("no routing servers"), ValueError("bad query")):
+            connection = self.connect(results=fail(error))
+            self.assertIs(connection.write("CREATE (n)"), False)
+
+    def test_close_releases_the_shared_driver(self):
+        connection = self.connect()
+        with mock.patch("database.neo4j.vector_indexes") as vector_indexes:
+            connection.close()
+        vector_indexes.release.assert_called_once_with(self.driver)
+        self.assertTrue(self.driver.closed)
+        self.assertIs(connection.driver, self.driver)
+
+    def test_stream_is_lazy_and_uses_the_fetch_size(self):
+        connection = self.connect()
+        records = connection.stream("MATCH (n) RETURN n", {"id": 1}, fetch_size=10)
+        self.assertEqual(self.driver.sessions, [])
+
+        self.assertEqual(next(records), {"n": 1})
+        [session] = self.driver.sessions
+        self.assertEqual(session.options, {"database": "graph", "default_access_mode": READ_ACCESS, "fetch_size": 10})
+        self.assertFalse(session.closed)
+        self.assertEqual(list(records), [{"n": 2}])
+        self.assertTrue(session.closed)
+
+    def test_closing_a_stream_returns_the_session(self):
+        connection = self.connect()
+        records = connection.stream("MATCH (n) RETURN n")
+        next(records)
+        records.close()
+        self.assertTrue(self.driver.sessions[0].closed)
+
+    def test_stream_reraises_errors_after_partial_results(self):
+        for error in (ServiceUnavailable("connection lost"), ValueError("bad query")):
+            connection = self.connect(results=fail_after([{"n": 1}], error))
+            records = connection.stream("MATCH (n) RETURN n")
+            self.assertEqual(next(records), {"n": 1})
+            with self.assertRaises(type(error)):
+                next(records)
+            self.assertTrue(self.driver.sessions[0].closed)
+
+if __name__ == '__main__':
+    unittest.main()
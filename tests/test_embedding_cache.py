@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from functions.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+class CountingEmbeddings:
+    model = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 0.5]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "embeddings.sqlite")
+        self.cache = EmbeddingCache(self.path, max_entries=100, memory_entries=2)
+        self.model = CountingEmbeddings()
+        self.embeddings = CachedEmbeddings(self.model, self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def test_only_missing_texts_are_embedded(self):
+        self.assertEqual(self.embeddings.embed_documents(["a", "bb"]), [[1.0, 0.5], [2.0, 0.5]])
+        self.assertEqual(self.embeddings.embed_documents(["bb", "ccc", "ccc"]), [[2.0, 0.5], [3.0, 0.5], [3.0, 0.5]])
+        self.assertEqual(self.model.calls, [["a", "bb"], ["ccc"]])
+
+        self.assertEqual(self.embeddings.embed_query("a"), [1.0, 0.5])
+        self.assertEqual(len(self.model.calls), 2)
+        self.assertEqual(self.embeddings.cached("bb"), [2.0, 0.5])
+        self.assertIsNone(self.embeddings.cached("dddd"))
+        self.assertEqual(len(self.model.calls), 2)
+
+    def test_cache_persists_on_disk(self):
+        self.embeddings.embed_documents(["a", "bb", "ccc"])
+        self.cache.close()
+
+        self.cache = EmbeddingCache(self.path)
+        embeddings = CachedEmbeddings(CountingEmbeddings(), self.cache)
+        self.assertEqual(embeddings.embed_documents(["ccc", "a"]), [[3.0, 0.5], [1.0, 0.5]])
+        self.assertEqual(embeddings.embeddings.calls, [])
+
+    def test_models_do_not_share_entries(self):
+        self.embeddings.embed_documents(["a"])
+        other = CachedEmbeddings(self.model, self.cache, model_name="other")
+        other.embed_documents(["a"])
+        self.assertEqual(len(self.model.calls), 2)
+
+    def test_evicts_least_recently_used(self):
+        cache = EmbeddingCache(os.path.join(self.directory, "small.sqlite"), max_entries=2)
+        cache.put_many("model", {"a": [1.0]})
+        cache.put_many("model", {"b": [2.0]})
+        cache.put_many("model", {"c": [3.0]})
+        self.assertEqual(len(cache), 2)
+        cache.close()
+
+    def test_memory_hits_count_as_use(self):
+        cache = EmbeddingCache(os.path.join(self.directory, "small.sqlite"), max_entries=3)
+        for digest in ("a", "b", "c"):
+            cache.put_many("model", {digest: [1.0]})
+        self.assertEqual(cache.get_many("model", ["a"]), {"a": [1.0]})
+        cache.put_many("model", {"d": [1.0]})
+        cache._memory.clear()
+        self.assertEqual(set(cache.get_many("model", ["a", "b", "c", "d"])), {"a", "c", "d"})
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from unittest import mock
+from functions.embeddings import Embeddings
+
+
+class TestEmbeddingBatches(unittest.TestCase):
+
+    def setUp(self):
+        self.embeddings = Embeddings()
+        self.embeddings.count_tokens = lambda text: len(text.split())
+
+    def test_batches_respect_token_limit(self):
+        self.embeddings.max_tokens_per_request = 5
+        batches = list(self.embeddings.batch_texts(["a b", "c", "d e f", "g", "h i j k l m"]))
+        self.assertEqual(batches, [["a b", "c"], ["d e f", "g"], ["h i j k l m"]])
+
+    def test_batches_respect_batch_size(self):
+        self.embeddings.batch_size = 2
+        batches = list(self.embeddings.batch_texts(["a", "b", "c"]))
+        self.assertEqual(batches, [["a", "b"], ["c"]])
+
+    def test_embed_documents_keeps_input_order(self):
+        self.embeddings.batch_size = 2
+        self.embeddings.model = type("Model", (), {
+            "embed_documents": lambda self, texts, chunk_size=0: [[float(len(text))] for text in texts]
+        })()
+        self.assertEqual(self.embeddings.embed_documents(["a", "bb", "ccc"]), [[1.0], [2.0], [3.0]])
+
+    def test_missing_tokenizer_is_looked_up_once(self):
+        embeddings = Embeddings()
+        with mock.patch("functions.embeddings.tiktoken.encoding_for_model", side_effect=KeyError("offline")) as lookup:
+            self.assertEqual(embeddings.count_tokens("abcdef"), 3)
+            self.assertEqual(embeddings.count_tokens("abc"), 2)
+        self.assertEqual(lookup.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
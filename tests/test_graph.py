@@ -0,0 +1,271 @@
+import unittest
+from database.neo4j import Graph, ALL_PROPERTIES
+from database.records import NodeRecord
+from database.write_buffer import WriteBuffer
+from utils.hashing import content_hash
+
+
+class StubConnection:
+    """
+    Stands in for GraphDatabaseConnection: records the queries and answers every read with
+    `records` and every write with `written`, or with their result if they are callables
+    taking (query, parameters). Like the real connection, a failed read returns None and a
+    failed write False.
+    """
+    def __init__(self, records=None, written=None):
+        self.records = records
+        self.written = written
+        self.reads = []
+        self.writes = []
+
+    def _answer(self, result, query, parameters):
+        return result(query, parameters) if callable(result) else result
+
+    def read(self, query, parameters={}):
+        self.reads.append((query, parameters))
+        return self._answer(self.records, query, parameters)
+
+    def write(self, query, parameters={}):
+        self.writes.append((query, parameters))
+        return self._answer(self.written, query, parameters)
+
+    def stream(self, query, parameters={}, fetch_size=None):
+        self.reads.append((query, parameters))
+        yield from self._answer(self.records, query, parameters) or []
+
+    def execute_write(self, work, *args):
+        return work(StubTransaction(self), *args)
+
+
+class StubTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def run(self, query, parameters):
+        self.connection.writes.append((query, parameters))
+        return []
+
+
+class OfflineGraph(Graph):
+    def __init__(self, connection=None):
+        self._init_queries()
+        self.graph = self
+        self.write_buffer = None
+        self.local_indexes = {}
+        self._vector_indexes = set()
+        self.graph_database = connection or StubConnection()
+
+
+class TestGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = OfflineGraph()
+
+    def test_failed_similarity_reads_return_no_neighbors(self):
+        self.assertEqual(self.graph.find_similar_nodes("a", k=3, index_name="Section"), [])
+        self.assertEqual(self.graph.find_similar_nodes_by_vector([1.0, 0.0], k=3, index_name="Section"), [])
+        self.assertEqual(self.graph.find_edges_by_relationship("NEXT"), [])
+        self.assertEqual(len(self.graph.graph_database.reads), 3)
+
+    def test_failed_fulltext_read_returns_no_hits(self):
+        self.assertEqual(self.graph.find_nodes_by_fulltext("tan fox", "Section"), [])
+        self.assertEqual(self.graph.find_nodes_by_fulltext("tan fox", "Section", with_embeddings=True), [])
+
+    def test_queued_nodes_are_found_by_content_hash(self):
+        with WriteBuffer(self.graph, max_size=100, max_interval=60):
+            self.graph.create_nodes_bulk([{"id": "a", "text": "A", "metadata": {"content_hash": "h1"}, "embedding": [1.0]}], "Chunk", link_similar=False)
+            nodes = self.graph.find_nodes_by_content_hashes(["h1"], node_label="Chunk")
+            self.assertEqual((nodes["h1"].id, nodes["h1"]["id"]), ("a", "a"))
+            self.assertEqual(self.graph.graph_database.reads, [])
+
+    def test_failed_index_lookup_links_new_rows_to_each_other_only(self):
+        self.graph._vector_indexes.add("Section")
+        rows = [{"id": "a", "embedding": [1.0, 0.0]}, {"id": "b", "embedding": [0.0, 1.0]}]
+        self.assertEqual(self.graph._index_neighbors(rows, "Section", 3, 0.5), [[], []])
+
+    def test_link_nodes_bulk_batches_pairs_by_id_type(self):
+        # Every batch reports all of its pairs as created
+        self.graph.graph_database.written = lambda query, params: [{"created": len(params["pairs"]), "updated": 0}]
+        pairs = [("a", "b"), ("b", "c", {"similarity": 0.5}), ("c", "d"), (1, 2), ("a", "a")]
+        stats = self.graph.link_nodes_bulk(pairs, relationship_name="NEXT", edge_values={"weight": 1}, batch_size=2)
+
+        self.assertEqual(stats, {"created": 4, "updated": 0, "skipped": 1, "failed": 0})
+        writes = self.graph.graph_database.writes
+        self.assertEqual([len(params["pairs"]) for _, params in writes], [2, 1, 1])
+        uid_query, params = writes[0]
+        self.assertIn("UNWIND $pairs AS pair", uid_query)
+        self.assertIn("start.id = pair.start_id", uid_query)
+        self.assertIn("MERGE (start)-[r1:NEXT]->(end)", uid_query)
+        self.assertNotIn("r2", uid_query)
+        self.assertIs(writes[1][0], uid_query)
+        self.assertIn("id(start) = pair.start_id", writes[2][0])
+        self.assertEqual(params["pairs"][1]["edge_values"], {"weight": 1, "similarity": 0.5})
+        self.assertEqual((params["force"], params["bidirectional"]), (False, False))
+
+    def test_link_nodes_bulk_counts_existing_and_failed_batches(self):
+        self.graph.graph_database.written = lambda query, params: False if params["pairs"][0]["start_id"] == "c" else [{"created": 1, "updated": 0}]
+        stats = self.graph.link_nodes_bulk([("a", "b"), ("b", "c"), ("c", "d")], relationship_name="NEXT", bidirectional=True, batch_size=2)
+
+        # The second pair of the first batch already existed
+        self.assertEqual(stats, {"created": 1, "updated": 0, "skipped": 1, "failed": 1})
+        self.assertIn("MERGE (start)<-[r2:NEXT]-(end)", self.graph.graph_database.writes[0][0])
+
+    def test_link_nodes_bulk_rejects_unknown_relationship(self):
+        with self.assertRaises(ValueError):
+            self.graph.link_nodes_bulk([("a", "b")], relationship_name="NEXT]->() DETACH DELETE (n")
+        self.assertEqual(self.graph.graph_database.writes, [])
+
+    def test_link_nodes_skips_self_links(self):
+        self.graph.graph_database.written = [{"created": 1, "updated": 0}]
+        self.assertTrue(self.graph.link_nodes("a", ["a", "b"], relationship_name="NEXT"))
+        self.assertEqual([pair["end_id"] for pair in self.graph.graph_database.writes[0][1]["pairs"]], ["b"])
+        self.assertFalse(self.graph.link_nodes("a", ["a"], relationship_name="NEXT"))
+
+    def test_find_child_nodes_follows_sequences_in_one_query(self):
+        children = [{"child": {"id": position, "labels": ["Section"], "properties": [["id", uid]]}} for position, uid in enumerate("abc")]
+        self.graph.graph_database.records = children
+        nodes = self.graph.find_child_nodes("doc", node_label="Section", sequence_label="NEXT", offset=1, limit=2)
+
+        self.assertEqual([node["id"] for node in nodes], ["a", "b", "c"])
+        [(query, params)] = self.graph.graph_database.reads
+        self.assertIn("parent.id = $parent_id", query)
+        self.assertIn("AND NOT EXISTS { MATCH (parent)-->(:Section)-[:NEXT]->(first_child) }", query)
+        self.assertIn("MATCH path = (first_child)-[:NEXT*0..]->(child)", query)
+        self.assertIn("ORDER BY id(first_child), length(path) SKIP $offset LIMIT $limit", " ".join(query.split()))
+        self.assertEqual((params["parent_id"], params["offset"], params["limit"]), ("doc", 1, 2))
+
+    def test_find_child_nodes_without_sequence(self):
+        self.assertEqual(self.graph.find_child_nodes(7, node_label="Section"), [])
+        [(query, params)] = self.graph.graph_database.reads
+        self.assertIn("id(parent) = $parent_id", query)
+        self.assertNotIn("path", query)
+        self.assertNotIn("SKIP", query)
+        self.assertNotIn("LIMIT", query)
+        with self.assertRaises(ValueError):
+            self.graph.find_child_nodes(7, node_label="Section", sequence_label="FOLLOWS")
+
+    def test_iter_child_nodes_streams_the_same_query(self):
+        self.graph.graph_database.records = [{"child": {"id": 1, "labels": ["Section"], "properties": [["id", "a"]]}}]
+        self.assertEqual([node.id for node in self.graph.iter_child_nodes("doc", node_label="Section", sequence_label="NEXT")], [1])
+        self.graph.find_child_nodes("doc", node_label="Section", sequence_label="NEXT")
+        streamed, found = self.graph.graph_database.reads
+        self.assertEqual(streamed, found)
+
+    def test_finders_project_away_the_embedding(self):
+        self.graph.graph_database.records = [{"n": {"id": 3, "labels": ["Section"], "properties": [["id", "a"]]}}]
+        node = self.graph.find_node_by_id("a")
+
+        self.assertIsInstance(node, NodeRecord)
+        self.assertEqual((node.id, node["id"]), (3, "a"))
+        query, params = self.graph.graph_database.reads[0]
+        self.assertIn("[key IN keys(n) WHERE NOT key IN $projection | [key, n[key]]]", query)
+        self.assertEqual(params["projection"], ["embedding"])
+
+        self.graph.find_nodes_by_properties({"id": "a"}, node_label="Section", projection=["text"])
+        query, params = self.graph.graph_database.reads[1]
+        self.assertIn("[key IN $projection WHERE n[key] IS NOT NULL | [key, n[key]]]", query)
+        self.assertEqual(params["projection"], ["text"])
+
+    def test_all_properties_returns_driver_nodes(self):
+        driver_node = object()
+        self.graph.graph_database.records = [{"n": driver_node}]
+
+        self.assertIs(self.graph.find_node_by_id(3, projection=ALL_PROPERTIES), driver_node)
+        query, params = self.graph.graph_database.reads[0]
+        self.assertIn("RETURN n AS n", query)
+        self.assertNotIn("projection", params)
+
+    def test_find_nodes_by_content_hashes_batches_unique_hashes(self):
+        self.graph.graph_database.records = lambda query, params: [
+            {"content_hash": digest, "n": {"id": 1, "labels": ["Chunk"], "properties": [["content_hash", digest]]}}
+            for digest in params["hashes"] if digest != "h2"
+        ]
+        nodes = self.graph.find_nodes_by_content_hashes(["h1", "h2", "h1", "h3"], node_label="Chunk", batch_size=2)
+
+        self.assertEqual(sorted(nodes), ["h1", "h3"])
+        self.assertEqual(nodes["h3"]["content_hash"], "h3")
+        reads = self.graph.graph_database.reads
+        self.assertEqual([params["hashes"] for _, params in reads], [["h1", "h2"], ["h3"]])
+        self.assertIn("MATCH (n:Chunk) WHERE n.content_hash IN $hashes", reads[0][0])
+        self.assertIs(reads[0][0], reads[1][0])
+
+    def test_bloom_filter_skips_new_hashes(self):
+        self.graph.use_content_hash_filter = True
+        self.graph.graph_database.records = [{"content_hash": "h1"}]
+        self.assertIsNotNone(self.graph.load_content_hash_filter("Chunk"))
+
+        self.graph.graph_database.records = []
+        self.graph.find_nodes_by_content_hashes(["h1", "h2"], node_label="Chunk")
+        self.assertEqual(self.graph.graph_database.reads[-1][1]["hashes"], ["h1"])
+        self.graph.register_content_hashes(["h2"], "Chunk")
+        self.graph.find_nodes_by_content_hashes(["h2", "h3"], node_label="Chunk")
+        self.assertEqual(self.graph.graph_database.reads[-1][1]["hashes"], ["h2"])
+        # All hashes are new, so there is nothing to read
+        reads = len(self.graph.graph_database.reads)
+        self.assertEqual(self.graph.find_nodes_by_content_hashes(["h4"], node_label="Chunk"), {})
+        self.assertEqual(len(self.graph.graph_database.reads), reads)
+
+    def test_failed_hash_load_keeps_reading_the_database(self):
+        def fail(query, params):
+            raise RuntimeError("connection lost")
+        self.graph.use_content_hash_filter = True
+        self.graph.graph_database.records = fail
+
+        self.assertIsNone(self.graph.load_content_hash_filter("Chunk"))
+        self.assertNotIn("Chunk", self.graph.content_hash_filters)
+
+    def test_content_hash_constraint_is_created_once(self):
+        self.assertTrue(self.graph.ensure_content_hash_constraint("Chunk"))
+        self.assertTrue(self.graph.ensure_content_hash_constraint("Chunk"))
+        [(query, params)] = self.graph.graph_database.writes
+        self.assertIn("CREATE CONSTRAINT chunk_content_hash_unique IF NOT EXISTS", query)
+        self.assertIn("REQUIRE n.content_hash IS UNIQUE", query)
+
+        self.graph.graph_database.written = False
+        self.assertFalse(self.graph.ensure_id_constraint("Chunk"))
+        self.assertFalse(self.graph.ensure_id_constraint("Chunk"))
+        self.assertEqual(len(self.graph.graph_database.writes), 3)
+
+    def test_backfill_content_hashes_in_batches(self):
+        self.graph.graph_database.records = [{"node_id": node_id, "text": text} for node_id, text in enumerate(["A fox", "A  fox", "A dog"])]
+        self.assertEqual(self.graph.backfill_content_hashes("Chunk", batch_size=2), 3)
+
+        writes = self.graph.graph_database.writes
+        self.assertEqual([[row["node_id"] for row in params["rows"]] for _, params in writes], [[0, 1], [2]])
+        self.assertEqual(writes[0][1]["rows"][0]["hash"], content_hash("A fox"))
+        self.assertEqual(writes[0][1]["rows"][0]["hash"], writes[0][1]["rows"][1]["hash"])
+
+    def test_iter_nodes_streams_projected_records(self):
+        self.graph.graph_database.records = [{"n": {"id": position, "labels": ["Section"], "properties": []}} for position in range(3)]
+        nodes = self.graph.iter_nodes_by_properties({"title": "Intro"}, node_label="Section")
+        self.assertEqual(self.graph.graph_database.reads, [])
+
+        self.assertEqual([node.id for node in nodes], [0, 1, 2])
+        [(query, params)] = self.graph.graph_database.reads
+        self.assertIn("MATCH (n:Section) WHERE n.title = $property_title", query)
+        self.assertEqual(params["property_title"], "Intro")
+
+    def test_update_nodes_properties_in_batches(self):
+        # Node "b" does not exist, the batch of internal IDs fails
+        self.graph.graph_database.written = lambda query, params: False if isinstance(params["rows"][0]["node_id"], int) else [
+            {"node_id": row["node_id"]} for row in params["rows"] if row["node_id"] != "b"
+        ]
+        updates = {"a": {"title": "A"}, "b": {"title": "B"}, "c": {"title": "C"}, 4: {"title": "D"}}
+        results = self.graph.update_nodes_properties(updates, batch_size=2)
+
+        self.assertEqual(results, {"a": True, "b": False, "c": True, 4: False})
+        writes = self.graph.graph_database.writes
+        self.assertEqual([[row["node_id"] for row in params["rows"]] for _, params in writes], [["a", "b"], ["c"], [4]])
+        self.assertIn("UNWIND $rows AS row", writes[0][0])
+        self.assertIn("n.id = row.node_id", writes[0][0])
+        self.assertIn("id(n) = row.node_id", writes[2][0])
+        self.assertEqual(writes[0][1]["rows"][0]["properties"], {"title": "A"})
+
+    def test_update_nodes_properties_are_queued_inside_write_behind(self):
+        with WriteBuffer(self.graph, max_size=100, max_interval=60) as buffer:
+            self.assertEqual(self.graph.update_nodes_properties({"a": {"title": "A"}, 2: {"title": "B"}}), {"a": True, 2: True})
+            self.assertEqual((len(buffer), self.graph.graph_database.writes), (2, []))
+        self.assertEqual(len(self.graph.graph_database.writes), 2)
+
+if __name__ == '__main__':
+    unittest.main()
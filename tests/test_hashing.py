@@ -0,0 +1,39 @@
+import unittest
+from utils.hashing import normalize_text, content_hash, BloomFilter
+
+class TestContentHash(unittest.TestCase):
+
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text("  A fast\n\n tan   fox "), "A fast tan fox")
+        self.assertEqual(normalize_text(None), "")
+
+    def test_content_hash_ignores_whitespace(self):
+        self.assertEqual(content_hash("A fast tan fox"), content_hash("A fast\n tan  fox\n"))
+        self.assertNotEqual(content_hash("A fast tan fox"), content_hash("A fast tan dog"))
+
+    def test_content_hash_is_hex_sha256(self):
+        digest = content_hash("text")
+        self.assertEqual(len(digest), 64)
+        int(digest, 16)
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_added_items_are_contained(self):
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        hashes = [content_hash(f"text {i}") for i in range(1000)]
+        bloom_filter.update(hashes)
+
+        self.assertEqual(len(bloom_filter), 1000)
+        for digest in hashes:
+            self.assertIn(digest, bloom_filter)
+
+    def test_false_positive_rate(self):
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        bloom_filter.update(content_hash(f"text {i}") for i in range(1000))
+
+        false_positives = sum(content_hash(f"other {i}") in bloom_filter for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from database.neo4j import Graph
+from database.indexes import SchemaManager
+
+
+class SchemaConnection:
+    """
+    Records schema statements and explains queries: property lookups on text scan the label,
+    everything else seeks an index.
+    """
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.statements = []
+
+    def write(self, query, parameters={}):
+        self.statements.append(query)
+        return False if any(name in query for name in self.failing) else []
+
+    def read(self, query, parameters={}):
+        return None
+
+    def explain(self, query, parameters={}):
+        if "n.text = $property_text" in query:
+            return {"operatorType": "ProduceResults@neo4j", "children": [{"operatorType": "NodeByLabelScan@neo4j", "children": []}]}
+        return {"operatorType": "ProduceResults@neo4j", "children": [{"operatorType": "NodeUniqueIndexSeek@neo4j", "children": []}]}
+
+
+class SchemaGraph(Graph):
+    def __init__(self, connection):
+        self._init_queries()
+        self.graph = self
+        self.write_buffer = None
+        self.local_indexes = {}
+        self._vector_indexes = set()
+        self.graph_database = connection
+
+
+class TestSchemaManager(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = SchemaGraph(SchemaConnection(failing=["chunk_fulltext"]))
+        self.schema_manager = SchemaManager(self.graph)
+        self.schema_manager.labels = ["Section", "Chunk"]
+
+    def test_declarations_are_idempotent(self):
+        declarations = self.schema_manager.declarations()
+        names = [declaration["name"] for declaration in declarations]
+
+        self.assertEqual(len(names), len(set(names)))
+        self.assertIn("section_content_hash_unique", names)
+        self.assertIn("similar_to_similarity", names)
+        for declaration in declarations:
+            self.assertIn("IF NOT EXISTS", declaration["statement"])
+
+    def test_migrate_reports_failed_statements(self):
+        summary = self.schema_manager.migrate()
+
+        self.assertEqual(summary["failed"], ["chunk_fulltext"])
+        self.assertEqual(len(summary["applied"]), len(self.schema_manager.declarations()) - 1)
+        self.assertEqual(len(self.graph.graph_database.statements), len(self.schema_manager.declarations()))
+        # The constraints are not created again when documents are added
+        self.assertIn(("Chunk", "content_hash"), self.graph._unique_constraints)
+        self.assertIn(("Section", "id"), self.graph._unique_constraints)
+        self.assertTrue(self.graph.ensure_id_constraint("Chunk"))
+        self.assertEqual(len(self.graph.graph_database.statements), len(self.schema_manager.declarations()))
+
+    def test_report_scans(self):
+        self.graph.use_content_hash_filter = True
+        report = self.schema_manager.report_scans()
+
+        self.assertEqual([(entry["name"], entry["operators"]) for entry in report], [("find_nodes_by_properties (text)", ["NodeByLabelScan"])])
+        self.assertIn("MATCH (n:Section) WHERE n.text = $property_text", report[0]["query"])
+        # The graph gets its connection and Bloom filter setting back
+        self.assertIsInstance(self.graph.graph_database, SchemaConnection)
+        self.assertTrue(self.graph.use_content_hash_filter)
+        self.assertEqual(self.graph.graph_database.statements, [])
+
+    def test_scan_operators_of_nested_plans(self):
+        plan = {"operatorType": "Filter", "children": [
+            {"operatorType": "AllNodesScan@neo4j", "children": []},
+            {"operatorType": "Expand(All)", "children": [{"operatorType": "DirectedRelationshipTypeScan", "children": []}]}
+        ]}
+        self.assertEqual(self.schema_manager._scan_operators(plan), {"AllNodesScan", "DirectedRelationshipTypeScan"})
+        self.assertEqual(self.schema_manager._scan_operators(None), set())
+
+if __name__ == '__main__':
+    unittest.main()
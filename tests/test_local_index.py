@@ -0,0 +1,126 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from database.neo4j import Graph
+from database.memory import MemoryGraph
+from database.local_index import LocalVectorIndex
+from functions.embeddings import HashingEmbeddings
+
+
+class TestLocalVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = MemoryGraph(embedding=HashingEmbeddings(dimension=16))
+        self.path = tempfile.mkdtemp()
+        self.vectors = np.random.default_rng(1).normal(size=(200, 16))
+        self.add(range(150), "2024-01-01 00:00:00")
+
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def add(self, indexes, last_indexed):
+        rows = [
+            {"id": f"n{index}", "text": f"text {index}", "metadata": {"last_indexed": last_indexed}, "embedding": self.vectors[index].tolist()}
+            for index in indexes
+        ]
+        self.graph.create_nodes_bulk(rows, "Chunk")
+
+    def index(self, **options):
+        return LocalVectorIndex(self.graph, "Chunk", path=self.path, **{"min_train_size": 1000, **options})
+
+    def assertSameNeighbors(self, neighbors, vector, k):
+        expected = self.graph.nearest_neighbors(vector, k=k, node_label="Chunk", projection=["id"])
+        self.assertEqual([node["id"] for node, score in neighbors], [node.get("id") for node, score in expected])
+        for (node, score), (expected_node, expected_score) in zip(neighbors, expected):
+            self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_exact_scan_matches_graph(self):
+        index = self.index()
+        self.assertEqual(index.sync(), 150)
+        neighbors = index.search(self.vectors[3], k=5)
+        self.assertSameNeighbors(neighbors, self.vectors[3], 5)
+        # The nodes look like the ones a search on the graph returns
+        node = neighbors[0][0]
+        expected = self.graph.find_node_by_id("n3")
+        self.assertEqual(node.id, expected.id)
+        self.assertEqual(node.labels, {"Chunk"})
+        self.assertEqual(dict(node.items()), {key: value for key, value in expected.items() if key != "embedding"})
+
+    def test_ivf_with_all_lists_probed_is_exact(self):
+        index = self.index(min_train_size=0, lists=6, probes=6)
+        index.sync()
+        self.assertEqual(len(index.centroids), 6)
+        for row in (0, 42, 149):
+            self.assertSameNeighbors(index.search(self.vectors[row], k=4), self.vectors[row], 4)
+        self.assertLessEqual(len(index.search(self.vectors[0], k=4, probes=1)), 4)
+
+    def test_quantized_search_is_reranked_exactly(self):
+        for quantization in ("int8", "pq"):
+            shutil.rmtree(self.path, ignore_errors=True)
+            index = self.index(min_train_size=0, lists=2, probes=2, quantization=quantization, subvectors=4, rerank=10)
+            index.sync()
+            self.assertEqual(index.codes.shape[1], 16 if quantization == "int8" else 4)
+            neighbors = index.search(self.vectors[5], k=3)
+            self.assertEqual(neighbors[0][0]["id"], "n5")
+            exact = self.graph.nearest_neighbors(self.vectors[5], k=150, node_label="Chunk", projection=["id"])
+            expected = {node.get("id"): score for node, score in exact}
+            for node, score in neighbors:
+                self.assertAlmostEqual(score, expected[node["id"]], places=5)
+
+        # New nodes are encoded on sync, and the quantizer survives a reload
+        self.add(range(150, 200), "2024-01-02 00:00:00")
+        index.sync()
+        self.assertEqual(len(index.codes), 200)
+        reloaded = self.index(quantization="pq", subvectors=4, rerank=10)
+        self.assertEqual(reloaded.quantizer.kind, "pq")
+        self.assertEqual(reloaded.search(self.vectors[199], k=1)[0][0]["id"], "n199")
+
+    def test_incremental_sync_and_reload(self):
+        index = self.index()
+        index.sync()
+        self.add(range(150, 200), "2024-01-02 00:00:00")
+        # Nodes of the last synced second are pulled again, in case more were written in it
+        self.assertEqual(index.sync(), 50 + 150)
+        self.assertEqual(len(index), 200)
+        self.assertEqual(index.watermark, "2024-01-02 00:00:00")
+
+        # Re-indexed nodes replace their row
+        self.vectors[0] = self.vectors[199]
+        self.add([0], "2024-01-03 00:00:00")
+        self.assertEqual(index.sync(), 51)
+        self.assertEqual(len(index), 200)
+
+        reloaded = LocalVectorIndex(MemoryGraph(embedding=HashingEmbeddings(dimension=16)), "Chunk", path=self.path)
+        self.assertEqual(len(reloaded), 200)
+        neighbors = reloaded.search(self.vectors[199], k=2)
+        self.assertEqual({node["id"] for node, score in neighbors}, {"n0", "n199"})
+        self.assertEqual({node["text"] for node, score in neighbors}, {"text 0", "text 199"})
+
+    def test_similarity_threshold(self):
+        index = self.index()
+        index.sync()
+        neighbors = index.search(self.vectors[7], k=3, similarity_threshold=0.99)
+        self.assertEqual([node["id"] for node, score in neighbors], ["n7"])
+
+    def test_invalid_quantization_fails_fast(self):
+        with self.assertRaises(ValueError):
+            self.index(quantization="pq", subvectors=5)
+        with self.assertRaises(ValueError):
+            self.index(quantization="float16")
+
+        # 3 subvectors fit the configured dimension but not the 16 of the mirrored vectors
+        index = self.index(quantization="pq", subvectors=3)
+        with self.assertRaises(ValueError):
+            index.sync()
+        self.assertEqual(len(index), 0)
+
+    def test_failed_index_is_remembered(self):
+        with mock.patch.object(LocalVectorIndex, "sync", side_effect=OSError("disk full")) as sync:
+            self.assertIsNone(Graph.local_index(self.graph, "Chunk"))
+            self.assertIsNone(Graph.local_index(self.graph, "Chunk"))
+        self.assertEqual(sync.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
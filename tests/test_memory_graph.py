@@ -0,0 +1,257 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from langchain.schema import Document
+from database.memory import MemoryGraph
+from database.records import NodeRecord
+from utils.hashing import content_hash
+from functions.embeddings import HashingEmbeddings
+from functions.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+class TestMemoryGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = MemoryGraph(embedding=HashingEmbeddings(dimension=64))
+        self.vector_store = self.graph.get_vector_store()
+
+    def add(self, texts, node_label):
+        return self.vector_store.add_documents(text=texts, node_label=node_label)
+
+    def test_add_documents_deduplicates_by_content_hash(self):
+        first = self.add(["A fast tan fox", "A slow dog"], "Section")
+        second = self.add(["A fast\n tan fox"], "Section")
+
+        self.assertEqual(len(self.graph.nodes), 2)
+        self.assertEqual(self.graph.find_node_by_id(second[0])["text"], "A fast tan fox")
+        self.assertEqual(self.graph.find_node_by_id(first[0]).id, second[0])
+        self.assertNotIn("embedding", self.graph.find_node_by_id(first[0]))
+
+    def test_add_documents_force_rewrites_existing_nodes(self):
+        first = self.add(["A fast tan fox"], "Section")
+        self.graph.update_node_properties(first[0], {"embedding": [0.0] * 64})
+        forced = self.vector_store.add_documents(text=["A fast tan fox", "A fast tan fox"], node_label="Section", force=True)
+
+        self.assertEqual(forced, first * 2)
+        self.assertEqual(len(self.graph.nodes), 1)
+        node = self.graph.find_node_by_id(first[0], projection=["embedding"])
+        self.assertNotEqual(node["embedding"], [0.0] * 64)
+
+    def test_add_documents_leaves_document_metadata_alone(self):
+        document = Document(page_content="A fast tan fox", metadata={"source": "fox.txt"})
+        node_id = self.vector_store.add_documents(documents=document, node_label="Section")[0]
+
+        self.assertEqual(document.metadata, {"source": "fox.txt"})
+        node = self.graph.find_node_by_id(node_id)
+        self.assertEqual(node["source"], "fox.txt")
+        self.assertIn("content_hash", node)
+
+    def test_add_documents_force_keeps_node_without_id(self):
+        self.graph._create_node(["Section"], {"text": "A fast tan fox", "content_hash": content_hash("A fast tan fox")})
+        forced = self.vector_store.add_documents(text=["A fast tan fox"], node_label="Section", force=True)
+
+        self.assertEqual(forced, [0])
+        self.assertEqual(len(self.graph.nodes), 1)
+        self.assertNotIn("id", self.graph.nodes[0]["properties"])
+
+    def test_find_nodes_by_properties(self):
+        section_id = self.add(["A fast tan fox"], "Section")[0]
+        self.graph.update_node_properties(section_id, {"summary": "Fox"})
+
+        nodes = self.graph.find_nodes_by_properties({"summary": "Fox"}, node_label="Section", projection=["summary"])
+        self.assertEqual([node.get("summary") for node in nodes], ["Fox"])
+        self.assertEqual(list(nodes[0].keys()), ["summary"])
+        self.assertEqual(self.graph.find_nodes_by_properties({"id": section_id}, node_label="Document"), [])
+
+    def test_update_nodes_properties(self):
+        first, second = self.add(["one", "two"], "Section")
+        results = self.graph.update_nodes_properties({first: {"summary": "1"}, "missing": {"summary": "?"}})
+        self.assertEqual(results, {first: True, "missing": False})
+
+    def test_write_behind_applies_writes_immediately(self):
+        section_id = self.add(["A fast tan fox"], "Section")[0]
+        with self.graph.write_behind() as buffer:
+            self.graph.update_node_properties(section_id, {"summary": "Fox"})
+            self.assertEqual(self.graph.find_node_by_id(section_id)["summary"], "Fox")
+            self.assertTrue(buffer.flush())
+        self.assertEqual(buffer.stats["failed"], 0)
+
+    def test_child_nodes_in_sequence_order(self):
+        document_id = self.add(["The document"], "Document")[0]
+        section_ids = self.graph.save_and_link_sequentially(
+            graph=self.graph,
+            text="one two three",
+            chunker=str.split,
+            node_label="Section",
+            relationship_name="CONTAINS",
+            sequence_relationship_name="NEXT",
+            parent_ids=document_id,
+            parent_linking_pattern="all"
+        )
+        # Link in reverse order of creation to make sure the sequence, not the ID, decides
+        self.graph.link_nodes_bulk([(section_ids[2], section_ids[1])], relationship_name="LINKS_TO")
+
+        sections = self.graph.find_child_nodes(document_id, node_label="Section", sequence_label="NEXT")
+        self.assertEqual([section["text"] for section in sections], ["one", "two", "three"])
+
+        sections = self.graph.find_child_nodes(document_id, node_label="Section", sequence_label="NEXT", offset=1, limit=1)
+        self.assertEqual([section["text"] for section in sections], ["two"])
+
+        parent = self.graph.find_parent_node_by_id(section_ids[1], parent_label="Document")
+        self.assertEqual(parent["text"], "The document")
+
+    def test_link_nodes_bulk_stats(self):
+        first, second, third = self.add(["one", "two", "three"], "Chunk")
+
+        stats = self.graph.link_nodes_bulk([(first, second), (first, first), (first, "missing")], relationship_name="SIMILAR_TO")
+        self.assertEqual(stats, {"created": 1, "updated": 0, "skipped": 2, "failed": 0})
+
+        stats = self.graph.link_nodes_bulk([(first, second, {"similarity": 0.5})], relationship_name="SIMILAR_TO", force=True)
+        self.assertEqual(stats["updated"], 1)
+        edges = self.graph.find_edges_by_property("similarity", 0.5, origin_id=first)
+        self.assertEqual(len(edges), 1)
+        self.assertEqual(edges[0].type, "SIMILAR_TO")
+
+        stats = self.graph.link_nodes_bulk([(second, third)], relationship_name="SIMILAR_TO", bidirectional=True)
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(len(self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=third)), 1)
+
+    def test_nearest_neighbors(self):
+        self.add(["a fast tan fox jumps", "a slow brown dog sleeps", "fast tan foxes jump high"], "Chunk")
+        vector = self.vector_store.embeddings_model.embed_query("a fast tan fox jumps")
+
+        neighbors = self.graph.nearest_neighbors(vector, k=2, node_label="Chunk")
+        self.assertEqual(neighbors[0][0]["text"], "a fast tan fox jumps")
+        self.assertAlmostEqual(neighbors[0][1], 1.0, places=5)
+        self.assertGreaterEqual(neighbors[0][1], neighbors[1][1])
+
+        documents = self.vector_store.similarity_search_by_text("a fast tan fox jumps", k=3, similarity_threshold=0.99, node_label="Chunk")
+        self.assertEqual([document.page_content for document, score in documents], ["a fast tan fox jumps"])
+
+    def test_similarity_search_many(self):
+        self.add(["a fast tan fox jumps", "a slow brown dog sleeps"], "Chunk")
+        results = self.vector_store.similarity_search_many(
+            ["a slow brown dog sleeps", "nothing alike", "a fast tan fox jumps"], k=2, similarity_threshold=0.99, node_label="Chunk"
+        )
+        self.assertEqual([[document.page_content for document, score in documents] for documents in results],
+                         [["a slow brown dog sleeps"], [], ["a fast tan fox jumps"]])
+        single = self.vector_store.similarity_search_by_text("a slow brown dog sleeps", k=2, similarity_threshold=0.99, node_label="Chunk")
+        self.assertEqual(results[0][0][0].metadata, single[0][0].metadata)
+
+    def test_hybrid_search_skips_embeddings(self):
+        fox, dog, foxes = self.add(["a fast tan fox jumps", "a slow brown dog sleeps", "fast tan foxes jump high"], "Chunk")
+        self.graph.update_node_properties(dog, {"title": "Dogs"})
+
+        hits = self.graph.find_nodes_by_fulltext("tan fox", "Chunk")
+        self.assertEqual([node.id for node, score in hits], [self.graph.find_node_by_id(fox).id, self.graph.find_node_by_id(foxes).id])
+
+        searches = []
+        nearest_neighbors = self.graph.nearest_neighbors
+        self.graph.nearest_neighbors = lambda *args, **kwargs: searches.append(args) or nearest_neighbors(*args, **kwargs)
+
+        # Without a cached query embedding, the full-text matches have no cosine to the query
+        model = self.vector_store.embeddings_model
+        self.vector_store.similarity_search_by_text("fox", k=5, similarity_threshold=0.5, node_label="Chunk", mode="hybrid")
+        self.assertEqual(len(searches), 1)
+
+        # With a cached one, matches are reranked with their stored embeddings and nothing is embedded
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = EmbeddingCache(os.path.join(directory, "embeddings.sqlite"))
+        self.addCleanup(cache.close)
+        cached = CachedEmbeddings(model, cache, model_name="hashing")
+        for text in ("fox", "dogs", "a quick tan fox", "cats"):
+            cached.embed_query(text)
+        cached.embeddings = None
+        self.vector_store.embeddings_model = cached
+
+        documents = self.vector_store.similarity_search_by_text("fox", k=5, similarity_threshold=0.5, node_label="Chunk", mode="hybrid")
+        self.assertEqual([document.page_content for document, score in documents], ["a fast tan fox jumps"])
+        self.assertAlmostEqual(documents[0][1], (1 + np.dot(model.embed_query("fox"), model.embed_query("a fast tan fox jumps"))) / 2, places=5)
+        self.assertEqual(documents[0][0].metadata["node_labels"], ["Chunk"])
+        nodes = self.vector_store.similarity_search_nodes_by_text("dogs", k=1, similarity_threshold=0.5, node_label="Chunk", mode="hybrid")
+        self.assertEqual([node.id for node, score in nodes], [self.graph.find_node_by_id(dog).id])
+        self.vector_store.similarity_search_by_text("a quick tan fox", k=1, similarity_threshold=0.5, node_label="Chunk", mode="hybrid")
+        self.assertEqual(len(searches), 1)
+
+        # Without full-text matches the search falls back to the vector index
+        self.vector_store.similarity_search_by_text("cats", k=1, similarity_threshold=0.5, node_label="Chunk", mode="hybrid")
+        self.assertEqual(len(searches), 2)
+
+    def test_link_similar_nodes_by_stored_vector(self):
+        fox, dog, foxes = self.add(["a fast tan fox jumps", "a slow brown dog sleeps", "fast tan foxes jump high"], "Chunk")
+
+        # Neither the search nor the linking may embed text again
+        self.vector_store.embeddings_model = None
+
+        neighbors = self.graph.find_similar_nodes(fox, k=1, projection=[])
+        self.assertEqual([node.id for node, score in neighbors], [self.graph.find_node_by_id(foxes).id])
+        self.assertEqual(list(neighbors[0][0].keys()), [])
+
+        self.assertTrue(self.graph.find_and_link_similar_nodes_by_id(fox, similarity_threshold=0.65, node_label="Chunk"))
+        edges = self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=fox)
+        self.assertEqual([edge.end_node.id for edge in edges], [self.graph.find_node_by_id(foxes).id])
+        self.assertGreater(edges[0]["similarity"], 0.65)
+
+    def test_link_similar_nodes_by_text_fuzzy(self):
+        fox, dog, foxes = self.add(["a fast tan fox jumps", "a slow brown dog sleeps", "fast tan foxes jump high"], "Chunk")
+
+        documents = self.vector_store.similarity_search_by_text("a fast tan fox jumps", k=1, similarity_threshold=0.9, node_label="Chunk")
+        node = NodeRecord.from_document(documents[0][0])
+        self.assertEqual(node.id, self.graph.find_node_by_id(fox).id)
+        self.assertEqual(node.labels, {"Chunk"})
+        self.assertEqual(node["text"], "a fast tan fox jumps")
+
+        # Origin nodes come back from the search, so nothing is looked up by text
+        self.graph.find_nodes_by_properties = None
+        self.assertTrue(self.graph.find_and_link_similar_nodes_by_text_fuzzy(
+            "a fast tan fox jumps", similarity_threshold=0.65, node_label="Chunk", max_nodes=1
+        ))
+        edges = self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=fox)
+        self.assertEqual([edge.end_node.id for edge in edges], [self.graph.find_node_by_id(foxes).id])
+
+        self.assertTrue(self.graph.find_and_link_similar_nodes_by_text("fast tan foxes jump high", similarity_threshold=0.65, node_label="Chunk"))
+        self.assertEqual(len(self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=foxes)), 1)
+        self.assertFalse(self.graph.find_and_link_similar_nodes_by_text("a missing text", node_label="Chunk"))
+
+        self.assertTrue(self.graph.find_and_link_similar_nodes_by_text_fuzzy(
+            ["a fast tan fox jumps", "fast tan foxes jump high"], similarity_threshold=0.65, node_label="Chunk", max_nodes=1, force=True
+        ))
+        self.assertEqual(len(self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=foxes)), 1)
+
+    def test_similar_nodes_in_scope(self):
+        first, second = self.add(["The first document", "The second document"], "Document")
+        fox, dog = self.add(["a fast tan fox jumps", "a slow brown dog sleeps"], "Section")
+        foxes, = self.add(["fast tan foxes jump high"], "Section")
+        self.graph.link_nodes_bulk([(first, fox), (first, dog), (second, foxes)], relationship_name="CONTAINS")
+
+        # The most similar section belongs to the other document
+        neighbors = self.graph.find_similar_nodes_in_scope(first, "Section", node_id=fox, k=5)
+        self.assertEqual([node["text"] for node, score in neighbors], ["a slow brown dog sleeps"])
+        neighbors = self.graph.find_similar_nodes_in_scope(second, "Section", node_id=fox, similarity_threshold=0.65)
+        self.assertEqual([node.id for node, score in neighbors], [self.graph.find_node_by_id(foxes).id])
+        self.assertEqual(self.graph.find_similar_nodes_in_scope(second, "Document", node_id=fox), [])
+
+        self.assertTrue(self.graph.find_and_link_similar_nodes_by_id(
+            fox, similarity_threshold=0, node_label="Section", limit_to_children_of_parent_id=first
+        ))
+        edges = self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=fox)
+        self.assertEqual([edge.end_node.id for edge in edges], [self.graph.find_node_by_id(dog).id])
+
+    def test_link_similar_on_insert(self):
+        fox = self.add(["a fast tan fox jumps"], "Chunk")[0]
+        dog, foxes = self.vector_store.add_documents(
+            text=["a slow brown dog sleeps", "fast tan foxes jump high"],
+            node_label="Chunk",
+            link_similar=True,
+            similarity_threshold=0.65
+        )
+
+        edges = self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=foxes)
+        self.assertEqual([edge.end_node.id for edge in edges], [self.graph.find_node_by_id(fox).id])
+        self.assertEqual(self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=dog), [])
+
+if __name__ == '__main__':
+    unittest.main()
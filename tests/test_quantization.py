@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from database.quantization import create_quantizer, save_quantizer, load_quantizer, quantized_scores
+from database.similarity_graph import normalize_rows
+
+
+class TestQuantization(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = normalize_rows(np.random.default_rng(4).normal(size=(500, 32)))
+        self.query = self.vectors[0]
+        self.exact = self.vectors @ self.query
+
+    def test_int8(self):
+        quantizer = create_quantizer("int8", 32).train(self.vectors)
+        codes = quantizer.encode(self.vectors)
+        self.assertEqual((codes.dtype, codes.shape), (np.int8, (500, 32)))
+        scores = quantized_scores(quantizer, self.query, codes, np.arange(500), block_size=128)
+        self.assertLess(np.abs(scores - self.exact).max(), 0.05)
+        self.assertEqual(int(np.argmax(scores)), 0)
+
+    def test_product_quantization(self):
+        quantizer = create_quantizer("pq", 32).train(self.vectors)
+        codes = quantizer.encode(self.vectors)
+        self.assertEqual((codes.dtype, codes.shape), (np.uint8, (500, 8)))
+        self.assertEqual(self.vectors.nbytes // codes.nbytes, 16)
+        scores = quantized_scores(quantizer, self.query, codes, np.arange(500))
+        self.assertGreater(np.corrcoef(scores, self.exact)[0, 1], 0.9)
+        with self.assertRaises(ValueError):
+            create_quantizer("pq", 32, subvectors=5).train(self.vectors)
+
+    def test_save_and_load(self):
+        path = os.path.join(tempfile.mkdtemp(), "quantizer.npz")
+        for kind in ("int8", "pq"):
+            quantizer = create_quantizer(kind, 32).train(self.vectors)
+            save_quantizer(quantizer, path)
+            loaded = load_quantizer(path)
+            self.assertEqual(loaded.kind, kind)
+            np.testing.assert_array_equal(loaded.encode(self.vectors[:10]), quantizer.encode(self.vectors[:10]))
+        os.remove(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from database.neo4j import GraphQueries
+from database.queries import QueryBuilder
+
+
+class Queries(GraphQueries):
+    def __init__(self):
+        self._init_queries()
+        self.queries = QueryBuilder(labels=["Section"], relationships=["NEXT", "SIMILAR_TO"])
+
+
+class TestQueryBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = Queries()
+
+    def test_rejects_unknown_identifiers(self):
+        with self.assertRaises(ValueError):
+            self.graph._nodes_by_properties_query({"id": "a"}, node_label="Section) DETACH DELETE (n")
+        with self.assertRaises(ValueError):
+            self.graph._edges_by_relationship_query("CONTAINS")
+        with self.assertRaises(ValueError):
+            self.graph._edges_by_property_query("similarity = 1 OR true", 0.9)
+
+    def test_allow_labels(self):
+        self.graph.queries.allow_labels("Paragraph")
+        self.graph._child_nodes_query("a", node_label="Paragraph")
+
+    def test_values_are_parameters(self):
+        query, params = self.graph._edges_by_property_query("similarity", "x' OR '1'='1", origin_id=1, target_id="b")
+        self.assertNotIn("x'", query)
+        self.assertEqual(params["value"], "x' OR '1'='1")
+        self.assertEqual(params["start_id"], 1)
+        self.assertEqual(params["end_id"], "b")
+
+    def test_same_shape_reuses_template(self):
+        first, first_params = self.graph._nodes_by_properties_query({"id": "a"}, node_label="Section", projection=["text"])
+        templates = len(self.graph.queries)
+        second, second_params = self.graph._nodes_by_properties_query({"id": "b"}, node_label="Section", projection=["title"])
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.graph.queries), templates)
+        self.assertEqual(second_params["property_id"], "b")
+        self.assertEqual(second_params["projection"], ["title"])
+
+    def test_id_type_changes_template(self):
+        internal, _ = self.graph._child_nodes_query(1, node_label="Section", sequence_label="NEXT")
+        uid, _ = self.graph._child_nodes_query("a", node_label="Section", sequence_label="NEXT")
+        self.assertIn("id(parent) = $parent_id", internal)
+        self.assertIn("parent.id = $parent_id", uid)
+
+    def test_similar_nodes_query_uses_stored_vector(self):
+        query, params = self.graph._similar_nodes_query("a", 5, similarity_threshold=0.9, projection=[])
+        self.assertIn("origin.embedding", query)
+        self.assertIn("node <> origin", query)
+        self.assertEqual((params["node_id"], params["k"], params["index_name"]), ("a", 5, None))
+        other, _ = self.graph._similar_nodes_query("b", 10, index_name="Section", projection=["text"])
+        self.assertIs(query, other)
+
+    def test_similar_nodes_by_vectors_batches(self):
+        batches = self.graph._similar_nodes_by_vectors_batches([[1, 0], [0, 1], [1, 1]], 3, "Section", 0.5, projection=[], batch_size=2)
+        self.assertEqual([start for _, _, start in batches], [0, 2])
+        self.assertIs(batches[0][0], batches[1][0])
+        self.assertIn("UNWIND range(0, size($vectors) - 1) AS position", batches[0][0])
+        self.assertEqual(batches[1][1]["vectors"], [[1.0, 1.0]])
+        self.assertEqual((batches[0][1]["k"], batches[0][1]["similarity_threshold"]), (3, 0.5))
+
+    def test_scoped_similar_nodes_query(self):
+        self.graph.queries.allow_relationships("CONTAINS")
+        exact, params = self.graph._scoped_similar_nodes_query("doc", "Section", 5, node_id="a", max_depth=2)
+        self.assertIn("-[:CONTAINS*1..2]->(node:Section)", exact)
+        self.assertIn("vector.similarity.cosine", exact)
+        self.assertEqual((params["parent_id"], params["node_id"], params["vector"], params["index_name"]), ("doc", "a", None, "Section"))
+
+        indexed, params = self.graph._scoped_similar_nodes_query(1, "Section", 5, vector=[1, 0], candidates=50)
+        self.assertIn("db.index.vector.queryNodes($index_name, $candidates, vector)", indexed)
+        self.assertIn("EXISTS { MATCH (parent)-[:CONTAINS*1..]->(node:Section) }", indexed)
+        self.assertIn("id(parent) = $parent_id", indexed)
+        self.assertIn("min(score) AS lowest", indexed)
+        self.assertIn("RETURN CASE WHEN node IS NULL THEN null ELSE", indexed)
+        self.assertEqual((params["candidates"], params["vector"]), (50, [1.0, 0.0]))
+        with self.assertRaises(ValueError):
+            self.graph._scoped_similar_nodes_query("doc", "Section", 5, node_id="a", relationship_name="OWNS")
+
+    def test_scoped_results_stop_growing_below_threshold(self):
+        node = {"id": 1, "labels": ["Section"], "properties": [["id", "a"]]}
+        # Fewer than k found, but the index already returned candidates below the threshold
+        results, done = self.graph._scoped_results([{"node": node, "score": 0.95, "lowest": 0.8, "in_scope": 3}], 5, 100, 1000, 0.9)
+        self.assertEqual([(result.id, score) for result, score in results], [(1, 0.95)])
+        self.assertTrue(done)
+        # k candidates were in the scope, the threshold cut all of them
+        results, done = self.graph._scoped_results([{"node": None, "score": None, "lowest": 0.92, "in_scope": 5}], 5, 100, 1000, 0.9)
+        self.assertEqual(results, [])
+        self.assertTrue(done)
+        # Too few candidates in the scope and all above the threshold
+        self.assertFalse(self.graph._scoped_results([{"node": None, "score": None, "lowest": 0.92, "in_scope": 0}], 5, 100, 1000, 0.9)[1])
+
+    def test_scope_candidates(self):
+        self.graph.config = {**self.graph.config, "VECTOR_INDEX": {"EXACT_SCOPE_SIZE": 100, "SCOPE_OVERFETCH": 2, "MAX_SCOPE_CANDIDATES": 5000}}
+        self.assertIsNone(self.graph._scope_candidates(10, 100, 1000000))
+        # A scope of 1% of the label needs about 100x the in-scope neighbors
+        self.assertEqual(self.graph._scope_candidates(10, 10000, 1000000), 2000)
+        self.assertEqual(self.graph._scope_candidates(10, 10000, 1000000, previous=2000), 5000)
+        self.assertIsNone(self.graph._scope_candidates(10, 10000, 1000000, previous=5000))
+        self.assertEqual(self.graph._scope_candidates(10, 500000, 1000000), 40)
+
+    def test_fulltext_query_escapes_text(self):
+        query, params = self.graph._fulltext_nodes_query('title: "A+B" OR (c)', "Section", 20, with_embeddings=True)
+        self.assertIn("db.index.fulltext.queryNodes($index_name, $query, {limit: $limit})", query)
+        self.assertIn("node.embedding AS embedding", query)
+        self.assertEqual(params["query"], 'title\\: \\"A\\+B\\" or \\(c\\)')
+        self.assertEqual((params["index_name"], params["limit"]), ("section_fulltext", 20))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from langchain.schema import Document
+from database.records import NodeRecord, EdgeRecord
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_node_record_from_projection(self):
+        node = NodeRecord.from_value({"id": 3, "labels": ["Section"], "properties": [["id", "a"], ["text", "A fox"]]})
+
+        self.assertEqual((node.id, node.labels), (3, frozenset(["Section"])))
+        self.assertEqual((node["id"], node.get("text"), node.get("embedding")), ("a", "A fox", None))
+        self.assertEqual(dict(node.items()), {"id": "a", "text": "A fox"})
+        self.assertEqual(sorted(node), ["id", "text"])
+        self.assertNotIn("embedding", node)
+        with self.assertRaises(KeyError):
+            node["embedding"]
+        self.assertIsNone(NodeRecord.from_value(None))
+
+    def test_node_records_are_equal_by_id(self):
+        self.assertEqual(NodeRecord(1, properties={"text": "A"}), NodeRecord(1))
+        self.assertNotEqual(NodeRecord(1), NodeRecord(2))
+        self.assertEqual(len({NodeRecord(1), NodeRecord(1, labels=["Section"])}), 1)
+
+    def test_node_record_from_document(self):
+        document = Document(page_content="A fox", metadata={"node_id": 3, "node_labels": ["Section"], "id": "a"})
+        node = NodeRecord.from_document(document)
+
+        self.assertEqual((node.id, node.labels, dict(node.items())), (3, frozenset(["Section"]), {"id": "a", "text": "A fox"}))
+        self.assertEqual(document.metadata["node_id"], 3)
+        self.assertIsNone(NodeRecord.from_document(Document(page_content="A fox", metadata={})))
+
+    def test_edge_record(self):
+        edge = EdgeRecord(5, "NEXT", 1, 2, {"similarity": 0.9})
+
+        self.assertEqual((edge.type, edge.start_node.id, edge.end_node.id), ("NEXT", 1, 2))
+        self.assertEqual((edge["similarity"], edge.get("weight")), (0.9, None))
+        self.assertEqual(edge, EdgeRecord(5, "NEXT", 3, 4))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from database.memory import MemoryGraph
+from database.similarity_graph import SimilarityGraphBuilder, _top_k_block
+from functions.embeddings import HashingEmbeddings
+
+
+class TestSimilarityGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = MemoryGraph(embedding=HashingEmbeddings(dimension=8))
+        self.checkpoint_dir = tempfile.mkdtemp()
+        self.vectors = np.random.default_rng(0).normal(size=(25, 8))
+        rows = [{"id": f"n{index}", "text": str(index), "metadata": {}, "embedding": vector.tolist()} for index, vector in enumerate(self.vectors)]
+        self.graph.create_nodes_bulk(rows, "Chunk")
+
+    def tearDown(self):
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+    def builder(self, **options):
+        options = {"k": 3, "similarity_threshold": 0, "block_size": 7, "column_block_size": 5, "workers": 1, **options}
+        return SimilarityGraphBuilder(self.graph, "Chunk", checkpoint_dir=self.checkpoint_dir, **options)
+
+    def expected_neighbors(self, k):
+        normalized = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        scores = normalized @ normalized.T
+        np.fill_diagonal(scores, -np.inf)
+        return np.argsort(-scores, axis=1)[:, :k]
+
+    def linked_neighbors(self, uid):
+        edges = self.graph.find_edges_by_relationship("SIMILAR_TO", origin_id=uid)
+        return {self.graph.nodes[edge.end_node.id]["properties"]["id"] for edge in edges}
+
+    def test_top_k_matches_brute_force(self):
+        stats = self.builder().run()
+
+        self.assertEqual(stats["nodes"], 25)
+        self.assertEqual(stats["blocks"], 4)
+        self.assertEqual(stats["created"], 75)
+        for index, neighbors in enumerate(self.expected_neighbors(3)):
+            self.assertEqual(self.linked_neighbors(f"n{index}"), {f"n{neighbor}" for neighbor in neighbors})
+        self.assertFalse(os.path.exists(os.path.join(self.checkpoint_dir, "Chunk")))
+
+    def test_process_pool(self):
+        stats = self.builder(workers=2).run()
+        self.assertEqual(stats["created"], 75)
+        self.assertEqual(self.linked_neighbors("n0"), {f"n{neighbor}" for neighbor in self.expected_neighbors(3)[0]})
+
+    def test_threshold(self):
+        stats = self.builder(similarity_threshold=0.99).run()
+        self.assertEqual(stats["created"], 0)
+
+    def test_resume_skips_finished_blocks(self):
+        builder = self.builder()
+        progress = builder._export_vectors()
+        progress["done"] = [0, 7]
+        builder._save_progress(progress)
+
+        stats = self.builder().run()
+        self.assertEqual(stats["resumed_blocks"], 2)
+        self.assertEqual(stats["created"], 11 * 3)
+        self.assertEqual(self.linked_neighbors("n0"), set())
+        self.assertEqual(len(self.linked_neighbors("n24")), 3)
+
+    def test_short_export_is_not_linked(self):
+        self.graph.count_nodes = lambda node_label, property_key=None: 26
+        stats = self.builder().run()
+        self.assertEqual(stats["created"], 0)
+        self.assertEqual(self.graph.find_edges_by_relationship("SIMILAR_TO"), [])
+        self.assertFalse(os.path.exists(os.path.join(self.checkpoint_dir, "Chunk")))
+
+    def test_block_excludes_itself(self):
+        builder = self.builder()
+        progress = builder._export_vectors()
+        start, indices, scores = _top_k_block(builder.matrix_path, progress["count"], progress["dimension"], 5, 10, 4, 3)
+        self.assertEqual(start, 5)
+        for row, neighbors in enumerate(indices):
+            self.assertNotIn(start + row, neighbors)
+        self.assertTrue(np.all(scores[:, :-1] >= scores[:, 1:]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from database.vector_indexes import VectorIndexRegistry
+
+
+class Driver:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Handle:
+    def __init__(self):
+        self._driver = Driver()
+
+
+class TestVectorIndexRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = VectorIndexRegistry()
+
+    def test_handles_share_the_given_driver(self):
+        shared = Driver()
+        created = []
+        create = lambda: created.append(Handle()) or created[-1]
+        first = self.registry.get("neo4j", "Section", "Section", create, driver=shared)
+        second = self.registry.get("neo4j", "Chunk", "Chunk", create, driver=shared)
+        self.assertIs(self.registry.get("neo4j", "Section", "Section", create, driver=shared), first)
+        self.assertEqual(len(created), 2)
+        self.assertIs(first._driver, shared)
+        self.assertIs(second._driver, shared)
+
+        # The drivers the handles opened are closed at once, the shared one stays open
+        self.registry.close()
+        self.assertFalse(shared.closed)
+        self.assertEqual(len(self.registry), 0)
+
+    def test_own_drivers_are_closed_with_the_registry(self):
+        handle = self.registry.get("neo4j", "Section", "Section", Handle)
+        self.assertFalse(handle._driver.closed)
+        self.registry.close()
+        self.assertTrue(handle._driver.closed)
+
+    def test_release_drops_handles_of_a_driver(self):
+        shared = Driver()
+        self.registry.get("neo4j", "Section", "Section", Handle, driver=shared)
+        self.registry.get("neo4j", "Chunk", "Chunk", Handle)
+        self.registry.release(shared)
+        self.assertEqual(len(self.registry), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from database.memory import MemoryGraph
+from database.vector_scan import VectorShards
+from functions.embeddings import HashingEmbeddings
+
+
+class TestVectorShards(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = MemoryGraph(embedding=HashingEmbeddings(dimension=8))
+        self.directory = tempfile.mkdtemp()
+        self.vectors = np.random.default_rng(2).normal(size=(30, 8))
+        rows = [{"id": f"n{index}", "text": str(index), "metadata": {}, "embedding": vector.tolist()} for index, vector in enumerate(self.vectors)]
+        self.graph.create_nodes_bulk(rows, "Chunk")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def export(self, **options):
+        options = {"shard_size": 7, "workers": 1, "query_block_size": 4, "column_block_size": 3, **options}
+        return VectorShards.export(self.graph, "Chunk", directory=self.directory, **options)
+
+    def expected(self, queries, k, exclude_self=False):
+        normalized = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = queries @ normalized.T
+        if exclude_self:
+            np.fill_diagonal(scores, -np.inf)
+        return [[f"n{index}" for index in row] for row in np.argsort(-scores, axis=1)[:, :k]]
+
+    def test_export(self):
+        shards = self.export()
+        self.assertEqual(len(shards), 30)
+        self.assertEqual(len(shards.shards), 5)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, "Chunk", "manifest.json")))
+        self.assertEqual(len(VectorShards(os.path.join(self.directory, "Chunk"))), 30)
+
+    def test_export_writes_shards_in_blocks(self):
+        with mock.patch("database.vector_scan.EXPORT_BLOCK_SIZE", 3):
+            shards = self.export()
+        self.assertEqual(shards.ids, [f"n{index}" for index in range(30)])
+        queries = np.random.default_rng(4).normal(size=(5, 8))
+        self.assertEqual([[uid for uid, score in matches] for matches in shards.search(queries, k=4)], self.expected(queries, 4))
+
+    def test_search_is_exact(self):
+        queries = np.random.default_rng(3).normal(size=(9, 8))
+        results = self.export().search(queries, k=5)
+        self.assertEqual([[uid for uid, score in matches] for matches in results], self.expected(queries, 5))
+        for matches in results:
+            scores = [score for uid, score in matches]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+
+        results = self.export(workers=2).search(queries[:1], k=40, similarity_threshold=0.5)
+        self.assertTrue(all(score > 0.5 for uid, score in results[0]))
+        self.assertLess(len(results[0]), 30)
+
+    def test_neighbors_exclude_themselves(self):
+        neighbors = list(self.export().neighbors(k=3))
+        self.assertEqual([uid for uid, matches in neighbors], [f"n{index}" for index in range(30)])
+        expected = self.expected(self.vectors, 3, exclude_self=True)
+        self.assertEqual([[uid for uid, score in matches] for uid, matches in neighbors], expected)
+
+    def test_dimension_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.export().search([[1.0, 0.0]], k=1)
+
+if __name__ == '__main__':
+    unittest.main()
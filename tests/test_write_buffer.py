@@ -0,0 +1,157 @@
+import unittest
+from database.neo4j import GraphQueries
+from database.write_buffer import WriteBuffer
+from utils.hashing import BloomFilter
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.transactions = []
+
+    def execute_write(self, work, *args):
+        transaction = RecordingTransaction()
+        result = work(transaction, *args)
+        self.transactions.append(transaction.queries)
+        return result
+
+
+class FailingConnection(RecordingConnection):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def execute_write(self, work, *args):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection lost")
+        return super().execute_write(work, *args)
+
+
+class RecordingTransaction:
+    def __init__(self):
+        self.queries = []
+
+    def run(self, query, parameters):
+        self.queries.append((query, parameters))
+        return []
+
+
+class BufferedGraph(GraphQueries):
+    def __init__(self):
+        self._init_queries()
+        self.graph_database = RecordingConnection()
+        self.write_buffer = None
+
+
+class TestWriteBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = BufferedGraph()
+
+    def test_flushes_all_kinds_in_one_transaction_on_exit(self):
+        with WriteBuffer(self.graph, max_size=100, max_interval=60) as buffer:
+            self.assertIs(self.graph.write_buffer, buffer)
+            buffer.add_update("a", {"summary": "A"})
+            buffer.add_update(1, {"summary": "B"})
+            buffer.add_links([("a", "b"), ("b", "c")], relationship_name="NEXT")
+            self.assertEqual(len(buffer), 4)
+            self.assertEqual(self.graph.graph_database.transactions, [])
+
+        self.assertIsNone(self.graph.write_buffer)
+        self.assertEqual(len(self.graph.graph_database.transactions), 1)
+        # One UNWIND query per ID type of the updates, one for the links
+        self.assertEqual(len(self.graph.graph_database.transactions[0]), 3)
+        self.assertEqual(buffer.stats["flushes"], 1)
+        self.assertEqual(buffer.stats["operations"], 4)
+
+    def test_flushes_when_full(self):
+        buffer = WriteBuffer(self.graph, max_size=2, max_interval=60)
+        buffer.add_update("a", {"summary": "A"})
+        self.assertEqual(self.graph.graph_database.transactions, [])
+        buffer.add_update("b", {"summary": "B"})
+        self.assertEqual(len(self.graph.graph_database.transactions), 1)
+        self.assertEqual(len(buffer), 0)
+
+    def test_empty_flush_does_not_write(self):
+        self.assertTrue(WriteBuffer(self.graph).flush())
+        self.assertEqual(self.graph.graph_database.transactions, [])
+
+    def test_failed_flush_keeps_writes_queued(self):
+        self.graph.graph_database = FailingConnection(failures=1)
+        buffer = WriteBuffer(self.graph, max_size=100, max_interval=60)
+        buffer.add_update("a", {"summary": "A"})
+        self.assertFalse(buffer.flush())
+        buffer.add_update("b", {"summary": "B"})
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.updates, [("a", {"summary": "A"}), ("b", {"summary": "B"})])
+
+        self.assertTrue(buffer.flush())
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(len(self.graph.graph_database.transactions), 1)
+
+    def test_failed_flush_on_exit_raises(self):
+        self.graph.graph_database = FailingConnection(failures=1)
+        with self.assertRaises(RuntimeError):
+            with WriteBuffer(self.graph, max_size=100, max_interval=60) as buffer:
+                buffer.add_update("a", {"summary": "A"})
+        self.assertIsNone(self.graph.write_buffer)
+        self.assertEqual(len(buffer), 1)
+
+    def test_failed_index_lookup_keeps_writes_queued(self):
+        def lookup(*args, **kwargs):
+            raise ConnectionError("connection lost")
+        self.graph._index_neighbors = lookup
+        buffer = WriteBuffer(self.graph, max_size=100, max_interval=60)
+        buffer.add_nodes([{"id": "a", "text": "A", "metadata": {}, "embedding": [1.0, 0.0]}], "Chunk", link_options=(2, 0.9))
+        buffer.add_update("a", {"summary": "A"})
+        self.assertFalse(buffer.flush())
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(len(buffer.nodes[("Chunk", "text", "embedding", (2, 0.9), None)]), 1)
+        self.assertEqual(self.graph.graph_database.transactions, [])
+
+    def test_unknown_relationship_is_rejected_when_queued(self):
+        buffer = WriteBuffer(self.graph, max_size=100, max_interval=60)
+        with self.assertRaises(ValueError):
+            buffer.add_links([("a", "b")], relationship_name="OWNS")
+        self.assertEqual(len(buffer), 0)
+
+    def test_queued_duplicates_are_dropped_and_hashes_registered_on_commit(self):
+        self.graph.graph_database = FailingConnection(failures=1)
+        bloom_filter = self.graph.content_hash_filters["Chunk"] = BloomFilter(capacity=100)
+        buffer = WriteBuffer(self.graph, max_size=100, max_interval=60)
+        row = lambda uid, digest: {"id": uid, "text": "A", "metadata": {"content_hash": digest}, "embedding": [1.0, 0.0]}
+        self.assertEqual(buffer.add_nodes([row("a", "h1"), row("b", "h1"), row("c", "h2")], "Chunk"), ["a", "a", "c"])
+        self.assertEqual(buffer.add_nodes([row("d", "h2")], "Chunk"), ["c"])
+        self.assertEqual(buffer.queued_nodes(["h1", "h3"], "Chunk"), {"h1": "a"})
+        self.assertEqual(len(buffer), 2)
+
+        # Nothing is committed, so the hashes stay queued and out of the Bloom filter
+        self.assertFalse(buffer.flush())
+        self.assertNotIn("h1", bloom_filter)
+        self.assertEqual(buffer.queued_nodes(["h1"], "Chunk"), {"h1": "a"})
+
+        self.assertTrue(buffer.flush())
+        self.assertIn("h1", bloom_filter)
+        self.assertEqual(buffer.queued_nodes(["h1", "h2"], "Chunk"), {})
+
+    def test_links_new_nodes_after_creating_them(self):
+        rows = [
+            {"id": "a", "text": "A", "metadata": {}, "embedding": [1.0, 0.0]},
+            {"id": "b", "text": "B", "metadata": {}, "embedding": [0.9, 0.1]},
+            {"id": "c", "text": "C", "metadata": {}, "embedding": [0.0, 1.0]},
+        ]
+        # Index neighbors are looked up before the write; "a" itself is in the index and is ignored
+        self.graph._index_neighbors = lambda rows, node_label, k, similarity_threshold, index_name=None: [[("a", 0.99), ("old", 0.95)], [], []]
+        with WriteBuffer(self.graph, max_size=100, max_interval=60) as buffer:
+            buffer.add_nodes(rows, "Chunk", link_options=(2, 0.9))
+
+        (create_query, create_params), (link_query, link_params) = self.graph.graph_database.transactions[0]
+        self.assertIn("MERGE (n:Chunk", create_query)
+        self.assertIn("MERGE (start)-[r1:SIMILAR_TO]->(end)", link_query)
+        # The close new neighbor and the indexed node are linked, the orthogonal one scores 0.5
+        pairs = [(pair["start_id"], pair["end_id"], pair["edge_values"]["similarity"]) for pair in link_params["pairs"]]
+        self.assertEqual([pair[:2] for pair in pairs], [("a", "b"), ("a", "old"), ("b", "a")])
+        self.assertFalse(link_params["bidirectional"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import hashlib
+import math
+import re
+import unicodedata
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """
+    Normalize text before hashing so that insignificant differences
+    (unicode composition, line breaks, repeated whitespace) yield the same hash.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return _whitespace.sub(" ", text).strip()
+
+
+def content_hash(text):
+    """
+    Return the hex SHA-256 digest of the normalized text.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """
+    Probabilistic set membership for content hashes.
+
+    `item in bloom_filter` is False only if the item was definitely never added;
+    True means it was *probably* added (false positive rate ~ error_rate at capacity).
+    """
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        error_rate = float(error_rate)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: derive all positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count